@@ -9,6 +9,7 @@ from .dataset import DifyDataset
 from .file import DifyFile
 from .http import AdminClient, ApiClient
 from .llm import DifyLLM
+from .sync import DifySync
 from .tag import DifyTag
 
 
@@ -20,4 +21,4 @@ class Dify(object):
         self.dataset = DifyDataset(admin_client)
         self.tag = DifyTag(admin_client)
 __version__ = "0.1.0"
-__all__ = ["Dify", "AdminClient"]
+__all__ = ["Dify", "DifySync", "AdminClient"]
@@ -1,5 +1,7 @@
+import asyncio
 import json
-from typing import AsyncGenerator
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, Awaitable, Callable, List, Optional, Set
 
 from .conversation import DifyConversation
 from .schemas import (
@@ -7,6 +9,7 @@ from .schemas import (
     App,
     ChatCompletionResponse,
     ChatPayloads,
+    CompletionResponse,
     ConversationEvent,
     ConversationEventType,
     ModelConfig,
@@ -14,18 +17,44 @@ from .schemas import (
     AppMode,
     AppParameters,
     OperationResult,
+    WorkflowRunResponse,
 )
 from .utils import parse_event
 from .workflow import DifyWorkflow
-from ..http import AdminClient
-from ..schemas import Pagination
+from ..cache import validate_cached
+from ..http import AdminClient, ApiClient
+from ..schemas import Pagination, project
+
+# 收到后服务端任务已经结束的事件
+_TERMINAL_EVENTS = (
+    ConversationEventType.MESSAGE_END,
+    ConversationEventType.WORKFLOW_FINISHED,
+    ConversationEventType.ERROR,
+)
 
 
 class DifyApp:
-    def __init__(self, admin_client: AdminClient) -> None:
+    """应用管理
+
+    Args:
+        admin_client: 管理客户端
+        stop_on_abort: 流式请求在结束前被取消、关闭或超时时，
+            是否自动通知服务端停止生成，默认为False
+        stop_timeout: 自动停止请求的超时时间（秒），默认为5
+    """
+
+    def __init__(
+            self,
+            admin_client: AdminClient,
+            stop_on_abort: bool = False,
+            stop_timeout: float = 5.0,
+    ) -> None:
         self.admin_client = admin_client
         self.conversation = DifyConversation(admin_client)
         self.workflow = DifyWorkflow(admin_client)
+        self.stop_on_abort = stop_on_abort
+        self.stop_timeout = stop_timeout
+        self._stop_tasks: Set[asyncio.Task] = set()
 
     async def find_list(
             self,
@@ -34,6 +63,7 @@ class DifyApp:
             mode: AppMode = None,
             name: str = "",
             is_created_by_me: bool = False,
+            fields: List[str] = None,
     ):
         """从 Dify 分页获取应用列表
 
@@ -43,11 +73,61 @@ class DifyApp:
             mode: 应用模式过滤，可选
             name: 应用名称过滤，默认为空字符串
             is_created_by_me: 是否只返回由我创建的应用，默认为False
+            fields: 只校验这些字段，如`["id", "name", "mode", "tags"]`
+                （即`AppSummary`），其余字段在首次访问时才校验，
+                为None时校验完整的`App`
 
         Returns:
-            Pagination[App]: 分页的应用列表
+            Pagination[App]: 分页的应用列表，指定`fields`时元素为部分字段模型
         """
+        model = project(App, fields) if fields else App
+        response_data = await self.admin_client.get(
+            "/apps",
+            params=self._list_params(page, limit, mode, name, is_created_by_me),
+        )
+
+        return validate_cached(self.admin_client, response_data, Pagination[model])
+
+    async def iter_list(
+            self,
+            page: int = 1,
+            limit: int = 100,
+            mode: AppMode = None,
+            name: str = "",
+            is_created_by_me: bool = False,
+            fields: List[str] = None,
+    ) -> AsyncGenerator[App, None]:
+        """流式获取一页应用，逐个解析和校验
+
+        与`find_list`参数相同，但不会同时在内存中保留整页的响应体和模型，适合`limit`较大、
+        每个应用都带有完整`app_config`的场景。
+
+        Args:
+            page: 页码，默认为1
+            limit: 每页数量限制，默认为100
+            mode: 应用模式过滤，可选
+            name: 应用名称过滤，默认为空字符串
+            is_created_by_me: 是否只返回由我创建的应用，默认为False
+            fields: 只校验这些字段，其余字段在首次访问时才校验，为None时校验完整的`App`
 
+        Returns:
+            AsyncGenerator[App, None]: 逐个返回的应用
+        """
+        model = project(App, fields) if fields else App
+        async for item in self.admin_client.iter_items(
+            "/apps",
+            params=self._list_params(page, limit, mode, name, is_created_by_me),
+        ):
+            yield model.model_validate(item)
+
+    @staticmethod
+    def _list_params(
+            page: int,
+            limit: int,
+            mode: Optional[AppMode],
+            name: str,
+            is_created_by_me: bool,
+    ) -> dict:
         params = {
             "page": page,
             "limit": limit,
@@ -57,13 +137,7 @@ class DifyApp:
 
         if mode:
             params["mode"] = mode.value
-
-        response_data = await self.admin_client.get(
-            "/apps",
-            params=params,
-        )
-
-        return Pagination[App].model_validate(response_data)
+        return params
 
     async def find_by_id(self, app_id: str) -> App:
         """根据ID从Dify获取单个应用详情
@@ -78,7 +152,7 @@ class DifyApp:
             httpx.HTTPStatusError: 当API请求失败时抛出
         """
         response_data = await self.admin_client.get(f"/apps/{app_id}")
-        return App.model_validate(response_data)
+        return validate_cached(self.admin_client, response_data, App)
 
     async def get_keys(self, app_id: str) -> list[ApiKey]:
         """获取应用的API密钥列表
@@ -205,24 +279,16 @@ class DifyApp:
         }
 
         # 使用API客户端发送流式请求
-        full_bytes = b""
-        async for chunk in api_client.stream(
-                f"/chat-messages", headers=headers, json=request_data
-        ):
-            full_bytes += chunk
-            full_content = full_bytes.decode()
-            if full_content == "event: ping\n\n":
-                full_bytes = b""
-                continue
-            # 确保事件块的完整性,以data:开头,以\n\n结尾
-            if full_content.startswith("data:") and full_content.endswith("\n\n"):
-                # 一个完整的事件块中可能包含多个事件
-                for line in full_content.split("\n\n"):
-                    if line.startswith("data: "):
-                        event_data = json.loads(line[6:])
-                        event = parse_event(event_data)
-                        yield event
-                full_bytes = b""
+        events = self._stream_events(
+            api_client,
+            f"/chat-messages",
+            headers,
+            request_data,
+            lambda task_id: self.conversation.stop_message(key, task_id, payloads.user),
+        )
+        async with aclosing(events):
+            async for event in events:
+                yield event
 
     async def completion(
             self, api_key: ApiKey | str, payloads: RunWorkflowPayloads
@@ -257,25 +323,18 @@ class DifyApp:
         }
 
         # 使用API客户端发送流式请求
-        full_bytes = b""
-        async for chunk in api_client.stream(
-                "/completion-messages",
-                method="POST",
-                headers=headers,
-                json=request_data,
-        ):
-            full_bytes += chunk
-            full_content = full_bytes.decode()
-            if full_content == "event: ping\n\n":
-                full_bytes = b""
-                continue
-            if full_content.startswith("data:") and full_content.endswith("\n\n"):
-                for line in full_content.split("\n\n"):
-                    if line.startswith("data: "):
-                        event_data = json.loads(line[6:])
-                        event = parse_event(event_data)
-                        yield event
-                full_bytes = b""
+        events = self._stream_events(
+            api_client,
+            "/completion-messages",
+            headers,
+            request_data,
+            lambda task_id: api_client.post(
+                f"/completion-messages/{task_id}/stop", json={"user": payloads.user}
+            ),
+        )
+        async with aclosing(events):
+            async for event in events:
+                yield event
 
     async def run(
             self, api_key: ApiKey | str, payloads: RunWorkflowPayloads
@@ -310,24 +369,165 @@ class DifyApp:
         }
 
         # 使用API客户端发送流式请求
-        full_bytes = b""
-        async for chunk in api_client.stream(
-                "/workflows/run",
-                json=request_data,
-                headers=headers,
-        ):
-            full_bytes += chunk
-            full_content = full_bytes.decode()
-            if full_content == "event: ping\n\n":
-                full_bytes = b""
-                continue
-            if full_content.startswith("data:") and full_content.endswith("\n\n"):
-                for line in full_content.split("\n\n"):
-                    if line.startswith("data: "):
-                        event_data = json.loads(line[6:])
-                        event = parse_event(event_data)
-                        yield event
-                full_bytes = b""
+        events = self._stream_events(
+            api_client,
+            "/workflows/run",
+            headers,
+            request_data,
+            lambda task_id: api_client.post(
+                f"/workflows/tasks/{task_id}/stop", json={"user": payloads.user}
+            ),
+        )
+        async with aclosing(events):
+            async for event in events:
+                yield event
+
+    async def _stream_events(
+            self,
+            api_client: ApiClient,
+            url: str,
+            headers: dict,
+            request_data: dict,
+            stop: Callable[[str], Awaitable[Any]],
+    ) -> AsyncGenerator[ConversationEvent, None]:
+        """发送流式请求并解析事件
+
+        从首个事件中记录`task_id`，开启`stop_on_abort`时，如果事件流在正常结束前被取消、关闭或超时，
+        在后台调用`stop`通知服务端停止生成，避免继续消耗token。
+        已产出结束事件（`message_end`、`workflow_finished`、`error`）后任务已经结束，不再发送停止请求。
+        """
+        task_id: Optional[str] = None
+        completed = False
+        try:
+            full_bytes = b""
+            async for chunk in api_client.stream(
+                url, headers=headers, json=request_data
+            ):
+                full_bytes += chunk
+                full_content = full_bytes.decode()
+                if full_content == "event: ping\n\n":
+                    full_bytes = b""
+                    continue
+                # 确保事件块的完整性,以data:开头,以\n\n结尾
+                if full_content.startswith("data:") and full_content.endswith("\n\n"):
+                    # 一个完整的事件块中可能包含多个事件
+                    for line in full_content.split("\n\n"):
+                        if line.startswith("data: "):
+                            event_data = json.loads(line[6:])
+                            event = parse_event(event_data)
+                            if task_id is None:
+                                task_id = getattr(event, "task_id", None)
+                            if getattr(event, "event", None) in _TERMINAL_EVENTS:
+                                completed = True
+                            yield event
+                    full_bytes = b""
+            completed = True
+        finally:
+            if (
+                not completed
+                and task_id
+                and request_data.get("user")
+                and self.stop_on_abort
+            ):
+                self._schedule_stop(stop, task_id)
+
+    def _schedule_stop(
+            self, stop: Callable[[str], Awaitable[Any]], task_id: str
+    ) -> None:
+        async def run():
+            try:
+                await asyncio.wait_for(stop(task_id), timeout=self.stop_timeout)
+            except Exception:
+                # 停止请求只是尽力而为，失败时服务端任务会自行结束
+                pass
+
+        try:
+            task = asyncio.get_running_loop().create_task(run())
+        except RuntimeError:
+            # 事件循环已关闭，无法再发送请求
+            return
+        self._stop_tasks.add(task)
+        task.add_done_callback(self._stop_tasks.discard)
+
+    async def wait_stopping(self) -> None:
+        """等待所有后台停止请求完成，适合在进程退出前调用"""
+        if self._stop_tasks:
+            await asyncio.gather(*self._stop_tasks, return_exceptions=True)
+
+    async def completion_block(
+            self,
+            api_key: ApiKey | str,
+            payloads: RunWorkflowPayloads,
+            timeout: int = 100,
+    ) -> CompletionResponse:
+        """使用阻塞模式进行补全,适用`App.mode`为`completion`的应用.
+
+        无论`payloads.response_mode`为何值，都以`blocking`模式发送请求，直接返回完整结果。
+
+        Args:
+            api_key: API密钥
+            payloads: 补全请求配置
+            timeout: 请求超时时间（秒），默认为100
+
+        Returns:
+            CompletionResponse: 补全结果
+
+        Raises:
+            ValueError: 当请求参数无效时抛出
+            DifyException: 当API请求失败时抛出
+        """
+        if not api_key:
+            raise ValueError("API密钥不能为空")
+
+        api_client = self.admin_client.create_api_client(
+            api_key.token if isinstance(api_key, ApiKey) else api_key
+        )
+
+        request_data = payloads.model_dump(exclude_none=True)
+        request_data["response_mode"] = "blocking"
+
+        response_data = await api_client.post(
+            "/completion-messages", json=request_data, timeout=timeout
+        )
+        return CompletionResponse.model_validate(response_data)
+
+    async def run_block(
+            self,
+            api_key: ApiKey | str,
+            payloads: RunWorkflowPayloads,
+            timeout: int = 100,
+    ) -> WorkflowRunResponse:
+        """使用阻塞模式运行工作流,适用`App.mode`为`workflow`的应用.
+
+        无论`payloads.response_mode`为何值，都以`blocking`模式发送请求，直接返回最终结果，
+        适合耗时较短、只关心最终输出的工作流。
+
+        Args:
+            api_key: API密钥
+            payloads: 工作流请求配置
+            timeout: 请求超时时间（秒），默认为100
+
+        Returns:
+            WorkflowRunResponse: 工作流执行结果
+
+        Raises:
+            ValueError: 当请求参数无效时抛出
+            DifyException: 当API请求失败时抛出
+        """
+        if not api_key:
+            raise ValueError("API密钥不能为空")
+
+        api_client = self.admin_client.create_api_client(
+            api_key.token if isinstance(api_key, ApiKey) else api_key
+        )
+
+        request_data = payloads.model_dump(exclude_none=True)
+        request_data["response_mode"] = "blocking"
+
+        response_data = await api_client.post(
+            "/workflows/run", json=request_data, timeout=timeout
+        )
+        return WorkflowRunResponse.model_validate(response_data)
 
     async def get_parameters(self, api_key: ApiKey | str) -> AppParameters:
         """获取应用参数配置
@@ -349,7 +549,7 @@ class DifyApp:
         )
 
         # 解析响应数据并返回AppParameters对象
-        return AppParameters.model_validate(response)
+        return validate_cached(api_client, response, AppParameters)
 
     async def stop_message(
             self, api_key: ApiKey | str, task_id: str, user_id: str
@@ -0,0 +1,309 @@
+import asyncio
+import heapq
+import os
+import time
+from typing import AsyncGenerator, Iterable, List, Optional, Set
+
+from pydantic import BaseModel, Field
+
+from . import DifyApp
+from .schemas import (
+    ApiKey,
+    ErrorEvent,
+    RunWorkflowPayloads,
+    WorkflowFinishedEvent,
+    WorkflowStatus,
+)
+
+
+class BatchResult(BaseModel):
+    """批量执行中单行的结果
+
+    Attributes:
+        index: 输入行序号，从0开始
+        status: 执行结果，succeeded或failed
+        outputs: 工作流输出内容
+        error: 错误信息
+        attempts: 执行次数
+        workflow_run_id: 最后一次执行的workflow执行ID
+        elapsed_time: 最后一次执行的耗时（秒）
+    """
+
+    index: int = Field(description="输入行序号")
+    status: str = Field(description="执行结果")
+    outputs: Optional[dict] = Field(default=None, description="工作流输出内容")
+    error: Optional[str] = Field(default=None, description="错误信息")
+    attempts: int = Field(default=0, description="执行次数")
+    workflow_run_id: Optional[str] = Field(default=None, description="workflow执行ID")
+    elapsed_time: Optional[float] = Field(default=None, description="耗时（秒）")
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status == WorkflowStatus.SUCCEEDED.value
+
+
+class _RateLimiter:
+    """按固定间隔放行请求的限速器"""
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1.0 / rate
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class WorkflowBatchRunner:
+    """工作流批量执行器
+
+    以有限并发执行大量`DifyApp.run`请求，收集每行的`WorkflowFinishedEvent.data.outputs`，
+    失败的行按指数退避重试。指定检查点文件后，每行结束即追加写入，
+    进程崩溃后重新运行会跳过已成功的行。
+
+    Args:
+        app: 应用管理对象
+        api_key: API密钥
+        concurrency: 最大并发执行数，默认为8
+        rate_limit: 每秒最多发起的请求数，为None时不限速
+        max_retries: 失败后的最大重试次数，默认为2
+        retry_backoff: 首次重试前的等待时间（秒），之后每次翻倍，默认为1
+        checkpoint_path: 检查点文件路径（JSONL），为None时不记录
+        max_pending: 按输入顺序输出时，已发出但还没有输出的行数上限，默认为并发数的4倍。
+            某一行卡住或长时间重试时，达到上限后暂停发出新行，避免后面完成的结果在内存中堆积
+    """
+
+    def __init__(
+            self,
+            app: DifyApp,
+            api_key: ApiKey | str,
+            concurrency: int = 8,
+            rate_limit: Optional[float] = None,
+            max_retries: int = 2,
+            retry_backoff: float = 1.0,
+            checkpoint_path: Optional[str] = None,
+            max_pending: Optional[int] = None,
+    ) -> None:
+        if not api_key:
+            raise ValueError("API密钥不能为空")
+        if concurrency < 1:
+            raise ValueError("并发数不能小于1")
+        if max_pending is not None and max_pending < concurrency:
+            raise ValueError("积压上限不能小于并发数")
+        self.app = app
+        self.api_key = api_key
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.checkpoint_path = checkpoint_path
+        self.max_pending = max_pending or concurrency * 4
+        self._limiter = _RateLimiter(rate_limit) if rate_limit else None
+
+    def completed_indices(self) -> Set[int]:
+        """读取检查点中已成功的行序号"""
+        done: Set[int] = set()
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return done
+        with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    result = BatchResult.model_validate_json(line)
+                except ValueError:
+                    # 崩溃时可能留下不完整的最后一行
+                    continue
+                if result.succeeded:
+                    done.add(result.index)
+                else:
+                    done.discard(result.index)
+        return done
+
+    @staticmethod
+    def build_payloads(
+            rows: Iterable[dict], template: RunWorkflowPayloads
+    ) -> Iterable[RunWorkflowPayloads]:
+        """用模板和输入行生成请求配置，行内容会合并到模板的`inputs`中
+
+        Args:
+            rows: 输入行
+            template: 请求配置模板
+
+        Returns:
+            Iterable[RunWorkflowPayloads]: 请求配置
+        """
+        for row in rows:
+            yield template.model_copy(
+                update={"inputs": {**(template.inputs or {}), **row}}
+            )
+
+    async def run_one(self, index: int, payloads: RunWorkflowPayloads) -> BatchResult:
+        """执行单行，失败时按策略重试
+
+        Args:
+            index: 行序号
+            payloads: 请求配置
+
+        Returns:
+            BatchResult: 执行结果
+        """
+        result = BatchResult(index=index, status=WorkflowStatus.FAILED.value)
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+            if self._limiter:
+                await self._limiter.acquire()
+            result.attempts = attempt + 1
+            try:
+                finished = None
+                async for event in self.app.run(self.api_key, payloads):
+                    if isinstance(event, ErrorEvent):
+                        raise RuntimeError(
+                            event.message or event.code or "工作流执行出错"
+                        )
+                    if isinstance(event, WorkflowFinishedEvent):
+                        finished = event
+                if finished is None or finished.data is None:
+                    raise RuntimeError("工作流未返回结束事件")
+                result.workflow_run_id = finished.workflow_run_id
+                result.elapsed_time = finished.data.elapsed_time
+                if finished.data.status == WorkflowStatus.SUCCEEDED:
+                    result.status = WorkflowStatus.SUCCEEDED.value
+                    result.outputs = finished.data.outputs
+                    result.error = None
+                    return result
+                result.error = (
+                    finished.data.error or f"工作流执行状态: {finished.data.status}"
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                result.error = str(e)
+        return result
+
+    async def run(
+            self,
+            rows: Iterable[RunWorkflowPayloads | dict],
+            template: Optional[RunWorkflowPayloads] = None,
+            ordered: bool = False,
+    ) -> AsyncGenerator[BatchResult, None]:
+        """批量执行工作流
+
+        输入按需读取，内存占用与并发数而非输入行数相关；按输入顺序输出时最多积压`max_pending`行。
+        检查点在线程池中批量写入，不阻塞事件循环。
+
+        Args:
+            rows: 请求配置，或配合`template`使用的输入行（字典）
+            template: 请求配置模板，提供时`rows`中的字典会合并到模板的`inputs`中
+            ordered: 是否按输入顺序输出，默认按完成顺序输出
+
+        Returns:
+            AsyncGenerator[BatchResult, None]: 执行结果流，
+                检查点中已成功的行不会再次执行和输出
+        """
+        done = self.completed_indices()
+        source = iter(rows)
+        source_lock = asyncio.Lock()
+        next_index = 0
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        # 按顺序输出时，每个已发出的行占用一个名额，直到结果被输出
+        slots = asyncio.Semaphore(self.max_pending) if ordered else None
+        checkpoint = None
+        if self.checkpoint_path:
+            checkpoint = open(self.checkpoint_path, "a", encoding="utf-8")
+        lines: List[str] = []
+
+        async def take():
+            nonlocal next_index
+            async with source_lock:
+                while True:
+                    try:
+                        row = next(source)
+                    except StopIteration:
+                        return None
+                    index = next_index
+                    next_index += 1
+                    if index in done:
+                        continue
+                    if isinstance(row, dict):
+                        if template is None:
+                            raise ValueError("使用字典作为输入行时必须提供模板")
+                        row = next(iter(self.build_payloads([row], template)))
+                    return index, row
+
+        async def worker():
+            while True:
+                if slots:
+                    await slots.acquire()
+                item = await take()
+                if item is None:
+                    if slots:
+                        slots.release()
+                    return
+                await results.put(await self.run_one(*item))
+
+        async def save():
+            batch = lines[:]
+            lines.clear()
+            await asyncio.to_thread(_append, checkpoint, batch)
+
+        async def supervise():
+            try:
+                await asyncio.gather(*workers)
+            except BaseException as e:
+                await results.put(e)
+            else:
+                await results.put(None)
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        supervisor = asyncio.create_task(supervise())
+        pending: List[tuple] = []
+        expected = 0
+        try:
+            while True:
+                result = await results.get()
+                if result is None:
+                    break
+                if isinstance(result, BaseException):
+                    raise result
+                if checkpoint:
+                    lines.append(result.model_dump_json() + "\n")
+                    # 暂时没有更多结果或积累了一批时才写入
+                    if results.empty() or len(lines) >= 64:
+                        await save()
+                if not ordered:
+                    yield result
+                    continue
+                heapq.heappush(pending, (result.index, result))
+                while pending:
+                    while expected in done:
+                        expected += 1
+                    if pending[0][0] != expected:
+                        break
+                    slots.release()
+                    yield heapq.heappop(pending)[1]
+                    expected += 1
+            for _, result in sorted(pending, key=lambda item: item[0]):
+                yield result
+        finally:
+            for task in workers + [supervisor]:
+                task.cancel()
+            await asyncio.gather(*workers, supervisor, return_exceptions=True)
+            if checkpoint:
+                _append(checkpoint, lines)
+                checkpoint.close()
+
+
+def _append(file, lines: List[str]) -> None:
+    if lines:
+        file.writelines(lines)
+        file.flush()
+
+
+__all__ = ["BatchResult", "WorkflowBatchRunner"]
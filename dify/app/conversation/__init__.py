@@ -1,3 +1,5 @@
+from typing import AsyncGenerator
+
 from dify.http import AdminClient
 from .schemas import (
     Conversation,
@@ -5,6 +7,7 @@ from .schemas import (
     ConversationList,
     ConversationRenamePayloads,
     MessageListQueryPayloads,
+    Message,
     MessageList,
     MessageFeedbackPayloads,
 )
@@ -79,6 +82,37 @@ class DifyConversation:
 
         return MessageList.model_validate(response_data)
 
+    async def iter_messages(
+        self, api_key: ApiKey|str, payloads: MessageListQueryPayloads
+    ) -> AsyncGenerator[Message, None]:
+        """流式获取一页消息，逐个解析和校验
+
+        与`get_messages`参数相同，但不会同时在内存中保留整页的响应体和模型，
+        适合带有大量`agent_thoughts`的对话。
+
+        Args:
+            api_key: API密钥
+            payloads: 查询参数配置
+
+        Returns:
+            AsyncGenerator[Message, None]: 逐个返回的消息
+
+        Raises:
+            ValueError: 当API密钥为空时抛出
+            DifyException: 当API请求失败时抛出
+        """
+        if not api_key:
+            raise ValueError("API密钥不能为空")
+
+        token = api_key.token if isinstance(api_key, ApiKey) else api_key
+        api_client = self.admin_client.create_api_client(token)
+
+        async for item in api_client.iter_items(
+            "/messages",
+            params=payloads.model_dump(exclude_none=True),
+        ):
+            yield Message.model_validate(item)
+
     async def delete(
         self, api_key: ApiKey|str, conversation_id: str, user_id: str
     ) -> OperationResult:
@@ -0,0 +1,312 @@
+import asyncio
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from . import DifyConversation
+from .sync import ConversationSync, CursorStore, SyncCursor, SyncedMessage
+from ..schemas import ApiKey
+from ...lazy import RAW_CONTEXT
+
+
+def to_record(item: SyncedMessage) -> dict:
+    """把同步产出的消息转换为导出记录
+
+    Args:
+        item: 同步产出的消息
+
+    Returns:
+        dict: 导出记录，嵌套结构（文件、Agent思考、检索资源等）保持原样，
+            未访问过的延迟校验字段直接输出服务端返回的原始数据
+    """
+    message = item.message.model_dump(
+        mode="json", exclude={"created_time"}, context=RAW_CONTEXT
+    )
+    feedback = message.pop("feedback", None) or {}
+    return {
+        "scope": item.scope,
+        "user": item.user,
+        "conversation_id": item.conversation.id,
+        "conversation_name": item.conversation.name,
+        "message_id": message.pop("id"),
+        "query": message.pop("query"),
+        "answer": message.pop("answer"),
+        "created_at": message.pop("created_at"),
+        "feedback_rating": feedback.get("rating"),
+        "inputs": message.pop("inputs"),
+        "message_files": message.pop("message_files"),
+        "agent_thoughts": message.pop("agent_thoughts"),
+        "retriever_resources": message.pop("retriever_resources"),
+    }
+
+
+class ExportWriter(ABC):
+    """导出写入器接口
+
+    Attributes:
+        flush_every: 写入器要求的持久化间隔（记录数），为None时使用导出器的`flush_every`
+    """
+
+    flush_every: Optional[int] = None
+
+    @abstractmethod
+    def write(self, record: dict) -> None:
+        """写入一条记录"""
+
+    @abstractmethod
+    def flush(self) -> None:
+        """把已写入的记录持久化，之后才会推进同步游标"""
+
+    def close(self) -> None:
+        """关闭写入器"""
+        self.flush()
+
+
+class JsonlWriter(ExportWriter):
+    """JSONL写入器，以追加模式写入，内存占用恒定
+
+    Args:
+        path: 输出文件路径
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, record: dict) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write("\n")
+
+    def flush(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+class ParquetWriter(ExportWriter):
+    """Parquet写入器，按行组写入，需要安装pyarrow
+
+    嵌套字段以JSON字符串形式存储。Parquet文件在关闭前没有文件尾，无法读取，
+    因此每次`flush`都会关闭当前文件，之后的记录写入带序号的新分片文件，
+    保证游标提交时已写出的数据都可读。目标文件已存在时（例如续传）同样写入新分片。
+
+    分片布局：第一个分片为`path`本身（如`messages.parquet`），之后依次为`messages.part1.parquet`、
+    `messages.part2.parquet`……每个分片最多`part_size`行，由若干`row_group_size`行的行组组成，
+    只有分片的最后一个行组可能不满。写入器通过`flush_every`要求导出器每`part_size`条记录持久化一次，
+    已关闭的分片记录在`paths`中，可以用`pyarrow.parquet.ParquetDataset(writer.paths)`一起读取。
+
+    Args:
+        path: 输出文件路径
+        row_group_size: 每个行组的行数，默认为10000
+        part_size: 每个分片文件的行数，默认为行组行数的10倍
+    """
+
+    def __init__(
+            self, path: str, row_group_size: int = 10000, part_size: int = None
+    ) -> None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("导出Parquet需要安装pyarrow: pip install pyarrow") from e
+
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.path = path
+        if row_group_size < 1:
+            raise ValueError("行组行数不能小于1")
+        self.row_group_size = row_group_size
+        self.part_size = part_size or row_group_size * 10
+        if self.part_size < 1:
+            raise ValueError("分片行数不能小于1")
+        self.flush_every = self.part_size
+        # 已关闭的分片文件
+        self.paths: List[str] = []
+        self._rows: List[dict] = []
+        self._writer = None
+        self._writer_path: Optional[str] = None
+
+    @staticmethod
+    def _free_path(path: str) -> str:
+        if not os.path.exists(path):
+            return path
+        stem, ext = os.path.splitext(path)
+        part = 1
+        while os.path.exists(f"{stem}.part{part}{ext}"):
+            part += 1
+        return f"{stem}.part{part}{ext}"
+
+    def write(self, record: dict) -> None:
+        self._rows.append({
+            key: (
+                json.dumps(value, ensure_ascii=False)
+                if isinstance(value, (dict, list))
+                else value
+            )
+            for key, value in record.items()
+        })
+        if len(self._rows) >= self.row_group_size:
+            self._write_row_group()
+
+    def _write_row_group(self) -> None:
+        if not self._rows:
+            return
+        table = self._pa.Table.from_pylist(self._rows, schema=self._schema())
+        if self._writer is None:
+            self._writer_path = self._free_path(self.path)
+            self._writer = self._pq.ParquetWriter(self._writer_path, table.schema)
+        self._writer.write_table(table)
+        self._rows = []
+
+    def flush(self) -> None:
+        """写出缓冲的记录并关闭当前分片文件"""
+        self._write_row_group()
+        if self._writer is not None:
+            self._writer.close()
+            self.paths.append(self._writer_path)
+            self._writer = None
+            self._writer_path = None
+
+    def close(self) -> None:
+        self.flush()
+
+    def _schema(self):
+        pa = self._pa
+        return pa.schema([
+            ("scope", pa.string()),
+            ("user", pa.string()),
+            ("conversation_id", pa.string()),
+            ("conversation_name", pa.string()),
+            ("message_id", pa.string()),
+            ("query", pa.string()),
+            ("answer", pa.string()),
+            ("created_at", pa.int64()),
+            ("feedback_rating", pa.string()),
+            ("inputs", pa.string()),
+            ("message_files", pa.string()),
+            ("agent_thoughts", pa.string()),
+            ("retriever_resources", pa.string()),
+        ])
+
+
+class _DeferredCursorStore(CursorStore):
+    """延迟提交的游标存储，写入器持久化之后才把游标写入底层存储"""
+
+    def __init__(self, store: CursorStore) -> None:
+        self.store = store
+        self._pending: Dict[str, SyncCursor] = {}
+
+    def get(self, key: str) -> Optional[SyncCursor]:
+        return self._pending.get(key) or self.store.get(key)
+
+    def set(self, key: str, cursor: SyncCursor) -> None:
+        self._pending[key] = cursor
+
+    def commit(self) -> None:
+        for key, cursor in self._pending.items():
+            self.store.set(key, cursor)
+        self._pending.clear()
+
+
+class ConversationExporter:
+    """会话消息流式导出
+
+    基于增量同步引擎逐条写出消息，不在内存中构建完整的消息列表。
+    同步游标只在写入器持久化之后才提交，中断后再次运行会从上次提交的位置续传，
+    中断前已写出但游标未提交的消息可能被再次导出（至少一次语义）。
+
+    Args:
+        conversation: 会话管理对象
+        store: 游标存储，用于续传
+        concurrency: 单个应用内并发拉取消息的会话数，默认为5
+        flush_every: 每写入多少条记录持久化一次，默认为1000；写入器指定了`flush_every`时
+            （如`ParquetWriter`按分片大小持久化）以写入器为准
+    """
+
+    def __init__(
+            self,
+            conversation: DifyConversation,
+            store: CursorStore,
+            concurrency: int = 5,
+            flush_every: int = 1000,
+    ) -> None:
+        if flush_every < 1:
+            raise ValueError("持久化间隔不能小于1")
+        self.conversation = conversation
+        self.store = store
+        self.concurrency = concurrency
+        self.flush_every = flush_every
+
+    async def export(
+            self,
+            api_key: ApiKey | str,
+            user: str,
+            writer: ExportWriter,
+            scope: Optional[str] = None,
+    ) -> int:
+        """导出某个应用下某个用户的会话消息
+
+        Args:
+            api_key: API密钥
+            user: 用户标识
+            writer: 导出写入器，导出结束后会被关闭
+            scope: 应用范围标识，默认根据密钥生成
+
+        Returns:
+            int: 本次导出的消息数量
+
+        Raises:
+            ValueError: 当API密钥或用户标识为空时抛出
+            httpx.HTTPStatusError: 当API请求失败时抛出
+        """
+        store = _DeferredCursorStore(self.store)
+        sync = ConversationSync(self.conversation, store, concurrency=self.concurrency)
+        flush_every = writer.flush_every or self.flush_every
+        count = 0
+        try:
+            async for item in sync.sync(api_key, user, scope=scope):
+                writer.write(to_record(item))
+                count += 1
+                if count % flush_every == 0:
+                    writer.flush()
+                    store.commit()
+        finally:
+            writer.close()
+        store.commit()
+        return count
+
+    async def export_many(
+            self,
+            jobs: Iterable[Tuple[ApiKey | str, str, ExportWriter]],
+            concurrency: int = 4,
+    ) -> List[int]:
+        """并发导出多个应用
+
+        Args:
+            jobs: 导出任务列表，每项为(API密钥, 用户标识, 写入器)
+            concurrency: 同时导出的应用数，默认为4
+
+        Returns:
+            List[int]: 与输入顺序一致的导出消息数量
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(api_key: ApiKey | str, user: str, writer: ExportWriter) -> int:
+            async with semaphore:
+                return await self.export(api_key, user, writer)
+
+        return list(await asyncio.gather(*[run(*job) for job in jobs]))
+
+
+__all__ = [
+    "to_record",
+    "ExportWriter",
+    "JsonlWriter",
+    "ParquetWriter",
+    "ConversationExporter",
+]
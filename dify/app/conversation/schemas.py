@@ -1,9 +1,10 @@
 from datetime import datetime
 from enum import Enum
-from typing import List, Literal, Optional
+from typing import Annotated, List, Literal, Optional
 
 from pydantic import BaseModel, Field, computed_field
 
+from ...lazy import Lazy, LazyModel
 from ..schemas import RetrieverResource
 
 
@@ -135,7 +136,7 @@ class Feedback(BaseModel):
     rating: Optional[str] = Field(default=None, description="用户反馈")
 
 
-class Message(BaseModel):
+class Message(LazyModel):
     """消息
 
     Attributes:
@@ -158,7 +159,8 @@ class Message(BaseModel):
     message_files: Optional[List[MessageFile]] = Field(
         default_factory=list, description="消息文件"
     )
-    agent_thoughts: Optional[List[AgentThought]] = Field(
+    # agent_thoughts和retriever_resources体积较大且多数调用方用不到，首次访问时才校验
+    agent_thoughts: Annotated[Optional[List[AgentThought]], Lazy()] = Field(
         default_factory=list, description="Agent思考过程"
     )
     answer: Optional[str] = Field(default=None, description="回答内容")
@@ -166,7 +168,7 @@ class Message(BaseModel):
     feedback: Optional[Feedback] = Field(
         default_factory=Feedback, description="用户反馈"
     )
-    retriever_resources: Optional[List[RetrieverResource]] = Field(
+    retriever_resources: Annotated[Optional[List[RetrieverResource]], Lazy()] = Field(
         default_factory=list, description="检索资源"
     )
 
@@ -0,0 +1,305 @@
+import re
+import sqlite3
+import threading
+from typing import AsyncIterable, Iterable, List, Optional
+
+from pydantic import BaseModel, Field
+
+from .schemas import Message, MessageList
+from .sync import SyncedMessage
+from ...exceptions import DifyException
+
+# 允许的FTS5分词器，porter需要包装另一个分词器，如"porter unicode61"
+TOKENIZERS = {"unicode61", "ascii", "trigram", "porter"}
+
+# 分词器参数只允许字母、数字和下划线，如"remove_diacritics 2"
+_TOKENIZER_ARG = re.compile(r"^\w+$", re.ASCII)
+
+
+class SearchHit(BaseModel):
+    """搜索结果
+
+    Attributes:
+        message_id: 消息ID
+        scope: 应用范围标识
+        user: 用户标识
+        conversation_id: 会话ID
+        created_at: 消息创建时间戳
+        query: 用户提问
+        answer: 回答内容
+        snippet: 命中片段，命中词以[]标记
+        score: 相关度得分（bm25，越小越相关）
+    """
+
+    message_id: str = Field(description="消息ID")
+    scope: Optional[str] = Field(default=None, description="应用范围标识")
+    user: Optional[str] = Field(default=None, description="用户标识")
+    conversation_id: Optional[str] = Field(default=None, description="会话ID")
+    created_at: Optional[int] = Field(default=None, description="消息创建时间戳")
+    query: Optional[str] = Field(default=None, description="用户提问")
+    answer: Optional[str] = Field(default=None, description="回答内容")
+    snippet: Optional[str] = Field(default=None, description="命中片段")
+    score: float = Field(default=0.0, description="相关度得分")
+
+
+class MessageSearchIndex:
+    """基于SQLite FTS5的本地消息全文索引
+
+    对`Message.query`和`Message.answer`建立全文索引，支持按应用、用户、会话和时间范围过滤，
+    并按bm25相关度排序分页返回。索引可以由增量同步流或`get_messages`的结果逐批写入，
+    重复写入同一条消息会覆盖旧记录。
+
+    Args:
+        path: 数据库文件路径，":memory:"表示内存数据库
+        tokenizer: FTS5分词器，默认trigram，支持中文子串匹配，但查询词至少需要3个字符；
+            纯英文场景可使用"unicode61"。只能使用`TOKENIZERS`中的分词器，参数只能包含字母、数字和下划线
+
+    Raises:
+        DifyException: 当分词器不受支持时抛出
+    """
+
+    def __init__(self, path: str = ":memory:", tokenizer: str = "trigram") -> None:
+        parts = tokenizer.split()
+        if not parts or parts[0] not in TOKENIZERS or not all(
+                _TOKENIZER_ARG.match(part) for part in parts[1:]
+        ):
+            raise DifyException(f"不支持的分词器: {tokenizer!r}", "invalid_tokenizer")
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(f"""
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS messages (
+                rowid INTEGER PRIMARY KEY,
+                message_id TEXT NOT NULL UNIQUE,
+                scope TEXT,
+                user TEXT,
+                conversation_id TEXT,
+                created_at INTEGER,
+                query TEXT,
+                answer TEXT
+            );
+            CREATE INDEX IF NOT EXISTS messages_filter
+                ON messages (scope, user, created_at);
+            CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+                query, answer, content='messages', content_rowid='rowid',
+                tokenize='{" ".join(parts)}'
+            );
+            CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+                INSERT INTO messages_fts (rowid, query, answer)
+                VALUES (new.rowid, new.query, new.answer);
+            END;
+            CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
+                INSERT INTO messages_fts (messages_fts, rowid, query, answer)
+                VALUES ('delete', old.rowid, old.query, old.answer);
+            END;
+            CREATE TRIGGER IF NOT EXISTS messages_au AFTER UPDATE ON messages BEGIN
+                INSERT INTO messages_fts (messages_fts, rowid, query, answer)
+                VALUES ('delete', old.rowid, old.query, old.answer);
+                INSERT INTO messages_fts (rowid, query, answer)
+                VALUES (new.rowid, new.query, new.answer);
+            END;
+        """)
+
+    def add_messages(
+            self,
+            messages: MessageList | Iterable[Message],
+            scope: Optional[str] = None,
+            user: Optional[str] = None,
+    ) -> int:
+        """写入一批消息，例如`DifyConversation.get_messages`返回的一页
+
+        Args:
+            messages: 消息列表
+            scope: 应用范围标识
+            user: 用户标识
+
+        Returns:
+            int: 写入的消息数量
+        """
+        if isinstance(messages, MessageList):
+            messages = messages.data or []
+        rows = [
+            (m.id, scope, user, m.conversation_id, m.created_at, m.query, m.answer)
+            for m in messages
+            if m.id
+        ]
+        return self._upsert(rows)
+
+    def add(self, items: Iterable[SyncedMessage]) -> int:
+        """写入一批同步产出的消息
+
+        Args:
+            items: 同步产出的消息
+
+        Returns:
+            int: 写入的消息数量
+        """
+        rows = [
+            (
+                item.message.id,
+                item.scope,
+                item.user,
+                item.conversation.id,
+                item.message.created_at,
+                item.message.query,
+                item.message.answer,
+            )
+            for item in items
+            if item.message.id
+        ]
+        return self._upsert(rows)
+
+    async def index_stream(
+            self, stream: AsyncIterable[SyncedMessage], batch_size: int = 500
+    ) -> int:
+        """消费增量同步流并分批写入索引
+
+        Args:
+            stream: 同步流，通常为`ConversationSync.sync`的返回值
+            batch_size: 每个事务写入的消息数量，默认为500
+
+        Returns:
+            int: 写入的消息数量
+        """
+        count = 0
+        batch: List[SyncedMessage] = []
+        async for item in stream:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                count += self.add(batch)
+                batch = []
+        if batch:
+            count += self.add(batch)
+        return count
+
+    def _upsert(self, rows: List[tuple]) -> int:
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """
+                INSERT INTO messages
+                    (message_id, scope, user, conversation_id, created_at, query,
+                     answer)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (message_id) DO UPDATE SET
+                    scope = COALESCE(excluded.scope, scope),
+                    user = COALESCE(excluded.user, user),
+                    conversation_id =
+                        COALESCE(excluded.conversation_id, conversation_id),
+                    created_at = excluded.created_at,
+                    query = excluded.query,
+                    answer = excluded.answer
+                """,
+                rows,
+            )
+        return len(rows)
+
+    def search(
+            self,
+            text: str,
+            scope: Optional[str] = None,
+            user: Optional[str] = None,
+            conversation_id: Optional[str] = None,
+            since: Optional[int] = None,
+            until: Optional[int] = None,
+            limit: int = 20,
+            offset: int = 0,
+            raw: bool = False,
+    ) -> List[SearchHit]:
+        """全文搜索消息
+
+        默认把`text`按空白拆分为关键词，每个关键词作为FTS5字符串匹配，所有关键词都命中的消息才会返回，
+        因此`e-mail`、`C++`之类包含标点的关键词也可以直接搜索。
+
+        Args:
+            text: 查询关键词，多个关键词以空白分隔；`raw`为True时为FTS5查询表达式
+            scope: 按应用范围过滤
+            user: 按用户过滤
+            conversation_id: 按会话过滤
+            since: 创建时间下限（包含）
+            until: 创建时间上限（不包含）
+            limit: 每页数量，默认为20
+            offset: 偏移量，默认为0
+            raw: 是否按FTS5查询语法（`OR`、`NEAR`、前缀`*`等）解析`text`，默认为False
+
+        Returns:
+            List[SearchHit]: 按相关度排序的搜索结果
+
+        Raises:
+            ValueError: 当查询内容为空时抛出
+            DifyException: 当FTS5查询表达式无效时抛出
+        """
+        if not text or not text.strip():
+            raise ValueError("查询内容不能为空")
+
+        conditions = ["messages_fts MATCH ?"]
+        params: list = [text if raw else _quote(text)]
+        for column, value in (
+                ("m.scope", scope),
+                ("m.user", user),
+                ("m.conversation_id", conversation_id),
+        ):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            conditions.append("m.created_at >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("m.created_at < ?")
+            params.append(until)
+        params.extend([limit, offset])
+
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"""
+                    SELECT m.message_id, m.scope, m.user, m.conversation_id,
+                           m.created_at, m.query, m.answer,
+                           snippet(messages_fts, -1, '[', ']', '...', 16),
+                           bm25(messages_fts)
+                    FROM messages_fts
+                    JOIN messages m ON m.rowid = messages_fts.rowid
+                    WHERE {" AND ".join(conditions)}
+                    ORDER BY bm25(messages_fts)
+                    LIMIT ? OFFSET ?
+                    """,
+                    params,
+                ).fetchall()
+        except sqlite3.OperationalError as e:
+            raise DifyException(
+                f"无效的查询: {text!r}, 错误信息: {e}", "invalid_query"
+            ) from e
+
+        return [
+            SearchHit(
+                message_id=row[0],
+                scope=row[1],
+                user=row[2],
+                conversation_id=row[3],
+                created_at=row[4],
+                query=row[5],
+                answer=row[6],
+                snippet=row[7],
+                score=row[8],
+            )
+            for row in rows
+        ]
+
+    def count(self) -> int:
+        """返回索引中的消息总数"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def _quote(text: str) -> str:
+    # 每个关键词作为FTS5字符串，其中的双引号写两次
+    return " ".join('"' + term.replace('"', '""') + '"' for term in text.split())
+
+
+__all__ = ["SearchHit", "MessageSearchIndex"]
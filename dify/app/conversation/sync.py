@@ -0,0 +1,400 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import AsyncGenerator, Dict, List, Optional, Set, Tuple
+
+from pydantic import BaseModel, Field
+
+from . import DifyConversation
+from .schemas import (
+    Conversation,
+    ConversationListQueryPayloads,
+    Message,
+    MessageListQueryPayloads,
+    SortBy,
+)
+from ..schemas import ApiKey
+
+
+class SyncCursor(BaseModel):
+    """同步游标（高水位标记）
+
+    Attributes:
+        updated_at: 已同步到的时间戳，会话为更新时间，消息为创建时间
+        id: 该时间戳对应的记录ID，用于处理时间戳相同的情况
+        boundary_ids: 时间戳与`updated_at`相同、已经同步过的其他记录ID
+    """
+
+    updated_at: int = Field(default=0, description="已同步到的时间戳")
+    id: Optional[str] = Field(default=None, description="时间戳对应的记录ID")
+    boundary_ids: List[str] = Field(
+        default_factory=list, description="时间戳相同的其他已同步记录ID"
+    )
+
+    def seen(self, updated_at: int, record_id: str) -> bool:
+        """记录是否已经同步过
+
+        Args:
+            updated_at: 记录的时间戳
+            record_id: 记录ID
+
+        Returns:
+            bool: 时间戳早于高水位，或时间戳相同且ID已同步时返回True
+        """
+        if updated_at != self.updated_at:
+            return updated_at < self.updated_at
+        return record_id == self.id or record_id in self.boundary_ids
+
+
+class SyncedMessage(BaseModel):
+    """同步产出的消息
+
+    Attributes:
+        scope: 应用范围标识
+        user: 用户标识
+        conversation: 消息所属会话
+        message: 消息
+    """
+
+    scope: str = Field(description="应用范围标识")
+    user: str = Field(description="用户标识")
+    conversation: Conversation = Field(description="消息所属会话")
+    message: Message = Field(description="消息")
+
+
+class CursorStore(ABC):
+    """游标存储接口，实现类负责把游标持久化到本地"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[SyncCursor]:
+        """读取游标，不存在时返回None"""
+
+    @abstractmethod
+    def set(self, key: str, cursor: SyncCursor) -> None:
+        """写入游标"""
+
+
+class MemoryCursorStore(CursorStore):
+    """内存游标存储，进程退出后丢失，主要用于测试"""
+
+    def __init__(self) -> None:
+        self._cursors: Dict[str, SyncCursor] = {}
+
+    def get(self, key: str) -> Optional[SyncCursor]:
+        return self._cursors.get(key)
+
+    def set(self, key: str, cursor: SyncCursor) -> None:
+        self._cursors[key] = cursor
+
+
+class JsonCursorStore(CursorStore):
+    """JSON文件游标存储，每次写入通过临时文件原子替换
+
+    Args:
+        path: JSON文件路径
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._cursors: Dict[str, SyncCursor] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self._cursors = {
+                    key: SyncCursor.model_validate(value)
+                    for key, value in json.load(f).items()
+                }
+
+    def get(self, key: str) -> Optional[SyncCursor]:
+        return self._cursors.get(key)
+
+    def set(self, key: str, cursor: SyncCursor) -> None:
+        with self._lock:
+            self._cursors[key] = cursor
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {k: v.model_dump() for k, v in self._cursors.items()},
+                    f,
+                    ensure_ascii=False,
+                )
+            os.replace(tmp_path, self.path)
+
+
+class SqliteCursorStore(CursorStore):
+    """SQLite游标存储
+
+    Args:
+        path: 数据库文件路径
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sync_cursors ("
+            "key TEXT PRIMARY KEY, updated_at INTEGER NOT NULL, id TEXT, "
+            "boundary_ids TEXT)"
+        )
+        columns = {
+            row[1] for row in self._conn.execute("PRAGMA table_info(sync_cursors)")
+        }
+        if "boundary_ids" not in columns:
+            # 兼容旧版本创建的数据库
+            self._conn.execute("ALTER TABLE sync_cursors ADD COLUMN boundary_ids TEXT")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[SyncCursor]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT updated_at, id, boundary_ids FROM sync_cursors WHERE key = ?", (
+                    key,
+                )
+            ).fetchone()
+        if row is None:
+            return None
+        return SyncCursor(
+            updated_at=row[0],
+            id=row[1],
+            boundary_ids=json.loads(row[2]) if row[2] else [],
+        )
+
+    def set(self, key: str, cursor: SyncCursor) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_cursors "
+                "(key, updated_at, id, boundary_ids) VALUES (?, ?, ?, ?)",
+                (key, cursor.updated_at, cursor.id, json.dumps(cursor.boundary_ids)),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class ConversationSync:
+    """会话与消息的增量同步引擎
+
+    按`-updated_at`倒序翻页会话列表，遇到上次同步的高水位即停止；
+    对有变化的会话并发拉取高水位之后的新消息，并以流的形式产出。
+    同时拉取的会话数不超过`concurrency`，消费方取走一个会话的消息后才开始拉取下一个，
+    内存中最多缓存`concurrency`个会话的消息。
+    游标在消息被消费之后才写入存储，中途崩溃时下次运行会从上次的位置继续。
+
+    Args:
+        conversation: 会话管理对象
+        store: 游标存储
+        concurrency: 并发拉取消息的会话数，默认为5
+        page_size: 每页请求数量，默认为100
+    """
+
+    def __init__(
+            self,
+            conversation: DifyConversation,
+            store: CursorStore,
+            concurrency: int = 5,
+            page_size: int = 100,
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError("并发数不能小于1")
+        self.conversation = conversation
+        self.store = store
+        self.concurrency = concurrency
+        self.page_size = page_size
+
+    @staticmethod
+    def _scope_of(api_key: ApiKey | str) -> str:
+        token = api_key.token if isinstance(api_key, ApiKey) else api_key
+        # 不在本地存储中保存明文密钥
+        return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+    async def changed_conversations(
+            self, api_key: ApiKey | str, user: str, since: Optional[SyncCursor]
+    ) -> List[Conversation]:
+        """获取高水位之后有更新的会话，按更新时间倒序
+
+        Args:
+            api_key: API密钥
+            user: 用户标识
+            since: 上次同步的会话高水位，为None时返回全部会话
+
+        Returns:
+            List[Conversation]: 有更新的会话列表
+        """
+        changed: List[Conversation] = []
+        last_id = None
+        while True:
+            page = await self.conversation.find_list(
+                api_key,
+                ConversationListQueryPayloads(
+                    user=user,
+                    last_id=last_id,
+                    limit=self.page_size,
+                    sort_by=SortBy.UPDATED_AT_DESC.value,
+                ),
+            )
+            for item in page.data:
+                if since is not None and since.seen(item.updated_at, item.id):
+                    return changed
+                changed.append(item)
+            if not page.has_more or not page.data:
+                return changed
+            last_id = page.data[-1].id
+
+    async def new_messages(
+            self,
+            api_key: ApiKey | str,
+            user: str,
+            conversation_id: str,
+            since: Optional[SyncCursor],
+    ) -> List[Message]:
+        """获取会话中高水位之后的新消息，按时间正序
+
+        Args:
+            api_key: API密钥
+            user: 用户标识
+            conversation_id: 会话ID
+            since: 上次同步的消息高水位，为None时返回全部消息
+
+        Returns:
+            List[Message]: 新消息列表
+        """
+        pages: List[List[Message]] = []
+        first_id = None
+        while True:
+            page = await self.conversation.get_messages(
+                api_key,
+                MessageListQueryPayloads(
+                    conversation_id=conversation_id,
+                    user=user,
+                    first_id=first_id,
+                    limit=self.page_size,
+                ),
+            )
+            data = page.data or []
+            # 每页内部按时间正序，第一页为最新的消息
+            fresh = [
+                m for m in data
+                if since is None or not since.seen(m.created_at or 0, m.id)
+            ]
+            pages.append(fresh)
+            if len(fresh) < len(data) or not page.has_more or not data:
+                break
+            first_id = data[0].id
+        return [m for page in reversed(pages) for m in page]
+
+    @staticmethod
+    def _advance(since: Optional[SyncCursor], messages: List[Message]) -> SyncCursor:
+        """根据新产出的消息推进消息高水位，记录时间戳相同的所有消息ID"""
+        last = messages[-1]
+        updated_at = last.created_at or 0
+        boundary_ids = [
+            m.id
+            for m in messages
+            if (m.created_at or 0) == updated_at and m.id != last.id
+        ]
+        if since is not None and since.updated_at == updated_at:
+            boundary_ids = [
+                i for i in [since.id, *since.boundary_ids] if i and i != last.id
+            ] + boundary_ids
+        return SyncCursor(updated_at=updated_at, id=last.id, boundary_ids=boundary_ids)
+
+    async def sync(
+            self, api_key: ApiKey | str, user: str, scope: Optional[str] = None
+    ) -> AsyncGenerator[SyncedMessage, None]:
+        """增量同步某个应用下某个用户的会话消息
+
+        Args:
+            api_key: API密钥
+            user: 用户标识
+            scope: 应用范围标识，用于区分游标，默认根据密钥生成
+
+        Returns:
+            AsyncGenerator[SyncedMessage, None]: 新消息流
+
+        Raises:
+            ValueError: 当API密钥或用户标识为空时抛出
+            httpx.HTTPStatusError: 当API请求失败时抛出
+        """
+        if not api_key:
+            raise ValueError("API密钥不能为空")
+        if not user:
+            raise ValueError("用户标识不能为空")
+
+        scope = scope or self._scope_of(api_key)
+        conversation_key = f"{scope}:{user}"
+        since = self.store.get(conversation_key)
+
+        changed = await self.changed_conversations(api_key, user, since)
+        if not changed:
+            return
+
+        queue: asyncio.Queue[
+            Tuple[Conversation, Optional[SyncCursor], List[Message]] | Exception
+        ] = asyncio.Queue(maxsize=self.concurrency)
+        pending = iter(changed)
+        tasks: Set[asyncio.Task] = set()
+
+        async def fetch(item: Conversation) -> None:
+            try:
+                message_since = self.store.get(f"{conversation_key}:{item.id}")
+                messages = await self.new_messages(
+                    api_key, user, item.id, message_since
+                )
+                await queue.put((item, message_since, messages))
+            except Exception as e:
+                await queue.put(e)
+
+        def fetch_next() -> None:
+            item = next(pending, None)
+            if item is not None:
+                task = asyncio.create_task(fetch(item))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+        for _ in range(self.concurrency):
+            fetch_next()
+        try:
+            for _ in range(len(changed)):
+                result = await queue.get()
+                if isinstance(result, Exception):
+                    raise result
+                # 取走一个结果后才开始拉取下一个会话
+                fetch_next()
+                item, message_since, messages = result
+                for message in messages:
+                    yield SyncedMessage(
+                        scope=scope, user=user, conversation=item, message=message
+                    )
+                if messages:
+                    self.store.set(
+                        f"{conversation_key}:{item.id}", self._advance(
+                            message_since, messages
+                        )
+                    )
+            # 全部会话处理完成后才推进会话高水位
+            newest = changed[0]
+            self.store.set(
+                conversation_key, SyncCursor(updated_at=newest.updated_at, id=newest.id)
+            )
+        finally:
+            running = list(tasks)
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+
+
+__all__ = [
+    "SyncCursor",
+    "SyncedMessage",
+    "CursorStore",
+    "MemoryCursorStore",
+    "JsonCursorStore",
+    "SqliteCursorStore",
+    "ConversationSync",
+]
@@ -5,7 +5,9 @@ from typing import Literal, Optional, List, Annotated, Union
 
 from pydantic import BaseModel, Field, model_validator
 
+from dify.lazy import Lazy, LazyModel
 from dify.llm.schemas import Model
+from dify.schemas import project
 
 
 class AppMode(str, Enum):
@@ -289,7 +291,7 @@ class ModelConfig(BaseModel):
     model: Optional[Model] = Field(default=None, description="模型配置")
 
 
-class App(BaseModel):
+class App(LazyModel):
     """Dify应用模型
 
     Attributes:
@@ -323,7 +325,8 @@ class App(BaseModel):
     icon: Optional[str] = Field(default=None, description="图标")
     icon_background: Optional[str] = Field(default=None, description="图标背景")
     icon_url: Optional[str] = Field(default=None, description="图标URL")
-    app_config: Optional[ModelConfig] = Field(
+    # 体积较大且多数调用方用不到，首次访问时才校验
+    app_config: Annotated[Optional[ModelConfig], Lazy()] = Field(
         default_factory=ModelConfig, alias="model_config", description="模型配置"
     )
     workflow: Optional[dict] = Field(default=None, description="工作流")
@@ -342,6 +345,10 @@ class App(BaseModel):
     }
 
 
+# 应用列表常用的摘要字段，其余字段在首次访问时才校验
+AppSummary = project(App, ["id", "name", "mode", "tags"], "AppSummary")
+
+
 class ChatCompletionResponse(BaseModel):
     """聊天完成响应"""
 
@@ -350,6 +357,42 @@ class ChatCompletionResponse(BaseModel):
     answer: str = Field(..., description="回答")
 
 
+class CompletionResponse(BaseModel):
+    """文本生成阻塞模式响应
+
+    Attributes:
+        message_id: 消息ID
+        task_id: 任务ID
+        conversation_id: 会话ID
+        mode: 应用模式
+        answer: 完整回复内容
+        metadata: 元数据
+        created_at: 创建时间戳
+    """
+
+    message_id: str = Field(..., description="消息ID")
+    task_id: Optional[str] = Field(default=None, description="任务ID")
+    conversation_id: Optional[str] = Field(default=None, description="会话ID")
+    mode: Optional[str] = Field(default=None, description="应用模式")
+    answer: str = Field(default="", description="完整回复内容")
+    metadata: Optional["Metadata"] = Field(default=None, description="元数据")
+    created_at: Optional[int] = Field(default=None, description="创建时间戳")
+
+
+class WorkflowRunResponse(BaseModel):
+    """工作流阻塞模式响应
+
+    Attributes:
+        task_id: 任务ID
+        workflow_run_id: workflow执行ID
+        data: 工作流执行结果
+    """
+
+    task_id: Optional[str] = Field(default=None, description="任务ID")
+    workflow_run_id: Optional[str] = Field(default=None, description="workflow执行ID")
+    data: "WorkflowFinishedData" = Field(..., description="工作流执行结果")
+
+
 class TransferMethod(str, Enum):
     """图片上传方式
 
@@ -1,10 +1,23 @@
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Iterable
+
+from dify.cache import validate_cached
+from dify.exceptions import DifyException
 from dify.http import AdminClient
+from dify.schemas import Error, Pair
+from .diff import WorkflowDiff, WorkflowFingerprint, diff_graphs
+from .graph import WorkflowGraphIndex
 from .schemas import WorkflowPublish
 
 
 class DifyWorkflow:
-    def __init__(self, admin_client: AdminClient) -> None:
+    def __init__(self, admin_client: AdminClient, index_cache_size: int = 256) -> None:
         self.admin_client = admin_client
+        # 发布版本ID -> 图索引，只在同一个实例（即同一个客户端）内复用，
+        # 超过容量时淘汰最久未使用的
+        self.index_cache_size = index_cache_size
+        self._indexes: "OrderedDict[str, WorkflowGraphIndex]" = OrderedDict()
 
     async def get_publish(self, app_id: str) -> WorkflowPublish:
         """获取工作流发布详情
@@ -23,6 +36,84 @@ class DifyWorkflow:
             raise ValueError("应用ID不能为空")
         
         response = await self.admin_client.get(f"/apps/{app_id}/workflows/publish")
-        return WorkflowPublish(**response)
+        return validate_cached(self.admin_client, response, WorkflowPublish)
+
+    async def get_publish_index(self, app_id: str) -> WorkflowGraphIndex:
+        """获取工作流发布版本的图索引
+
+        同一发布版本的索引在本实例内只构建一次，之后直接复用缓存；发布详情没有ID时不缓存。
+
+        Args:
+            app_id: 应用ID
+
+        Returns:
+            WorkflowGraphIndex: 工作流图索引
+
+        Raises:
+            ValueError: 当应用ID为空时抛出
+            httpx.HTTPStatusError: 当API请求失败时抛出
+        """
+        publish = await self.get_publish(app_id)
+        if not publish.id:
+            return WorkflowGraphIndex(publish.graph)
+
+        index = self._indexes.get(publish.id)
+        if index is not None:
+            self._indexes.move_to_end(publish.id)
+            return index
+
+        index = self._indexes[publish.id] = WorkflowGraphIndex(publish.graph)
+        while len(self._indexes) > self.index_cache_size:
+            self._indexes.popitem(last=False)
+        return index
+
+    async def diff_publish(
+            self,
+            baseline_app_id: str,
+            app_ids: Iterable[str],
+            concurrency: int = 8,
+            ignore_layout: bool = True,
+    ) -> Dict[str, Pair[WorkflowDiff]]:
+        """批量对比多个应用的工作流发布版本与基线应用的差异
+
+        Args:
+            baseline_app_id: 基线应用ID
+            app_ids: 待对比的应用ID列表
+            concurrency: 最大并发请求数，默认为8
+            ignore_layout: 是否忽略画布位置等展示字段，默认为True
+
+        Returns:
+            Dict[str, Pair[WorkflowDiff]]: 以应用ID为键的对比结果，
+                单个应用获取失败不影响其它应用
+
+        Raises:
+            ValueError: 当基线应用ID为空时抛出
+            httpx.HTTPStatusError: 当基线应用请求失败时抛出
+        """
+        baseline = WorkflowFingerprint(
+            (await self.get_publish(baseline_app_id)).graph, ignore_layout
+        )
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def diff_one(app_id: str) -> Pair[WorkflowDiff]:
+            async with semaphore:
+                try:
+                    publish = await self.get_publish(app_id)
+                except Exception as e:
+                    code = (
+                        e.code
+                        if isinstance(e, DifyException) and e.code
+                        else e.__class__.__name__
+                    )
+                    return Pair[WorkflowDiff](error=Error(code=code, message=str(e)))
+            return Pair[WorkflowDiff](
+                value=diff_graphs(
+                    baseline, WorkflowFingerprint(publish.graph, ignore_layout)
+                )
+            )
+
+        app_ids = list(dict.fromkeys(app_ids))
+        results = await asyncio.gather(*[diff_one(app_id) for app_id in app_ids])
+        return dict(zip(app_ids, results))
 
 __all__ = ["DifyWorkflow"]
@@ -0,0 +1,214 @@
+import hashlib
+import json
+from typing import Any, Dict, List
+
+from pydantic import BaseModel, Field
+
+from .schemas import WorkflowEdge, WorkflowGraph, WorkflowNode
+
+# 节点或边顶层只影响画布展示、不影响执行的字段
+LAYOUT_FIELDS = {
+    "position",
+    "position_absolute",
+    "positionAbsolute",
+    "selected",
+    "width",
+    "height",
+    "zIndex",
+    "dragging",
+}
+
+
+class FieldChange(BaseModel):
+    """字段变化
+
+    Attributes:
+        path: 字段路径，以`.`分隔
+        old: 旧值
+        new: 新值
+    """
+
+    path: str = Field(description="字段路径")
+    old: Any = Field(default=None, description="旧值")
+    new: Any = Field(default=None, description="新值")
+
+
+class ElementChange(BaseModel):
+    """节点或边的变化
+
+    Attributes:
+        id: 节点ID或边的键
+        changes: 字段变化列表
+    """
+
+    id: str = Field(description="节点ID或边的键")
+    changes: List[FieldChange] = Field(default_factory=list, description="字段变化列表")
+
+
+class WorkflowDiff(BaseModel):
+    """工作流图的结构差异
+
+    Attributes:
+        added_nodes: 新增节点ID
+        removed_nodes: 删除节点ID
+        modified_nodes: 修改的节点
+        added_edges: 新增边
+        removed_edges: 删除边
+        modified_edges: 修改的边
+    """
+
+    added_nodes: List[str] = Field(default_factory=list, description="新增节点ID")
+    removed_nodes: List[str] = Field(default_factory=list, description="删除节点ID")
+    modified_nodes: List[ElementChange] = Field(
+        default_factory=list, description="修改的节点"
+    )
+    added_edges: List[str] = Field(default_factory=list, description="新增边")
+    removed_edges: List[str] = Field(default_factory=list, description="删除边")
+    modified_edges: List[ElementChange] = Field(
+        default_factory=list, description="修改的边"
+    )
+
+    @property
+    def is_empty(self) -> bool:
+        """两个工作流图是否没有差异"""
+        return not (
+            self.added_nodes or self.removed_nodes or self.modified_nodes
+            or self.added_edges or self.removed_edges or self.modified_edges
+        )
+
+
+def _strip_layout(content: dict) -> dict:
+    # 只去掉节点或边顶层的展示字段，`data`中同名的字段（如图片尺寸）属于节点配置，
+    # 唯一的例外是`WorkflowNodeData.selected`，它是画布上的选中状态
+    stripped = {k: v for k, v in content.items() if k not in LAYOUT_FIELDS}
+    data = stripped.get("data")
+    if isinstance(data, dict) and isinstance(data.get("selected"), bool):
+        stripped["data"] = {k: v for k, v in data.items() if k != "selected"}
+    return stripped
+
+
+def _digest(value: Any) -> str:
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def edge_key(edge: WorkflowEdge) -> str:
+    """边的键，由连接关系决定，与自动生成的边ID无关"""
+    source = f"{edge.source}:{edge.sourceHandle or 'source'}"
+    return f"{source}->{edge.target}:{edge.targetHandle or 'target'}"
+
+
+class WorkflowFingerprint:
+    """工作流图指纹
+
+    预先计算每个节点和边的内容哈希，对比时只对哈希不同的元素计算字段差异。
+    批量对比时基线图的指纹只需计算一次。
+
+    Args:
+        graph: 工作流图
+        ignore_layout: 是否忽略画布位置、选中状态等展示字段，默认为True
+    """
+
+    def __init__(self, graph: WorkflowGraph, ignore_layout: bool = True) -> None:
+        self.ignore_layout = ignore_layout
+        self.nodes: Dict[str, dict] = {}
+        self.node_hashes: Dict[str, str] = {}
+        for node in graph.nodes:
+            if node.id:
+                self.nodes[node.id] = self._content(node)
+                self.node_hashes[node.id] = _digest(self.nodes[node.id])
+
+        self.edges: Dict[str, dict] = {}
+        self.edge_hashes: Dict[str, str] = {}
+        for edge in graph.edges:
+            key = edge_key(edge)
+            self.edges[key] = self._content(edge, exclude={"id"})
+            self.edge_hashes[key] = _digest(self.edges[key])
+
+        self.digest = _digest(
+            [sorted(self.node_hashes.items()), sorted(self.edge_hashes.items())]
+        )
+
+    def _content(
+            self, element: WorkflowNode | WorkflowEdge, exclude: set = None
+    ) -> dict:
+        content = element.model_dump(mode="json", exclude=exclude)
+        return _strip_layout(content) if self.ignore_layout else content
+
+
+def _field_changes(old: Any, new: Any, path: str = "") -> List[FieldChange]:
+    if old == new:
+        # 相同的子树直接跳过，不再逐字段展开
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        for key in sorted(set(old) | set(new), key=str):
+            sub_path = f"{path}.{key}" if path else str(key)
+            changes.extend(_field_changes(old.get(key), new.get(key), sub_path))
+        return changes
+    return [FieldChange(path=path, old=old, new=new)]
+
+
+def _diff_elements(
+        old: Dict[str, dict],
+        old_hashes: Dict[str, str],
+        new: Dict[str, dict],
+        new_hashes: Dict[str, str],
+) -> tuple[List[str], List[str], List[ElementChange]]:
+    added = [key for key in new if key not in old]
+    removed = [key for key in old if key not in new]
+    modified = [
+        ElementChange(id=key, changes=_field_changes(old[key], new[key]))
+        for key in new
+        if key in old and old_hashes[key] != new_hashes[key]
+    ]
+    return added, removed, modified
+
+
+def diff_graphs(
+        old: WorkflowGraph | WorkflowFingerprint,
+        new: WorkflowGraph | WorkflowFingerprint,
+        ignore_layout: bool = True,
+) -> WorkflowDiff:
+    """对比两个工作流图
+
+    Args:
+        old: 旧的工作流图或其指纹
+        new: 新的工作流图或其指纹
+        ignore_layout: 是否忽略画布展示字段，仅在传入工作流图时生效
+
+    Returns:
+        WorkflowDiff: 结构差异
+    """
+    if not isinstance(old, WorkflowFingerprint):
+        old = WorkflowFingerprint(old, ignore_layout)
+    if not isinstance(new, WorkflowFingerprint):
+        new = WorkflowFingerprint(new, ignore_layout)
+
+    if old.digest == new.digest:
+        return WorkflowDiff()
+
+    added_nodes, removed_nodes, modified_nodes = _diff_elements(
+        old.nodes, old.node_hashes, new.nodes, new.node_hashes
+    )
+    added_edges, removed_edges, modified_edges = _diff_elements(
+        old.edges, old.edge_hashes, new.edges, new.edge_hashes
+    )
+    return WorkflowDiff(
+        added_nodes=added_nodes,
+        removed_nodes=removed_nodes,
+        modified_nodes=modified_nodes,
+        added_edges=added_edges,
+        removed_edges=removed_edges,
+        modified_edges=modified_edges,
+    )
+
+
+__all__ = [
+    "FieldChange",
+    "ElementChange",
+    "WorkflowDiff",
+    "WorkflowFingerprint",
+    "edge_key",
+    "diff_graphs",
+]
@@ -0,0 +1,206 @@
+from collections import deque
+from typing import Callable, Dict, List, Optional, Set
+
+from .schemas import WorkflowEdge, WorkflowGraph, WorkflowNode
+
+
+class WorkflowGraphIndex:
+    """工作流图的索引视图
+
+    构建时一次性生成节点与邻接表索引，之后的按ID查找、后继/前驱遍历均为常数时间，
+    拓扑序、层级等全图结果在首次计算后缓存。
+
+    Args:
+        graph: 工作流图
+    """
+
+    def __init__(self, graph: WorkflowGraph) -> None:
+        self.graph = graph
+        self.nodes: Dict[str, WorkflowNode] = {
+            node.id: node for node in graph.nodes if node.id
+        }
+        self.edges: Dict[str, WorkflowEdge] = {}
+        self.out_edges: Dict[str, List[WorkflowEdge]] = {
+            node_id: [] for node_id in self.nodes
+        }
+        self.in_edges: Dict[str, List[WorkflowEdge]] = {
+            node_id: [] for node_id in self.nodes
+        }
+        for edge in graph.edges:
+            if not edge.source or not edge.target:
+                continue
+            if edge.id:
+                self.edges[edge.id] = edge
+            self.out_edges.setdefault(edge.source, []).append(edge)
+            self.in_edges.setdefault(edge.target, []).append(edge)
+            self.out_edges.setdefault(edge.target, [])
+            self.in_edges.setdefault(edge.source, [])
+
+        self._topological_order: Optional[List[str]] = None
+        self._levels: Optional[Dict[str, int]] = None
+
+    def node(self, node_id: str) -> WorkflowNode:
+        """按ID获取节点
+
+        Raises:
+            KeyError: 当节点不存在时抛出
+        """
+        return self.nodes[node_id]
+
+    def successors(self, node_id: str) -> List[str]:
+        """直接后继节点ID列表"""
+        return [edge.target for edge in self.out_edges.get(node_id, [])]
+
+    def predecessors(self, node_id: str) -> List[str]:
+        """直接前驱节点ID列表"""
+        return [edge.source for edge in self.in_edges.get(node_id, [])]
+
+    @property
+    def sources(self) -> List[str]:
+        """没有前驱的节点（通常为开始节点）"""
+        return [node_id for node_id, edges in self.in_edges.items() if not edges]
+
+    @property
+    def sinks(self) -> List[str]:
+        """没有后继的节点（通常为结束节点）"""
+        return [node_id for node_id, edges in self.out_edges.items() if not edges]
+
+    @property
+    def iteration_edges(self) -> List[WorkflowEdge]:
+        """位于迭代内部的边"""
+        return [
+            edge for edges in self.out_edges.values() for edge in edges
+            if edge.data is not None and edge.data.isInIteration
+        ]
+
+    @property
+    def iteration_nodes(self) -> Set[str]:
+        """位于迭代内部的节点"""
+        return {
+            node_id for edge in self.iteration_edges for node_id in (
+                edge.source, edge.target
+            )
+        }
+
+    def descendants(self, node_id: str) -> Set[str]:
+        """从某节点出发可达的所有节点（不含自身，除非存在环）"""
+        return self._walk(node_id, self.successors)
+
+    def ancestors(self, node_id: str) -> Set[str]:
+        """可以到达某节点的所有节点（不含自身，除非存在环）"""
+        return self._walk(node_id, self.predecessors)
+
+    def is_reachable(self, source: str, target: str) -> bool:
+        """判断`target`是否可以从`source`到达"""
+        return target in self.descendants(source)
+
+    def has_cycle(self) -> bool:
+        """判断图中是否存在环"""
+        return self._kahn() is None
+
+    def topological_order(self) -> List[str]:
+        """拓扑序
+
+        Returns:
+            List[str]: 节点ID列表
+
+        Raises:
+            ValueError: 当图中存在环时抛出
+        """
+        if self._topological_order is None:
+            order = self._kahn()
+            if order is None:
+                raise ValueError("工作流图中存在环，无法计算拓扑序")
+            self._topological_order = order
+        return self._topological_order
+
+    def levels(self) -> Dict[str, int]:
+        """节点层级，即从任一起点到该节点的最长边数
+
+        同一层级的节点之间不存在依赖，可以并行执行。
+        """
+        if self._levels is None:
+            levels: Dict[str, int] = {}
+            for node_id in self.topological_order():
+                preds = self.predecessors(node_id)
+                levels[node_id] = max((levels[p] + 1 for p in preds), default=0)
+            self._levels = levels
+        return self._levels
+
+    def parallel_groups(self) -> List[List[str]]:
+        """按层级分组，只返回包含多个节点的层级
+
+        Returns:
+            List[List[str]]: 每组为同一层级、可并行执行的节点ID
+        """
+        groups: Dict[int, List[str]] = {}
+        for node_id, level in self.levels().items():
+            groups.setdefault(level, []).append(node_id)
+        return [groups[level] for level in sorted(groups) if len(groups[level]) > 1]
+
+    def branch_points(self) -> List[str]:
+        """有多个后继的分叉节点"""
+        return [node_id for node_id, edges in self.out_edges.items() if len(edges) > 1]
+
+    def longest_path(self, weight: Callable[[WorkflowNode], float] = None) -> List[str]:
+        """计算最长路径
+
+        Args:
+            weight: 节点权重函数，默认每个节点权重为1（即节点数最多的路径）
+
+        Returns:
+            List[str]: 从起点到终点的节点ID列表
+
+        Raises:
+            ValueError: 当图中存在环时抛出
+        """
+        order = self.topological_order()
+        if not order:
+            return []
+
+        def node_weight(node_id: str) -> float:
+            node = self.nodes.get(node_id)
+            return weight(node) if weight and node is not None else 1.0
+
+        best: Dict[str, float] = {}
+        prev: Dict[str, Optional[str]] = {}
+        for node_id in order:
+            candidates = [(best[p], p) for p in self.predecessors(node_id)]
+            base, parent = max(candidates, default=(0.0, None), key=lambda c: c[0])
+            best[node_id] = base + node_weight(node_id)
+            prev[node_id] = parent
+
+        current: Optional[str] = max(order, key=lambda n: best[n])
+        path = []
+        while current is not None:
+            path.append(current)
+            current = prev[current]
+        return list(reversed(path))
+
+    def _kahn(self) -> Optional[List[str]]:
+        in_degree = {node_id: len(edges) for node_id, edges in self.in_edges.items()}
+        queue = deque(node_id for node_id, degree in in_degree.items() if degree == 0)
+        order = []
+        while queue:
+            node_id = queue.popleft()
+            order.append(node_id)
+            for target in self.successors(node_id):
+                in_degree[target] -= 1
+                if in_degree[target] == 0:
+                    queue.append(target)
+        return order if len(order) == len(in_degree) else None
+
+    @staticmethod
+    def _walk(start: str, neighbours: Callable[[str], List[str]]) -> Set[str]:
+        seen: Set[str] = set()
+        stack = list(neighbours(start))
+        while stack:
+            node_id = stack.pop()
+            if node_id in seen:
+                continue
+            seen.add(node_id)
+            stack.extend(neighbours(node_id))
+        return seen
+
+
+__all__ = ["WorkflowGraphIndex"]
@@ -11,13 +11,18 @@ class Position(BaseModel):
 
 
 class WorkflowNodeData(BaseModel):
-    """工作流节点数据"""
+    """工作流节点数据
+
+    不同类型节点的配置（模型、提示词、变量等）各不相同，未声明的字段会原样保留。
+    """
 
     type: Optional[str] = Field(default=None, description="节点类型")
     title: Optional[str] = Field(default=None, description="节点标题")
     selected: Optional[bool] = Field(default=False, description="是否被选中")
     desc: Optional[str] = Field(default=None, description="节点描述")
 
+    model_config = {"extra": "allow"}
+
 
 class WorkflowNode(BaseModel):
     """工作流节点"""
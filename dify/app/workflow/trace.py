@@ -0,0 +1,310 @@
+import json
+import time
+from decimal import Decimal
+from typing import AsyncGenerator, AsyncIterable, Callable, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from ..schemas import (
+    ConversationEvent,
+    NodeFinishedEvent,
+    NodeStartedEvent,
+    WorkflowFinishedEvent,
+    WorkflowStartedEvent,
+)
+
+
+class TraceSpan(BaseModel):
+    """节点执行跨度
+
+    Attributes:
+        id: 节点执行ID
+        node_id: 节点ID
+        node_type: 节点类型
+        title: 节点名称
+        index: 执行序号
+        predecessor_node_id: 前置节点ID
+        parent_id: 前置节点对应的执行ID
+        start: 收到节点开始事件的时间（秒，相对于工作流开始）
+        end: 收到节点结束事件的时间（秒，相对于工作流开始）
+        elapsed_time: 服务端统计的节点耗时（秒）
+        queue_gap: 前置节点结束到本节点开始之间的间隔（秒）
+        status: 执行状态
+        total_tokens: 消耗的token数量
+        total_price: 费用
+        currency: 货币单位
+        children: 后继节点执行ID列表
+    """
+
+    id: str = Field(description="节点执行ID")
+    node_id: Optional[str] = Field(default=None, description="节点ID")
+    node_type: Optional[str] = Field(default=None, description="节点类型")
+    title: Optional[str] = Field(default=None, description="节点名称")
+    index: Optional[int] = Field(default=None, description="执行序号")
+    predecessor_node_id: Optional[str] = Field(default=None, description="前置节点ID")
+    parent_id: Optional[str] = Field(default=None, description="前置节点对应的执行ID")
+    start: float = Field(default=0.0, description="开始时间（秒，相对于工作流开始）")
+    end: Optional[float] = Field(
+        default=None, description="结束时间（秒，相对于工作流开始）"
+    )
+    elapsed_time: Optional[float] = Field(
+        default=None, description="服务端统计的节点耗时（秒）"
+    )
+    queue_gap: Optional[float] = Field(
+        default=None, description="与前置节点之间的间隔（秒）"
+    )
+    status: Optional[str] = Field(default=None, description="执行状态")
+    total_tokens: int = Field(default=0, description="消耗的token数量")
+    total_price: Decimal = Field(default=Decimal(0), description="费用")
+    currency: Optional[str] = Field(default=None, description="货币单位")
+    children: List[str] = Field(default_factory=list, description="后继节点执行ID列表")
+
+    @property
+    def duration(self) -> float:
+        """节点耗时，优先使用服务端统计的耗时"""
+        if self.elapsed_time is not None:
+            return self.elapsed_time
+        if self.end is not None:
+            return self.end - self.start
+        return 0.0
+
+
+class WorkflowTrace(BaseModel):
+    """单次工作流执行的跟踪结果
+
+    Attributes:
+        workflow_run_id: 工作流执行ID
+        task_id: 任务ID
+        status: 工作流执行状态
+        elapsed_time: 工作流总耗时（秒）
+        total_tokens: 工作流总token数
+        spans: 以执行ID为键的节点跨度
+    """
+
+    workflow_run_id: str = Field(description="工作流执行ID")
+    task_id: Optional[str] = Field(default=None, description="任务ID")
+    status: Optional[str] = Field(default=None, description="工作流执行状态")
+    elapsed_time: Optional[float] = Field(
+        default=None, description="工作流总耗时（秒）"
+    )
+    total_tokens: Optional[int] = Field(default=None, description="工作流总token数")
+    spans: Dict[str, TraceSpan] = Field(default_factory=dict, description="节点跨度")
+
+    @property
+    def roots(self) -> List[TraceSpan]:
+        """没有前置节点的跨度"""
+        return [span for span in self.spans.values() if span.parent_id is None]
+
+    @property
+    def total_price(self) -> Decimal:
+        """所有节点费用之和"""
+        return sum((span.total_price for span in self.spans.values()), Decimal(0))
+
+    def critical_path(self) -> List[TraceSpan]:
+        """计算关键路径
+
+        从最后结束的节点沿前置节点回溯到起点，这条链决定了工作流的总耗时。
+
+        Returns:
+            List[TraceSpan]: 从起点到终点的跨度列表
+        """
+        finished = [span for span in self.spans.values() if span.end is not None]
+        if not finished:
+            return []
+        span = max(finished, key=lambda s: s.end)
+        path = [span]
+        while span.parent_id is not None and span.parent_id in self.spans:
+            span = self.spans[span.parent_id]
+            path.append(span)
+        return list(reversed(path))
+
+    def slowest(self, n: int = 5) -> List[TraceSpan]:
+        """返回耗时最长的n个节点"""
+        return sorted(self.spans.values(), key=lambda s: s.duration, reverse=True)[:n]
+
+    def to_chrome_trace(self) -> dict:
+        """导出为Chrome trace-event格式，可在chrome://tracing或Perfetto中打开
+
+        并行执行的节点会被分配到不同的轨道上。
+
+        Returns:
+            dict: trace-event JSON对象
+        """
+        events = []
+        lanes: List[float] = []
+        for span in sorted(self.spans.values(), key=lambda s: s.start):
+            end = span.start + span.duration
+            lane = next(
+                (i for i, busy_until in enumerate(lanes) if busy_until <= span.start),
+                None,
+            )
+            if lane is None:
+                lanes.append(end)
+                lane = len(lanes) - 1
+            else:
+                lanes[lane] = end
+            events.append({
+                "name": span.title or span.node_id,
+                "cat": span.node_type or "node",
+                "ph": "X",
+                "ts": round(span.start * 1_000_000),
+                "dur": round(span.duration * 1_000_000),
+                "pid": self.workflow_run_id,
+                "tid": lane,
+                "args": {
+                    "node_id": span.node_id,
+                    "status": span.status,
+                    "queue_gap": span.queue_gap,
+                    "total_tokens": span.total_tokens,
+                    "total_price": str(span.total_price),
+                },
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def to_folded_stacks(self) -> str:
+        """导出为flamegraph.pl / speedscope可读取的折叠栈格式
+
+        每行为从起点到该节点的执行链，值为节点自身耗时（微秒）。
+
+        Returns:
+            str: 折叠栈文本
+        """
+        lines = []
+        for span in sorted(self.spans.values(), key=lambda s: s.start):
+            stack = []
+            current: Optional[TraceSpan] = span
+            while current is not None:
+                stack.append(
+                    (current.title or current.node_id or current.id).replace(";", ",")
+                )
+                current = (
+                    self.spans.get(current.parent_id) if current.parent_id else None
+                )
+            lines.append(
+                f"{';'.join(reversed(stack))} {round(span.duration * 1_000_000)}"
+            )
+        return "\n".join(lines)
+
+
+class WorkflowTraceCollector:
+    """工作流执行跟踪收集器
+
+    消费`DifyApp.run`产出的事件，按`node_id`/`predecessor_node_id`构建每次执行的跨度树，
+    并统计节点耗时、排队间隔、token和费用。
+
+    Args:
+        clock: 时间函数，默认为`time.perf_counter`
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter) -> None:
+        self.clock = clock
+        self.traces: Dict[str, WorkflowTrace] = {}
+        self._origins: Dict[str, float] = {}
+        # 每次执行中 node_id -> 最近一次执行ID，迭代中的节点会多次执行
+        self._latest: Dict[str, Dict[str, str]] = {}
+
+    def feed(self, event: ConversationEvent) -> None:
+        """处理一个事件，非工作流事件会被忽略"""
+        run_id = getattr(event, "workflow_run_id", None)
+        if not run_id:
+            return
+        now = self.clock()
+
+        if isinstance(event, WorkflowStartedEvent):
+            self._trace(run_id, event.task_id, now)
+        elif isinstance(event, NodeStartedEvent) and event.data:
+            trace = self._trace(run_id, event.task_id, now)
+            data = event.data
+            span_id = data.id or f"{data.node_id}:{data.index}"
+            latest = self._latest[run_id]
+            parent_id = None
+            if data.predecessor_node_id:
+                parent_id = latest.get(data.predecessor_node_id)
+            span = TraceSpan(
+                id=span_id,
+                node_id=data.node_id,
+                node_type=data.node_type,
+                title=data.title,
+                index=data.index,
+                predecessor_node_id=data.predecessor_node_id,
+                parent_id=parent_id,
+                start=now - self._origins[run_id],
+            )
+            parent = trace.spans.get(parent_id) if parent_id else None
+            if parent is not None:
+                parent.children.append(span_id)
+                if parent.end is not None:
+                    span.queue_gap = max(0.0, span.start - parent.end)
+            trace.spans[span_id] = span
+            if data.node_id:
+                latest[data.node_id] = span_id
+        elif isinstance(event, NodeFinishedEvent) and event.data:
+            trace = self._trace(run_id, event.task_id, now)
+            data = event.data
+            span_id = data.id or self._latest[run_id].get(data.node_id)
+            span = trace.spans.get(span_id)
+            if span is None:
+                return
+            span.end = now - self._origins[run_id]
+            span.elapsed_time = data.elapsed_time
+            span.status = data.status
+            meta = data.execution_metadata
+            if meta is not None:
+                span.total_tokens = meta.total_tokens or 0
+                span.total_price = meta.total_price or Decimal(0)
+                span.currency = meta.currency
+        elif isinstance(event, WorkflowFinishedEvent):
+            trace = self._trace(run_id, event.task_id, now)
+            if event.data:
+                trace.status = event.data.status.value if event.data.status else None
+                trace.elapsed_time = event.data.elapsed_time
+                trace.total_tokens = event.data.total_tokens
+
+    async def wrap(
+            self, events: AsyncIterable[ConversationEvent]
+    ) -> AsyncGenerator[ConversationEvent, None]:
+        """包装事件流，在原样转发事件的同时收集跟踪数据
+
+        Args:
+            events: 事件流，通常为`DifyApp.run`的返回值
+
+        Returns:
+            AsyncGenerator[ConversationEvent, None]: 原事件流
+        """
+        async for event in events:
+            self.feed(event)
+            yield event
+
+    def _trace(self, run_id: str, task_id: Optional[str], now: float) -> WorkflowTrace:
+        trace = self.traces.get(run_id)
+        if trace is None:
+            trace = self.traces[run_id] = WorkflowTrace(
+                workflow_run_id=run_id, task_id=task_id
+            )
+            self._origins[run_id] = now
+            self._latest[run_id] = {}
+        return trace
+
+
+def dump_chrome_trace(traces: List[WorkflowTrace], path: str) -> None:
+    """把多次执行的跟踪结果写入同一个Chrome trace文件
+
+    Args:
+        traces: 跟踪结果列表
+        path: 输出文件路径
+    """
+    events = [
+        event for trace in traces for event in trace.to_chrome_trace()["traceEvents"]
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            {"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False
+        )
+
+
+__all__ = [
+    "TraceSpan",
+    "WorkflowTrace",
+    "WorkflowTraceCollector",
+    "dump_chrome_trace",
+]
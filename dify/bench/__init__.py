@@ -0,0 +1,27 @@
+"""
+Dify应用压测工具
+
+命令行用法见`python -m dify.bench --help`。
+"""
+
+from .runner import (
+    BenchReport,
+    LoadGenerator,
+    Percentiles,
+    RequestResult,
+    percentile,
+    summarize,
+    write_results,
+)
+from .server import StandInServer
+
+__all__ = [
+    "BenchReport",
+    "LoadGenerator",
+    "Percentiles",
+    "RequestResult",
+    "StandInServer",
+    "percentile",
+    "summarize",
+    "write_results",
+]
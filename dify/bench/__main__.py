@@ -0,0 +1,119 @@
+import argparse
+import asyncio
+import json
+import sys
+from typing import List, Optional
+
+from ..app import DifyApp
+from ..app.schemas import ChatPayloads, RunWorkflowPayloads
+from ..http import AdminClient
+from .runner import LoadGenerator, write_results
+from .server import StandInServer
+
+
+def load_corpus(
+        path: Optional[str], mode: str, query: str, user: str
+) -> List[ChatPayloads | RunWorkflowPayloads]:
+    """读取请求语料
+
+    语料文件为JSONL，每行是一个请求配置；未指定文件时使用`query`生成单条语料。
+    """
+    model = ChatPayloads if mode == "chat" else RunWorkflowPayloads
+    if not path:
+        if mode == "chat":
+            return [ChatPayloads(query=query, user=user)]
+        return [RunWorkflowPayloads(inputs={"query": query}, user=user)]
+
+    corpus = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                corpus.append(model.model_validate({"user": user, **json.loads(line)}))
+    return corpus
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m dify.bench", description="Dify应用压测工具"
+    )
+    parser.add_argument("--base-url", help="Dify服务地址，不指定时启动本地模拟服务")
+    parser.add_argument("--api-key", default="stand-in", help="应用API密钥")
+    parser.add_argument(
+        "--mode",
+        choices=["chat", "completion", "run"],
+        default="chat",
+        help="调用的方法",
+    )
+    parser.add_argument("--corpus", help="请求语料文件（JSONL，每行一个请求配置）")
+    parser.add_argument("--query", default="你好", help="未指定语料时使用的输入")
+    parser.add_argument("--user", default="dify-bench", help="用户标识")
+    parser.add_argument(
+        "--loop", choices=["open", "closed"], default="closed", help="调度模式"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=8, help="并发数（开环模式下为在途请求上限）"
+    )
+    parser.add_argument("--rps", type=float, help="开环模式的目标请求速率")
+    parser.add_argument("--requests", type=int, help="请求总数")
+    parser.add_argument("--duration", type=float, help="压测时长（秒）")
+    parser.add_argument("--output", help="原始结果输出路径，.csv或.json")
+    parser.add_argument("--report", help="汇总报告输出路径（JSON）")
+    parser.add_argument(
+        "--stand-in-ttft", type=float, default=0.05, help="模拟服务的首字延迟（秒）"
+    )
+    parser.add_argument(
+        "--stand-in-tokens", type=int, default=20, help="模拟服务每个回复的token数"
+    )
+    parser.add_argument(
+        "--stand-in-error-rate", type=float, default=0.0, help="模拟服务的错误率"
+    )
+    args = parser.parse_args(argv)
+    if args.requests is None and args.duration is None:
+        args.requests = 100
+    if args.loop == "open" and not args.rps:
+        parser.error("开环模式必须指定 --rps")
+    return args
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server = await StandInServer(
+            ttft=args.stand_in_ttft,
+            tokens=args.stand_in_tokens,
+            error_rate=args.stand_in_error_rate,
+        ).start()
+        base_url = server.base_url
+        print(f"使用本地模拟服务: {base_url}", file=sys.stderr)
+
+    try:
+        generator = LoadGenerator(
+            DifyApp(AdminClient(base_url, "")),
+            args.api_key,
+            args.mode,
+            load_corpus(args.corpus, args.mode, args.query, args.user),
+            concurrency=args.concurrency,
+            rate=args.rps,
+            loop=args.loop,
+            requests=args.requests,
+            duration=args.duration,
+        )
+        report = await generator.run()
+    finally:
+        if server is not None:
+            await server.stop()
+
+    print(report.format())
+    if args.output:
+        write_results(generator.results, args.output)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(report.model_dump_json(indent=2))
+    return 1 if report.requests and report.errors == report.requests else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
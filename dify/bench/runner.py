@@ -0,0 +1,345 @@
+import asyncio
+import csv
+import json
+import math
+import random
+import time
+from typing import Dict, List, Literal, Optional, Sequence
+
+from pydantic import BaseModel, Field
+
+from ..app import DifyApp
+from ..app.schemas import (
+    AgentMessageEvent,
+    ApiKey,
+    ChatMessageEvent,
+    ChatPayloads,
+    ErrorEvent,
+    MessageEndEvent,
+    RunWorkflowPayloads,
+    TextChunkEvent,
+    WorkflowFinishedEvent,
+    WorkflowStatus,
+)
+
+BenchMode = Literal["chat", "completion", "run"]
+LoopMode = Literal["open", "closed"]
+
+
+class RequestResult(BaseModel):
+    """单个请求的压测结果
+
+    Attributes:
+        index: 请求序号
+        start: 发起时间（秒，相对于压测开始）
+        latency: 总耗时（秒）
+        ttft: 首个token耗时（秒）
+        tokens: 输出token数量
+        ok: 是否成功
+        error: 错误信息
+    """
+
+    index: int = Field(description="请求序号")
+    start: float = Field(description="发起时间（秒，相对于压测开始）")
+    latency: Optional[float] = Field(default=None, description="总耗时（秒）")
+    ttft: Optional[float] = Field(default=None, description="首个token耗时（秒）")
+    tokens: int = Field(default=0, description="输出token数量")
+    ok: bool = Field(default=False, description="是否成功")
+    error: Optional[str] = Field(default=None, description="错误信息")
+
+
+class Percentiles(BaseModel):
+    """分位数统计（秒）"""
+
+    p50: Optional[float] = None
+    p90: Optional[float] = None
+    p95: Optional[float] = None
+    p99: Optional[float] = None
+    max: Optional[float] = None
+
+
+class BenchReport(BaseModel):
+    """压测汇总报告
+
+    Attributes:
+        requests: 请求总数
+        errors: 失败数
+        error_rate: 失败率
+        duration: 压测总耗时（秒）
+        throughput: 平均吞吐量（请求/秒）
+        tokens_per_sec: 平均输出速度（token/秒）
+        latency: 总耗时分位数
+        ttft: 首个token耗时分位数
+        timeline: 每秒完成的请求数
+    """
+
+    requests: int = Field(description="请求总数")
+    errors: int = Field(description="失败数")
+    error_rate: float = Field(description="失败率")
+    duration: float = Field(description="压测总耗时（秒）")
+    throughput: float = Field(description="平均吞吐量（请求/秒）")
+    tokens_per_sec: float = Field(description="平均输出速度（token/秒）")
+    latency: Percentiles = Field(description="总耗时分位数")
+    ttft: Percentiles = Field(description="首个token耗时分位数")
+    timeline: List[int] = Field(default_factory=list, description="每秒完成的请求数")
+
+    def format(self) -> str:
+        """格式化为便于阅读的文本"""
+
+        def ms(value: Optional[float]) -> str:
+            return "-" if value is None else f"{value * 1000:.1f}ms"
+
+        lines = [
+            f"请求数: {self.requests}  失败: {self.errors} ({self.error_rate:.2%})",
+            f"耗时: {self.duration:.2f}s  吞吐量: {self.throughput:.2f} req/s  "
+            f"输出速度: {self.tokens_per_sec:.1f} token/s",
+        ]
+        for name, p in (("延迟", self.latency), ("首字", self.ttft)):
+            lines.append(
+                f"{name}: p50={ms(p.p50)} p90={ms(p.p90)} p95={ms(p.p95)} "
+                f"p99={ms(p.p99)} max={ms(p.max)}"
+            )
+        lines.append("每秒完成: " + " ".join(str(n) for n in self.timeline))
+        return "\n".join(lines)
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """线性插值计算分位数
+
+    Args:
+        values: 数据（无需排序）
+        q: 分位，取值范围0-100
+
+    Returns:
+        Optional[float]: 分位数，数据为空时返回None
+    """
+    if not values:
+        return None
+    data = sorted(values)
+    rank = (len(data) - 1) * q / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return data[low] + (data[high] - data[low]) * (rank - low)
+
+
+def _percentiles(values: Sequence[float]) -> Percentiles:
+    return Percentiles(
+        p50=percentile(values, 50),
+        p90=percentile(values, 90),
+        p95=percentile(values, 95),
+        p99=percentile(values, 99),
+        max=max(values) if values else None,
+    )
+
+
+def summarize(results: List[RequestResult], duration: float) -> BenchReport:
+    """汇总压测结果
+
+    Args:
+        results: 单个请求的结果
+        duration: 压测总耗时（秒）
+
+    Returns:
+        BenchReport: 汇总报告
+    """
+    ok = [r for r in results if r.ok]
+    errors = len(results) - len(ok)
+    timeline: Dict[int, int] = {}
+    for r in results:
+        if r.latency is not None:
+            second = int(r.start + r.latency)
+            timeline[second] = timeline.get(second, 0) + 1
+    seconds = max(timeline) + 1 if timeline else 0
+    return BenchReport(
+        requests=len(results),
+        errors=errors,
+        error_rate=errors / len(results) if results else 0.0,
+        duration=duration,
+        throughput=len(results) / duration if duration > 0 else 0.0,
+        tokens_per_sec=sum(r.tokens for r in ok) / duration if duration > 0 else 0.0,
+        latency=_percentiles([r.latency for r in ok if r.latency is not None]),
+        ttft=_percentiles([r.ttft for r in ok if r.ttft is not None]),
+        timeline=[timeline.get(i, 0) for i in range(seconds)],
+    )
+
+
+def write_results(results: List[RequestResult], path: str) -> None:
+    """把原始结果写入文件，按扩展名选择CSV或JSON格式
+
+    Args:
+        results: 单个请求的结果
+        path: 输出路径，以`.csv`结尾时写CSV，否则写JSON
+    """
+    if path.endswith(".csv"):
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(RequestResult.model_fields))
+            writer.writeheader()
+            for r in results:
+                writer.writerow(r.model_dump())
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                [r.model_dump() for r in results], f, ensure_ascii=False, indent=2
+            )
+
+
+class LoadGenerator:
+    """Dify应用压测器
+
+    闭环模式下`concurrency`个worker各自串行发送请求，请求完成后立即发送下一个；
+    开环模式下按`rate`（请求/秒，泊松到达）发起请求，与服务端响应速度无关，
+    `concurrency`作为在途请求上限，因等待上限而推迟的时间计入延迟，
+    避免协调遗漏（coordinated omission）。
+
+    Args:
+        app: 应用管理对象
+        api_key: API密钥
+        mode: 调用的方法，chat、completion或run
+        corpus: 请求配置语料，按顺序循环使用
+        concurrency: 闭环模式的并发数，开环模式的在途请求上限
+        rate: 开环模式的目标请求速率（请求/秒）
+        loop: 调度模式，open或closed
+        requests: 请求总数，与`duration`至少指定一个
+        duration: 压测时长（秒）
+    """
+
+    def __init__(
+            self,
+            app: DifyApp,
+            api_key: ApiKey | str,
+            mode: BenchMode,
+            corpus: List[ChatPayloads | RunWorkflowPayloads],
+            concurrency: int = 8,
+            rate: Optional[float] = None,
+            loop: LoopMode = "closed",
+            requests: Optional[int] = None,
+            duration: Optional[float] = None,
+    ) -> None:
+        if not corpus:
+            raise ValueError("请求语料不能为空")
+        if requests is None and duration is None:
+            raise ValueError("请求总数和压测时长至少指定一个")
+        if loop == "open" and not rate:
+            raise ValueError("开环模式必须指定请求速率")
+        if concurrency < 1:
+            raise ValueError("并发数不能小于1")
+        self.app = app
+        self.api_key = api_key
+        self.mode = mode
+        self.corpus = corpus
+        self.concurrency = concurrency
+        self.rate = rate
+        self.loop = loop
+        self.requests = requests
+        self.duration = duration
+        self.results: List[RequestResult] = []
+        self._origin = 0.0
+
+    async def run(self) -> BenchReport:
+        """执行压测
+
+        Returns:
+            BenchReport: 汇总报告，原始结果保存在`results`中
+        """
+        self.results = []
+        self._origin = time.perf_counter()
+        if self.loop == "open":
+            await self._open_loop()
+        else:
+            await self._closed_loop()
+        duration = time.perf_counter() - self._origin
+        self.results.sort(key=lambda r: r.index)
+        return summarize(self.results, duration)
+
+    def _next_index(
+            self, counter: List[int], at: Optional[float] = None
+    ) -> Optional[int]:
+        if self.requests is not None and counter[0] >= self.requests:
+            return None
+        now = time.perf_counter() if at is None else at
+        if self.duration is not None and now - self._origin >= self.duration:
+            return None
+        counter[0] += 1
+        return counter[0] - 1
+
+    async def _closed_loop(self) -> None:
+        counter = [0]
+
+        async def worker():
+            while True:
+                index = self._next_index(counter)
+                if index is None:
+                    return
+                await self._one(index)
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+    async def _open_loop(self) -> None:
+        counter = [0]
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+
+        async def fire(index: int, scheduled: float):
+            async with semaphore:
+                await self._one(index, scheduled)
+
+        # 到达时间只由计划推进，与请求实际发出的时间无关；落后于计划时立即补发，
+        # 延迟从计划时间开始计算
+        next_at = self._origin
+        while True:
+            index = self._next_index(counter, next_at)
+            if index is None:
+                break
+            task = asyncio.create_task(fire(index, next_at))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            next_at += random.expovariate(self.rate)
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def _one(self, index: int, scheduled: Optional[float] = None) -> None:
+        payloads = self.corpus[index % len(self.corpus)]
+        started = scheduled if scheduled is not None else time.perf_counter()
+        result = RequestResult(index=index, start=started - self._origin)
+        self.results.append(result)
+        chunks = 0
+        usage_tokens = None
+        try:
+            async for event in getattr(self.app, self.mode)(self.api_key, payloads):
+                if isinstance(
+                    event, (ChatMessageEvent, AgentMessageEvent, TextChunkEvent)
+                ):
+                    chunks += 1
+                    if result.ttft is None:
+                        result.ttft = time.perf_counter() - started
+                elif isinstance(event, ErrorEvent):
+                    raise RuntimeError(
+                        event.message or event.code or "服务端返回错误事件"
+                    )
+                elif isinstance(event, MessageEndEvent) and event.metadata.usage:
+                    usage_tokens = event.metadata.usage.completion_tokens
+                elif isinstance(event, WorkflowFinishedEvent) and event.data:
+                    if event.data.status != WorkflowStatus.SUCCEEDED:
+                        raise RuntimeError(
+                            event.data.error or f"工作流执行状态: {event.data.status}"
+                        )
+                    usage_tokens = event.data.total_tokens
+            result.ok = True
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            result.error = str(e)
+        result.latency = time.perf_counter() - started
+        # 服务端未返回用量时以流式分块数近似token数
+        result.tokens = usage_tokens if usage_tokens is not None else chunks
+
+
+__all__ = [
+    "RequestResult",
+    "Percentiles",
+    "BenchReport",
+    "LoadGenerator",
+    "percentile",
+    "summarize",
+    "write_results",
+]
@@ -0,0 +1,185 @@
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import Optional
+
+
+class StandInServer:
+    """本地模拟的Dify服务端，用于离线压测和测试
+
+    只实现`/v1/chat-messages`、`/v1/completion-messages`和`/v1/workflows/run`的流式响应，
+    按配置的首字延迟、token间隔和错误率输出SSE事件，不调用任何模型。
+
+    Args:
+        host: 监听地址，默认为127.0.0.1
+        port: 监听端口，默认为0（随机可用端口）
+        ttft: 首个token前的延迟（秒）
+        token_interval: token之间的间隔（秒）
+        tokens: 每个回复的token数量
+        error_rate: 返回错误事件的比例，取值范围0-1
+    """
+
+    def __init__(
+            self,
+            host: str = "127.0.0.1",
+            port: int = 0,
+            ttft: float = 0.05,
+            token_interval: float = 0.005,
+            tokens: int = 20,
+            error_rate: float = 0.0,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.ttft = ttft
+        self.token_interval = token_interval
+        self.tokens = tokens
+        self.error_rate = error_rate
+        self.requests = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def base_url(self) -> str:
+        """服务地址，可直接作为`AdminClient`的`base_url`"""
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> "StandInServer":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "StandInServer":
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.stop()
+
+    async def _handle(
+            self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            lines = head.decode("latin-1").split("\r\n")
+            method, path, _ = lines[0].split(" ", 2)
+            headers = {}
+            for line in lines[1:]:
+                if ":" in line:
+                    name, value = line.split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+            length = int(headers.get("content-length", 0))
+            body = json.loads(await reader.readexactly(length)) if length else {}
+            self.requests += 1
+
+            route = path.split("?", 1)[0]
+            if method != "POST" or route not in (
+                    "/v1/chat-messages", "/v1/completion-messages", "/v1/workflows/run"
+            ):
+                payload = b'{"code": "not_found", "message": "not found"}'
+                writer.write(
+                    b"HTTP/1.1 404 Not Found\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(payload)}\r\n".encode()
+                    + b"Connection: close\r\n\r\n"
+                    + payload
+                )
+                await writer.drain()
+                return
+
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n"
+            )
+            await writer.drain()
+            for event in self._events(route, body):
+                if isinstance(event, float):
+                    await asyncio.sleep(event)
+                    continue
+                writer.write(
+                    f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode()
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def _events(self, route: str, body: dict):
+        task_id = str(uuid.uuid4())
+        message_id = str(uuid.uuid4())
+        conversation_id = body.get("conversation_id") or str(uuid.uuid4())
+        now = int(time.time())
+        workflow = route == "/v1/workflows/run"
+        run_id = str(uuid.uuid4())
+
+        if workflow:
+            yield {
+                "event": "workflow_started",
+                "task_id": task_id,
+                "workflow_run_id": run_id,
+                "data": {
+                    "id": run_id, "workflow_id": "stand-in", "sequence_number": 1,
+                    "created_at": now,
+                },
+            }
+        yield float(self.ttft)
+        if random.random() < self.error_rate:
+            yield {
+                "event": "error", "task_id": task_id, "message_id": message_id,
+                "status": 500, "code": "stand_in_error", "message": "模拟的服务端错误",
+            }
+            return
+
+        for i in range(self.tokens):
+            if i:
+                yield float(self.token_interval)
+            token = f"t{i} "
+            if workflow:
+                yield {
+                    "event": "text_chunk",
+                    "task_id": task_id,
+                    "workflow_run_id": run_id,
+                    "data": {"text": token},
+                }
+            else:
+                yield {
+                    "event": "message", "task_id": task_id, "message_id": message_id,
+                    "conversation_id": conversation_id, "answer": token,
+                    "created_at": now,
+                }
+
+        if workflow:
+            yield {
+                "event": "workflow_finished",
+                "task_id": task_id,
+                "workflow_run_id": run_id,
+                "data": {
+                    "id": run_id, "workflow_id": "stand-in", "status": "succeeded",
+                    "outputs": {"text": "".join(f"t{i} " for i in range(self.tokens))},
+                    "elapsed_time": 0.0, "total_tokens": self.tokens, "total_steps": 1,
+                    "created_at": now, "finished_at": now,
+                },
+            }
+        else:
+            yield {
+                "event": "message_end", "task_id": task_id, "message_id": message_id,
+                "conversation_id": conversation_id,
+                "metadata": {
+                    "usage": {
+                        "prompt_tokens": 0, "prompt_unit_price": "0",
+                        "prompt_price_unit": "0", "prompt_price": "0",
+                        "completion_tokens": self.tokens, "completion_unit_price": "0",
+                        "completion_price_unit": "0", "completion_price": "0",
+                        "total_tokens": self.tokens, "total_price": "0",
+                        "currency": "USD", "latency": 0.0,
+                    },
+                },
+            }
+
+
+__all__ = ["StandInServer"]
@@ -0,0 +1,223 @@
+import re
+import time
+from collections import deque
+from enum import Enum
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+import httpx
+from pydantic import BaseModel, Field
+
+from .exceptions import CircuitOpenException
+from .hooks import BREAKER_REJECTED, BREAKER_STATE, Hooks
+
+_ID_SEGMENT = re.compile(
+    r"^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})$"
+)
+
+
+def url_template(url: httpx.URL | str) -> str:
+    """把URL归一化为`主机 + 路径模板`，路径中的数字和UUID替换为`{id}`
+
+    Example:
+        >>> url_template("https://dify.example.com/console/api/apps/3fa85f64-5717-4562-b3fc-2c963f66afa6")
+        'dify.example.com/console/api/apps/{id}'
+    """
+    url = httpx.URL(url)
+    segments = ["{id}" if _ID_SEGMENT.match(s) else s for s in url.path.split("/")]
+    return url.netloc.decode("ascii") + "/".join(segments)
+
+
+class BreakerState(str, Enum):
+    """熔断器状态"""
+
+    CLOSED = "closed"  # 正常放行
+    OPEN = "open"  # 快速失败
+    HALF_OPEN = "half_open"  # 放行少量试探请求
+
+
+class CircuitBreakerPolicy(BaseModel):
+    """熔断策略
+
+    Attributes:
+        window_size: 统计窗口大小（最近的请求数）
+        min_calls: 窗口内至少有多少个请求才计算比例
+        failure_rate_threshold: 失败率阈值，达到后打开熔断器
+        slow_call_duration: 慢请求耗时阈值（秒，到收到响应头为止）
+        slow_call_rate_threshold: 慢请求比例阈值，达到后打开熔断器
+        open_duration: 打开状态持续时间（秒），之后进入半开状态
+        half_open_calls: 半开状态放行的试探请求数，全部成功后关闭熔断器
+    """
+
+    window_size: int = Field(default=20, ge=1, description="统计窗口大小")
+    min_calls: int = Field(default=10, ge=1, description="计算比例所需的最少请求数")
+    failure_rate_threshold: float = Field(
+        default=0.5, gt=0, le=1, description="失败率阈值"
+    )
+    slow_call_duration: float = Field(
+        default=30.0, gt=0, description="慢请求耗时阈值（秒）"
+    )
+    slow_call_rate_threshold: float = Field(
+        default=0.8, gt=0, le=1, description="慢请求比例阈值"
+    )
+    open_duration: float = Field(
+        default=30.0, gt=0, description="打开状态持续时间（秒）"
+    )
+    half_open_calls: int = Field(default=3, ge=1, description="半开状态的试探请求数")
+
+
+class CircuitBreaker:
+    """单个键（主机 + URL模板）的熔断器
+
+    失败指连接错误、超时和5xx响应，4xx属于调用方错误，不计入失败。
+    """
+
+    def __init__(
+            self,
+            key: str,
+            policy: CircuitBreakerPolicy,
+            hooks: Optional[Hooks],
+            clock: Callable[[], float],
+    ):
+        self.key = key
+        self.policy = policy
+        self.hooks = hooks
+        self.clock = clock
+        self.state = BreakerState.CLOSED
+        self.window: Deque[Tuple[bool, bool]] = deque(maxlen=policy.window_size)
+        self.opened_at = 0.0
+        self._trials = 0
+        self._trial_successes = 0
+
+    @property
+    def failure_rate(self) -> float:
+        if not self.window:
+            return 0.0
+        return sum(1 for failed, _ in self.window if failed) / len(self.window)
+
+    @property
+    def slow_rate(self) -> float:
+        if not self.window:
+            return 0.0
+        return sum(1 for _, slow in self.window if slow) / len(self.window)
+
+    def before(self) -> None:
+        """请求发出前调用
+
+        Raises:
+            CircuitOpenException: 熔断器打开或半开状态的试探名额已用完时抛出
+        """
+        if self.state == BreakerState.OPEN:
+            remaining = self.opened_at + self.policy.open_duration - self.clock()
+            if remaining > 0:
+                self._reject(remaining)
+            self._transition(BreakerState.HALF_OPEN)
+            self._trials = 0
+            self._trial_successes = 0
+        if self.state == BreakerState.HALF_OPEN:
+            if self._trials >= self.policy.half_open_calls:
+                self._reject(0.0)
+            self._trials += 1
+
+    def after(self, failed: bool, duration: float) -> None:
+        """请求结束后调用
+
+        Args:
+            failed: 是否失败
+            duration: 耗时（秒）
+        """
+        slow = duration >= self.policy.slow_call_duration
+        if self.state == BreakerState.HALF_OPEN:
+            if failed or slow:
+                self._open()
+                return
+            self._trial_successes += 1
+            if self._trial_successes >= self.policy.half_open_calls:
+                self.window.clear()
+                self._transition(BreakerState.CLOSED)
+            return
+        if self.state == BreakerState.OPEN:
+            # 打开前已经发出的请求，结果不再计入
+            return
+
+        self.window.append((failed, slow))
+        if len(self.window) >= self.policy.min_calls and (
+                self.failure_rate >= self.policy.failure_rate_threshold
+                or self.slow_rate >= self.policy.slow_call_rate_threshold
+        ):
+            self._open()
+
+    def cancel(self) -> None:
+        """请求被取消时调用，归还半开状态的试探名额"""
+        if self.state == BreakerState.HALF_OPEN and self._trials > 0:
+            self._trials -= 1
+
+    def _open(self) -> None:
+        self.opened_at = self.clock()
+        self._transition(BreakerState.OPEN)
+
+    def _reject(self, retry_after: float) -> None:
+        if self.hooks:
+            self.hooks.emit(BREAKER_REJECTED, key=self.key, retry_after=retry_after)
+        raise CircuitOpenException(
+            f"熔断器已打开，请求被拒绝: {self.key}",
+            key=self.key,
+            retry_after=retry_after,
+        )
+
+    def _transition(self, state: BreakerState) -> None:
+        old, self.state = self.state, state
+        if self.hooks and old != state:
+            self.hooks.emit(
+                BREAKER_STATE,
+                key=self.key,
+                old_state=old.value,
+                new_state=state.value,
+                failure_rate=self.failure_rate,
+                slow_rate=self.slow_rate,
+            )
+
+
+class CircuitBreakerRegistry:
+    """按`主机 + URL模板`管理熔断器
+
+    同一个注册表可以在多个客户端之间共享，`AdminClient.create_api_client`创建的客户端会自动共享。
+
+    Args:
+        policy: 熔断策略，默认为`CircuitBreakerPolicy()`
+        hooks: 埋点钩子，状态变化和快速拒绝会触发事件
+        clock: 时间函数，默认为`time.monotonic`
+    """
+
+    def __init__(
+            self,
+            policy: CircuitBreakerPolicy = None,
+            hooks: Hooks = None,
+            clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.policy = policy or CircuitBreakerPolicy()
+        self.hooks = hooks
+        self.clock = clock
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, url: httpx.URL | str) -> CircuitBreaker:
+        """获取URL对应的熔断器"""
+        key = url_template(url)
+        breaker = self.breakers.get(key)
+        if breaker is None:
+            breaker = self.breakers[key] = CircuitBreaker(
+                key, self.policy, self.hooks, self.clock
+            )
+        return breaker
+
+    def states(self) -> Dict[str, BreakerState]:
+        """所有熔断器的当前状态"""
+        return {key: breaker.state for key, breaker in self.breakers.items()}
+
+
+__all__ = [
+    "BreakerState",
+    "CircuitBreakerPolicy",
+    "CircuitBreaker",
+    "CircuitBreakerRegistry",
+    "url_template",
+]
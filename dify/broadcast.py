@@ -0,0 +1,243 @@
+import asyncio
+from collections import deque
+from enum import Enum
+from typing import AsyncIterable, AsyncIterator, Deque, Generic, List, Optional, TypeVar
+
+from .exceptions import SlowConsumerException
+
+T = TypeVar("T")
+
+
+class SlowConsumerPolicy(str, Enum):
+    """订阅者缓冲区已满时的处理策略"""
+
+    BLOCK = "block"  # 等待订阅者消费，会拖慢所有订阅者
+    DROP_OLDEST = "drop_oldest"  # 丢弃最早的未消费事件
+    DISCONNECT = "disconnect"  # 断开该订阅者
+
+
+class Subscription(Generic[T]):
+    """广播的单个订阅者，是一个有界的异步迭代器
+
+    不要直接创建，使用`Broadcast.subscribe`获取。
+
+    Attributes:
+        dropped: 因缓冲区已满而丢弃的事件数量
+    """
+
+    def __init__(
+            self, broadcast: "Broadcast[T]", maxsize: int, policy: SlowConsumerPolicy
+    ) -> None:
+        self._broadcast = broadcast
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = 0
+        self._buffer: Deque[T] = deque()
+        self._readable = asyncio.Event()
+        self._writable = asyncio.Event()
+        self._finished = False
+        self._closed = False
+        self._error: Optional[BaseException] = None
+
+    @property
+    def closed(self) -> bool:
+        """订阅者是否已关闭或被断开"""
+        return self._closed
+
+    def __aiter__(self) -> AsyncIterator[T]:
+        return self
+
+    async def __anext__(self) -> T:
+        while not self._buffer:
+            if self._error is not None:
+                error, self._error = self._error, None
+                raise error
+            if self._finished or self._closed:
+                raise StopAsyncIteration
+            self._broadcast._ensure_started()
+            self._readable.clear()
+            await self._readable.wait()
+        item = self._buffer.popleft()
+        self._writable.set()
+        return item
+
+    async def aclose(self) -> None:
+        """取消订阅，所有订阅者都取消后上游请求会被关闭"""
+        if self._closed:
+            return
+        self._close()
+        await self._broadcast._unsubscribe(self)
+
+    async def __aenter__(self) -> "Subscription[T]":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
+
+    def _close(self, error: Optional[BaseException] = None) -> None:
+        self._closed = True
+        self._error = error
+        self._buffer.clear()
+        self._readable.set()
+        self._writable.set()
+
+    def _finish(self, error: Optional[BaseException] = None) -> None:
+        self._finished = True
+        if error is not None:
+            self._error = error
+        self._readable.set()
+
+    async def _offer(self, item: T) -> bool:
+        """写入一个事件，返回False表示订阅者已不再接收"""
+        if len(self._buffer) >= self.maxsize:
+            if self.policy == SlowConsumerPolicy.BLOCK:
+                while len(self._buffer) >= self.maxsize and not self._closed:
+                    self._writable.clear()
+                    await self._writable.wait()
+            elif self.policy == SlowConsumerPolicy.DROP_OLDEST:
+                self._buffer.popleft()
+                self.dropped += 1
+            else:
+                self._close(SlowConsumerException(f"订阅者消费过慢，缓冲区已满（{self.maxsize}）"))
+        if self._closed:
+            return False
+        self._buffer.append(item)
+        self._readable.set()
+        return True
+
+
+class Broadcast(Generic[T]):
+    """把一个异步事件流（如`DifyApp.chat`的返回值）分发给多个订阅者
+
+    每个订阅者拥有独立的有界缓冲区，事件对象在订阅者之间共享，不做复制。
+    上游在任一订阅者开始迭代时才启动，所有订阅者都取消后上游请求会被关闭。
+    上游出错时，每个订阅者在消费完缓冲区中的事件后收到同一个异常。
+
+    Args:
+        source: 上游事件流
+        maxsize: 每个订阅者的缓冲区大小，默认为64
+        policy: 缓冲区已满时的处理策略，默认为`SlowConsumerPolicy.BLOCK`
+    """
+
+    def __init__(
+            self,
+            source: AsyncIterable[T],
+            maxsize: int = 64,
+            policy: SlowConsumerPolicy = SlowConsumerPolicy.BLOCK,
+    ) -> None:
+        if maxsize < 1:
+            raise ValueError("缓冲区大小不能小于1")
+        self.source = source
+        self.maxsize = maxsize
+        self.policy = policy
+        self._subscribers: List[Subscription[T]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._done = False
+
+    def subscribe(
+            self,
+            maxsize: Optional[int] = None,
+            policy: Optional[SlowConsumerPolicy] = None,
+    ) -> Subscription[T]:
+        """添加订阅者
+
+        上游启动后加入的订阅者只能收到加入之后的事件。
+
+        Args:
+            maxsize: 缓冲区大小，默认使用广播的设置
+            policy: 缓冲区已满时的处理策略，默认使用广播的设置
+
+        Returns:
+            Subscription[T]: 订阅者
+
+        Raises:
+            ValueError: 当上游已结束时抛出
+        """
+        if self._done:
+            raise ValueError("上游事件流已结束，无法订阅")
+        subscription = Subscription(
+            self, maxsize or self.maxsize, policy or self.policy
+        )
+        self._subscribers.append(subscription)
+        return subscription
+
+    async def aclose(self) -> None:
+        """关闭所有订阅者和上游请求"""
+        for subscription in list(self._subscribers):
+            subscription._close()
+        self._subscribers.clear()
+        await self._stop()
+
+    async def __aenter__(self) -> "Broadcast[T]":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
+
+    def _ensure_started(self) -> None:
+        if self._task is None and not self._done:
+            self._task = asyncio.create_task(self._pump())
+
+    async def _unsubscribe(self, subscription: Subscription[T]) -> None:
+        if subscription in self._subscribers:
+            self._subscribers.remove(subscription)
+        if not self._subscribers:
+            await self._stop()
+
+    async def _stop(self) -> None:
+        self._done = True
+        task, self._task = self._task, None
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        elif task is None:
+            await self._close_source()
+
+    async def _close_source(self) -> None:
+        aclose = getattr(self.source, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+    async def _pump(self) -> None:
+        error: Optional[BaseException] = None
+        try:
+            async for item in self.source:
+                for subscription in list(self._subscribers):
+                    if not await subscription._offer(item):
+                        if subscription in self._subscribers:
+                            self._subscribers.remove(subscription)
+                if not self._subscribers:
+                    break
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = e
+        finally:
+            self._done = True
+            for subscription in self._subscribers:
+                subscription._finish(error)
+            await self._close_source()
+
+
+def tee(
+        source: AsyncIterable[T],
+        n: int = 2,
+        maxsize: int = 64,
+        policy: SlowConsumerPolicy = SlowConsumerPolicy.BLOCK,
+) -> List[Subscription[T]]:
+    """把一个异步事件流复制为n个订阅者，类似`itertools.tee`
+
+    Args:
+        source: 上游事件流
+        n: 订阅者数量，默认为2
+        maxsize: 每个订阅者的缓冲区大小，默认为64
+        policy: 缓冲区已满时的处理策略，默认为`SlowConsumerPolicy.BLOCK`
+
+    Returns:
+        List[Subscription[T]]: 订阅者列表
+    """
+    broadcast = Broadcast(source, maxsize=maxsize, policy=policy)
+    return [broadcast.subscribe() for _ in range(n)]
+
+
+__all__ = ["SlowConsumerPolicy", "Subscription", "Broadcast", "tee"]
@@ -0,0 +1,270 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Type, TypeVar
+
+import httpx
+from pydantic import TypeAdapter
+
+from .diskcache import DiskCache
+
+T = TypeVar("T")
+
+_adapters: Dict[Any, TypeAdapter] = {}
+
+
+class CacheEntry:
+    """缓存的GET响应
+
+    Attributes:
+        data: 解码后的响应体
+        digest: 响应体的SHA-1摘要，服务端没有返回校验器时用于判断内容是否变化
+        etag: `ETag`响应头
+        last_modified: `Last-Modified`响应头
+        expires_at: 过期时间戳，之前可以不经请求直接使用，只有配置了磁盘缓存时才会设置
+        path: 请求路径，写操作时按路径让相关条目过期
+        models: 按模型类型缓存的校验结果
+    """
+
+    def __init__(
+            self, data: Any, digest: str, etag: str = None, last_modified: str = None,
+            expires_at: float = 0.0, path: str = "",
+    ) -> None:
+        self.data = data
+        self.digest = digest
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+        self.path = path
+        self.models: Dict[Any, Any] = {}
+
+
+class ResponseCache:
+    """按HTTP语义重新验证的GET响应缓存
+
+    保存响应的`ETag`/`Last-Modified`，再次请求时发送`If-None-Match`/`If-Modified-Since`，
+    服务端返回304时直接使用缓存的解码结果；服务端没有返回校验器时比较响应体的摘要，
+    内容没有变化时同样复用缓存，跳过JSON解码。
+
+    内容没有变化时返回的是同一个对象，配合`validate_cached`可以跳过pydantic的重复校验。
+    解码后的响应体和校验后的模型都在多次调用之间共享，调用方应把它们当作只读的，
+    需要修改时先自行复制（如`model_copy(deep=True)`）。
+
+    配置了`disk`时，内存中没有的条目从磁盘加载，新的响应同时写入磁盘，
+    在资源的有效期内直接使用缓存而不发送请求。磁盘操作在线程池中执行，不阻塞事件循环。
+    POST/DELETE请求之后`invalidate`让路径相关的条目（包括上级的列表）立即过期。
+
+    Args:
+        max_entries: 最多缓存的响应数，超过后淘汰最久未使用的
+        disk: 下层的持久化缓存
+        clock: 时间函数，默认为`time.time`
+    """
+
+    def __init__(
+            self,
+            max_entries: int = 256,
+            disk: DiskCache = None,
+            clock: Callable[[], float] = time.time,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("缓存条目数必须大于0")
+        self.max_entries = max_entries
+        self.disk = disk
+        self.clock = clock
+        self.entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        # 响应体对象 -> 条目，用于`validate`按响应体找到条目
+        self._by_data: Dict[int, CacheEntry] = {}
+        # 有效期内直接使用缓存的次数
+        self.fresh_hits = 0
+        # 服务端返回304的次数
+        self.not_modified = 0
+        # 没有校验器、但响应体摘要未变化的次数
+        self.unchanged = 0
+        # 内容变化或首次请求的次数
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    async def get(self, key: Hashable) -> Optional[CacheEntry]:
+        """获取缓存条目，内存中没有时从磁盘加载"""
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            return entry
+        if self.disk is None:
+            return None
+        stored = await asyncio.to_thread(self.disk.get, key)
+        if stored is None:
+            return None
+        entry = CacheEntry(
+            json.loads(stored.content), stored.digest, stored.etag,
+            stored.last_modified, stored.expires_at, stored.path,
+        )
+        self._store(key, entry)
+        return entry
+
+    async def fresh(self, key: Hashable) -> Optional[CacheEntry]:
+        """获取仍在有效期内、可以不经请求直接使用的条目"""
+        entry = await self.get(key)
+        if entry is None or entry.expires_at <= self.clock():
+            return None
+        self.fresh_hits += 1
+        return entry
+
+    def conditional_headers(self, key: Hashable) -> Dict[str, str]:
+        """根据缓存的校验器生成条件请求头，没有缓存条目时不发送条件请求"""
+        entry = self.entries.get(key)
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    async def resolve(self, key: Hashable, response: httpx.Response) -> Any:
+        """处理成功的响应，返回解码后的响应体
+
+        Args:
+            key: 请求的键
+            response: 已读取响应体的响应，状态码为2xx或304
+
+        Returns:
+            Any: 解码后的响应体，内容没有变化时为缓存的同一个对象
+
+        Raises:
+            KeyError: 响应为304但缓存条目已被淘汰时抛出，调用方应重新发送不带条件的请求
+        """
+        entry = await self.get(key)
+        url = str(response.request.url)
+        if response.status_code == 304:
+            if entry is None:
+                raise KeyError(key)
+            self.not_modified += 1
+            if self.disk is not None:
+                entry.expires_at = await asyncio.to_thread(self.disk.touch, key, url)
+            return entry.data
+
+        digest = hashlib.sha1(response.content).hexdigest()
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if entry is not None and entry.digest == digest:
+            self.unchanged += 1
+            if self.disk is not None:
+                if (entry.etag, entry.last_modified) == (etag, last_modified):
+                    entry.expires_at = await asyncio.to_thread(
+                        self.disk.touch, key, url
+                    )
+                else:
+                    entry.expires_at = await asyncio.to_thread(
+                        self.disk.put, key, url, response.content, digest, etag,
+                        last_modified,
+                    )
+            entry.etag, entry.last_modified = etag, last_modified
+            return entry.data
+
+        self.misses += 1
+        data = response.json()
+        if "no-store" in response.headers.get("Cache-Control", ""):
+            self._remove(key)
+            return data
+        expires_at = 0.0
+        if self.disk is not None:
+            expires_at = await asyncio.to_thread(
+                self.disk.put, key, url, response.content, digest, etag,
+                last_modified,
+            )
+        entry = CacheEntry(
+            data, digest, etag, last_modified, expires_at, response.request.url.path
+        )
+        self._store(key, entry)
+        return data
+
+    async def invalidate(self, path: str) -> None:
+        """写操作之后让路径相关的条目立即过期
+
+        相关的条目包括路径本身、它的上级路径（如`/apps`列表）和下级路径，
+        下次请求时按校验器重新验证，而不是在有效期内继续使用旧的响应。
+
+        Args:
+            path: 发生写操作的请求路径
+        """
+        for entry in self.entries.values():
+            if _related(entry.path, path):
+                entry.expires_at = 0.0
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.expire, path)
+
+    def _store(self, key: Hashable, entry: CacheEntry) -> None:
+        self._remove(key)
+        self.entries[key] = entry
+        self._by_data[id(entry.data)] = entry
+        while len(self.entries) > self.max_entries:
+            _, evicted = self.entries.popitem(last=False)
+            self._by_data.pop(id(evicted.data), None)
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self._by_data.pop(id(entry.data), None)
+
+    def validate(self, data: Any, model: Type[T]) -> T:
+        """校验响应体，`data`是缓存中的对象时复用之前的校验结果
+
+        Args:
+            data: 解码后的响应体
+            model: pydantic模型或`List[Model]`之类的类型
+
+        Returns:
+            校验后的对象，复用缓存时为之前的同一个对象，调用方不应修改它
+        """
+        entry = self._by_data.get(id(data))
+        if entry is None or entry.data is not data:
+            return _validate(data, model)
+        if model not in entry.models:
+            entry.models[model] = _validate(data, model)
+        return entry.models[model]
+
+    def clear(self) -> None:
+        """清空内存中的缓存，磁盘缓存使用`DiskCache.clear`清理"""
+        self.entries.clear()
+        self._by_data.clear()
+
+
+def _related(a: str, b: str) -> bool:
+    return a == b or a.startswith(b + "/") or b.startswith(a + "/")
+
+
+def _validate(data: Any, model: Type[T]) -> T:
+    if hasattr(model, "model_validate"):
+        return model.model_validate(data)
+    adapter = _adapters.get(model)
+    if adapter is None:
+        adapter = _adapters[model] = TypeAdapter(model)
+    return adapter.validate_python(data)
+
+
+def validate_cached(client: Any, data: Any, model: Type[T]) -> T:
+    """通过客户端的响应缓存校验响应体
+
+    客户端没有配置`ResponseCache`时直接校验。配置了缓存时，内容没有变化的响应返回共享的模型，
+    调用方不应修改它。
+
+    Args:
+        client: `HttpClient`
+        data: `client.get`返回的响应体
+        model: pydantic模型或`List[Model]`之类的类型
+
+    Returns:
+        校验后的对象
+    """
+    cache = getattr(client, "cache", None)
+    if isinstance(cache, ResponseCache):
+        return cache.validate(data, model)
+    return _validate(data, model)
+
+
+__all__ = ["CacheEntry", "ResponseCache", "validate_cached"]
@@ -0,0 +1,189 @@
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+import httpx
+
+from .exceptions import CassetteMissException
+
+# 录制时不写入文件的请求头，避免泄露密钥
+REDACTED_HEADERS = {"authorization", "cookie"}
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+def request_key(method: str, url: str, body: bytes) -> str:
+    """请求的匹配键，由方法、URL（含查询参数）和请求体决定"""
+    digest = hashlib.sha1(body).hexdigest() if body else ""
+    return f"{method.upper()} {url} {digest}"
+
+
+class _RecordingStream(httpx.AsyncByteStream):
+    def __init__(
+            self,
+            stream: httpx.AsyncByteStream,
+            started: float,
+            entry: dict,
+            transport: "RecordingTransport",
+    ) -> None:
+        self._stream = stream
+        self._started = started
+        self._last = None
+        self._entry = entry
+        self._transport = transport
+        self._saved = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            now = time.perf_counter()
+            delay = now - (self._last if self._last is not None else self._started)
+            self._last = now
+            self._entry["response"]["chunks"].append([round(delay, 6), _b64(chunk)])
+            yield chunk
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+        if not self._saved:
+            self._saved = True
+            self._transport._write(self._entry)
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """录制传输层
+
+    请求照常发往服务端，同时把请求、响应头和原始响应字节（包括SSE分块边界和到达间隔）
+    逐条追加到JSONL文件中，路径以`.gz`结尾时使用gzip压缩。`Authorization`等敏感请求头不会写入。
+
+    Args:
+        path: 录制文件路径
+        transport: 实际发送请求的传输层，默认为`httpx.AsyncHTTPTransport`
+    """
+
+    def __init__(self, path: str, transport: httpx.AsyncBaseTransport = None) -> None:
+        self.path = path
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        started = time.perf_counter()
+        response = await self.transport.handle_async_request(request)
+        entry = {
+            "request": {
+                "method": request.method,
+                "url": str(request.url),
+                "headers": [
+                    [k, v] for k, v in request.headers.items()
+                    if k.lower() not in REDACTED_HEADERS
+                ],
+                "body": _b64(body),
+            },
+            "response": {
+                "status": response.status_code,
+                "headers": [[k, v] for k, v in response.headers.multi_items()],
+                "delay": round(time.perf_counter() - started, 6),
+                "chunks": [],
+            },
+        }
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_RecordingStream(response.stream, time.perf_counter(), entry, self),
+            extensions=response.extensions,
+        )
+
+    def _write(self, entry: dict) -> None:
+        with _open(self.path, "a") as f:
+            f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    async def aclose(self) -> None:
+        # HttpClient每次请求都会创建并关闭AsyncClient，传输层需要跨请求复用，
+        # 这里不关闭内部传输
+        pass
+
+
+class _ReplayStream(httpx.AsyncByteStream):
+    def __init__(
+            self, chunks: List[Tuple[float, bytes]], speed: Optional[float]
+    ) -> None:
+        self._chunks = chunks
+        self._speed = speed
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        for delay, chunk in self._chunks:
+            if self._speed and delay > 0:
+                await asyncio.sleep(delay / self._speed)
+            yield chunk
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """回放传输层
+
+    不访问网络，按方法、URL和请求体匹配录制文件中的交互，原样返回响应头和原始响应字节，
+    分块边界与录制时完全一致。同一请求被录制多次时按录制顺序依次返回，用完后重复最后一次。
+
+    Args:
+        path: 录制文件路径
+        speed: 回放速度倍数，1为原速，2为两倍速，None或0为不等待（最快速度）
+
+    Raises:
+        CassetteMissException: 请求在录制文件中不存在时抛出
+    """
+
+    def __init__(self, path: str, speed: Optional[float] = 1.0) -> None:
+        if not os.path.exists(path):
+            raise ValueError(f"录制文件不存在: {path}")
+        self.path = path
+        self.speed = speed
+        self._interactions: Dict[str, Deque[dict]] = {}
+        self._last: Dict[str, dict] = {}
+        with _open(path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                req = entry["request"]
+                key = request_key(
+                    req["method"], req["url"], base64.b64decode(req["body"])
+                )
+                self._interactions.setdefault(key, deque()).append(entry)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        key = request_key(request.method, str(request.url), body)
+        queue = self._interactions.get(key)
+        if queue:
+            entry = self._last[key] = queue.popleft()
+        elif key in self._last:
+            entry = self._last[key]
+        else:
+            raise CassetteMissException(
+                f"录制文件中没有匹配的请求: {request.method} {request.url}"
+            )
+
+        resp = entry["response"]
+        if self.speed and resp.get("delay"):
+            await asyncio.sleep(resp["delay"] / self.speed)
+        chunks = [(delay, base64.b64decode(data)) for delay, data in resp["chunks"]]
+        return httpx.Response(
+            status_code=resp["status"],
+            headers=[(k, v) for k, v in resp["headers"]],
+            stream=_ReplayStream(chunks, self.speed),
+        )
+
+
+__all__ = ["RecordingTransport", "ReplayTransport", "request_key"]
@@ -0,0 +1,60 @@
+import argparse
+from typing import List, Optional
+
+from .diskcache import DEFAULT_PATH, DiskCache
+
+
+def _format_size(size: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+
+def cache_stats(cache: DiskCache) -> str:
+    """格式化磁盘缓存统计"""
+    stats = cache.stats()
+    lines = [
+        f"缓存文件: {stats.path}",
+        f"条目数: {stats.entries}  "
+        f"大小: {_format_size(stats.size)} / {_format_size(stats.max_bytes)}  "
+        f"命中: {stats.hits}",
+    ]
+    for r in stats.resources:
+        lines.append(
+            f"  {r.resource}  条目: {r.entries}  大小: {_format_size(r.size)}"
+            f"  命中: {r.hits}  过期: {r.expired}"
+        )
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="dify", description="Dify SDK命令行工具")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    cache = commands.add_parser("cache", help="管理磁盘响应缓存")
+    cache.add_argument("--path", default=DEFAULT_PATH, help="缓存文件路径")
+    actions = cache.add_subparsers(dest="action", required=True)
+    actions.add_parser("stats", help="查看缓存统计")
+    clear = actions.add_parser("clear", help="清理缓存")
+    clear.add_argument(
+        "--resource", help="只清理资源中包含该字符串的条目，如 /apps/{id}"
+    )
+    clear.add_argument("--expired", action="store_true", help="只清理已过期的条目")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.command == "cache":
+        cache = DiskCache(args.path)
+        if args.action == "stats":
+            print(cache_stats(cache))
+        else:
+            deleted = cache.clear(resource=args.resource, expired=args.expired)
+            print(f"已删除 {deleted} 个条目")
+    return 0
+
+
+__all__ = ["main", "cache_stats"]
@@ -0,0 +1,104 @@
+import gzip
+import json
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+
+class Compression:
+    """请求压缩配置和压缩统计
+
+    响应的解压由httpx完成，流式响应在读取时逐块解压；这里只统计传输的字节数。
+    httpx默认发送的`Accept-Encoding`已包含当前环境可以解码的编码，安装`brotli`和`zstandard`
+    （`pip install dify_sdk[compression]`）后会同时声明`br`和`zstd`。
+    请求体超过`request_threshold`字节时使用gzip压缩并设置`Content-Encoding: gzip`，
+    需要服务端（或前置的网关）支持解压请求体，因此默认不压缩请求。
+
+    同一个`Compression`可以在多个客户端之间共享，`AdminClient.create_api_client`创建的客户端会自动共享。
+
+    Args:
+        request_threshold: 请求体压缩阈值（字节），为None时不压缩请求
+        level: gzip压缩级别，取值范围1-9
+
+    Attributes:
+        responses: 统计的响应数
+        response_wire_bytes: 响应在网络上传输的字节数
+        response_decoded_bytes: 响应解压后的字节数
+        compressed_requests: 压缩过的请求数
+        request_raw_bytes: 压缩请求的原始字节数
+        request_wire_bytes: 压缩请求实际发送的字节数
+        encodings: 按内容编码统计的响应数
+    """
+
+    def __init__(self, request_threshold: Optional[int] = None, level: int = 6) -> None:
+        if request_threshold is not None and request_threshold < 0:
+            raise ValueError("压缩阈值不能小于0")
+        if not 1 <= level <= 9:
+            raise ValueError("压缩级别必须在1到9之间")
+        self.request_threshold = request_threshold
+        self.level = level
+        self.responses = 0
+        self.response_wire_bytes = 0
+        self.response_decoded_bytes = 0
+        self.compressed_requests = 0
+        self.request_raw_bytes = 0
+        self.request_wire_bytes = 0
+        self.encodings: Dict[str, int] = {}
+
+    @property
+    def response_bytes_saved(self) -> int:
+        """响应压缩节省的字节数"""
+        return self.response_decoded_bytes - self.response_wire_bytes
+
+    @property
+    def request_bytes_saved(self) -> int:
+        """请求压缩节省的字节数"""
+        return self.request_raw_bytes - self.request_wire_bytes
+
+    @property
+    def bytes_saved(self) -> int:
+        """总共节省的字节数"""
+        return self.response_bytes_saved + self.request_bytes_saved
+
+    def encode_json(
+            self, payload: Any, headers: Dict[str, str]
+    ) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """编码JSON请求体，超过阈值时压缩
+
+        Args:
+            payload: 请求体
+            headers: 请求头
+
+        Returns:
+            Tuple: 传给httpx的请求体参数和新的请求头
+        """
+        if payload is None or self.request_threshold is None:
+            return {"json": payload}, headers
+        raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        raw = raw.encode("utf-8")
+        if len(raw) < self.request_threshold:
+            return {"json": payload}, headers
+        # mtime固定为0，相同的请求体压缩结果相同，便于录制回放时匹配
+        body = gzip.compress(raw, compresslevel=self.level, mtime=0)
+        self.compressed_requests += 1
+        self.request_raw_bytes += len(raw)
+        self.request_wire_bytes += len(body)
+        return {"content": body}, {
+            **headers, "Content-Type": "application/json", "Content-Encoding": "gzip"
+        }
+
+    def record(self, response: httpx.Response, decoded_bytes: int) -> None:
+        """记录一个已读取完的响应
+
+        Args:
+            response: 响应
+            decoded_bytes: 解压后的字节数
+        """
+        encoding = response.headers.get("Content-Encoding", "identity").lower()
+        self.responses += 1
+        self.response_wire_bytes += response.num_bytes_downloaded
+        self.response_decoded_bytes += decoded_bytes
+        self.encodings[encoding] = self.encodings.get(encoding, 0) + 1
+
+
+__all__ = ["Compression"]
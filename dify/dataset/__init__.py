@@ -1,12 +1,23 @@
-from typing import List, Optional
+from typing import AsyncGenerator, List, Optional
 
 from dify.http import AdminClient
-from .schemas import DataSetCreatePayloads, DataSetCreateResponse, DataSetList
+from dify.polling import Poller, PollingPolicy
+from .schemas import (
+    DataSetCreatePayloads,
+    DataSetCreateResponse,
+    DataSetInList,
+    DataSetList,
+    DocumentIndexingStatus,
+)
 
 
 class DifyDataset:
-    def __init__(self, admin_client: AdminClient) -> None:
+    def __init__(
+            self, admin_client: AdminClient, polling_policy: PollingPolicy = None
+    ) -> None:
         self.admin_client = admin_client
+        # 所有等待同一知识库索引完成的调用共享一个轮询循环
+        self._indexing_poller = Poller(self.get_indexing_status, polling_policy)
 
     async def create(self, payload: DataSetCreatePayloads) -> DataSetCreateResponse:
         """创建新的知识库
@@ -55,6 +66,46 @@ class DifyDataset:
             ValueError: 当参数无效时抛出
             httpx.HTTPStatusError: 当API请求失败时抛出
         """
+        params = self._list_params(page, limit, include_all, tag_ids)
+
+        # 发送GET请求查询知识库列表
+        response_data = await self.admin_client.get("/datasets", params=params)
+        
+        # 返回知识库列表对象
+        return DataSetList(**response_data)
+
+    async def iter_list(
+        self,
+        page: int = 1,
+        limit: int = 30,
+        include_all: bool = False,
+        tag_ids: Optional[List[str]] = None
+    ) -> AsyncGenerator[DataSetInList, None]:
+        """流式查询一页知识库，逐个解析和校验
+
+        与`find_list`参数相同，但不会同时在内存中保留整页的响应体和模型。
+
+        Args:
+            page: 页码，默认为1
+            limit: 每页数量，默认为30
+            include_all: 是否包含所有知识库，默认为False
+            tag_ids: 标签ID列表，用于筛选特定标签的知识库，默认为None
+
+        Returns:
+            AsyncGenerator[DataSetInList, None]: 逐个返回的知识库
+
+        Raises:
+            ValueError: 当参数无效时抛出
+            DifyException: 当API请求失败时抛出
+        """
+        params = self._list_params(page, limit, include_all, tag_ids)
+        async for item in self.admin_client.iter_items("/datasets", params=params):
+            yield DataSetInList.model_validate(item)
+
+    @staticmethod
+    def _list_params(
+        page: int, limit: int, include_all: bool, tag_ids: Optional[List[str]]
+    ) -> dict:
         if page < 1:
             raise ValueError("页码不能小于1")
         
@@ -71,12 +122,7 @@ class DifyDataset:
         # 如果提供了标签ID列表，则添加到查询参数中
         if tag_ids:
             params["tag_ids"] = ",".join(tag_ids)
-        
-        # 发送GET请求查询知识库列表
-        response_data = await self.admin_client.get("/datasets", params=params)
-        
-        # 返回知识库列表对象
-        return DataSetList(**response_data)
+        return params
 
     async def delete(self, dataset_id: str) -> bool:
         """删除知识库
@@ -100,5 +146,78 @@ class DifyDataset:
         # 根据curl命令返回204状态码，表示删除成功
         return True
 
+    async def get_indexing_status(
+            self, dataset_id: str
+    ) -> List[DocumentIndexingStatus]:
+        """获取知识库下所有文档的索引状态
+
+        Args:
+            dataset_id: 知识库ID
+
+        Returns:
+            List[DocumentIndexingStatus]: 文档索引状态列表
+
+        Raises:
+            ValueError: 当知识库ID为空时抛出
+            httpx.HTTPStatusError: 当API请求失败时抛出
+        """
+        if not dataset_id:
+            raise ValueError("知识库ID不能为空")
+
+        response_data = await self.admin_client.get(
+            f"/datasets/{dataset_id}/indexing-status"
+        )
+        return [
+            DocumentIndexingStatus(**item) for item in response_data.get("data", [])
+        ]
+
+    async def wait_until_indexed(
+        self,
+        dataset_id: str,
+        document_ids: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+    ) -> List[DocumentIndexingStatus]:
+        """等待知识库中的文档索引结束
+
+        同一个知识库上的并发等待会合并为每轮一次状态请求，轮询间隔按`PollingPolicy`自适应退避。
+
+        Args:
+            dataset_id: 知识库ID
+            document_ids: 需要等待的文档ID列表，为None时等待知识库下的全部文档
+            timeout: 超时时间（秒），默认使用轮询策略中的全局截止时间
+
+        Returns:
+            List[DocumentIndexingStatus]: 索引结束时对应文档的状态列表，
+                状态可能为completed、error或paused
+
+        Raises:
+            ValueError: 当知识库ID为空时抛出
+            PollingTimeoutException: 当超时仍未结束时抛出。状态请求失败时会退避重试，
+                最近一次请求的异常作为`__cause__`
+        """
+        if not dataset_id:
+            raise ValueError("知识库ID不能为空")
+
+        wanted = set(document_ids) if document_ids else None
+
+        def select(
+                statuses: List[DocumentIndexingStatus]
+        ) -> List[DocumentIndexingStatus]:
+            if wanted is None:
+                return statuses
+            return [status for status in statuses if status.id in wanted]
+
+        def finished(statuses: List[DocumentIndexingStatus]) -> bool:
+            selected = select(statuses)
+            if wanted is not None and len(selected) < len(wanted):
+                # 文档可能尚未出现在状态列表中
+                return False
+            return all(status.is_finished for status in selected)
+
+        statuses = await self._indexing_poller.wait(
+            dataset_id, finished, timeout=timeout
+        )
+        return select(statuses)
+
 __all__ = ["DifyDataset"]
 
@@ -303,6 +303,46 @@ class Document(BaseModel):
     }
 
 
+class DocumentIndexingStatus(BaseModel):
+    """文档索引状态Schema
+
+    Attributes:
+        id: 文档ID
+        indexing_status: 索引状态，可选值：waiting, parsing, cleaning, splitting,
+            indexing, paused, error, completed
+        processing_started_at: 开始处理时间
+        completed_at: 完成时间
+        paused_at: 暂停时间
+        stopped_at: 停止时间
+        error: 错误信息
+        completed_segments: 已完成分段数
+        total_segments: 总分段数
+    """
+
+    id: str = Field(description="文档ID")
+    indexing_status: str = Field(default="waiting", description="索引状态")
+    processing_started_at: Optional[float] = Field(
+        default=None, description="开始处理时间"
+    )
+    completed_at: Optional[float] = Field(default=None, description="完成时间")
+    paused_at: Optional[float] = Field(default=None, description="暂停时间")
+    stopped_at: Optional[float] = Field(default=None, description="停止时间")
+    error: Optional[str] = Field(default=None, description="错误信息")
+    completed_segments: Optional[int] = Field(default=None, description="已完成分段数")
+    total_segments: Optional[int] = Field(default=None, description="总分段数")
+
+    @property
+    def is_finished(self) -> bool:
+        """索引是否已经结束（成功、失败或被暂停）"""
+        return self.indexing_status in ("completed", "error", "paused")
+
+    # Pydantic V2 配置
+    model_config = {
+        "populate_by_name": True,
+        "protected_namespaces": (),
+    }
+
+
 class DataSetCreateResponse(BaseModel):
     """数据集创建响应Schema
 
@@ -375,6 +415,7 @@ __all__ = [
     "DataSetCreateResponse",
     "DataSetInList",
     "Document",
+    "DocumentIndexingStatus",
     "DataSetInCreate",
     "DataSetList",
 ]
@@ -0,0 +1,309 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from urllib.parse import urlsplit
+from contextlib import closing
+from typing import Callable, Dict, Hashable, List, Optional
+
+from pydantic import BaseModel, Field
+
+from .breaker import url_template
+
+# 默认缓存文件
+DEFAULT_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "dify_sdk", "responses.sqlite"
+)
+
+# 默认的资源有效期（秒），键为路径模板的结尾，按最长匹配
+DEFAULT_TTLS: Dict[str, float] = {
+    "/workspaces/current/models/model-types/llm": 3600,
+    "/parameters": 600,
+    "/apps/{id}/workflows/publish": 300,
+    "/apps": 60,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    resource TEXT NOT NULL,
+    path TEXT NOT NULL DEFAULT '',
+    body BLOB NOT NULL,
+    digest TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at);
+"""
+
+
+class DiskEntry(BaseModel):
+    """磁盘缓存中的响应"""
+
+    content: bytes = Field(description="响应体原文")
+    path: str = Field(default="", description="请求路径")
+    digest: str = Field(description="响应体的SHA-1摘要")
+    etag: Optional[str] = Field(default=None, description="ETag响应头")
+    last_modified: Optional[str] = Field(
+        default=None, description="Last-Modified响应头"
+    )
+    expires_at: float = Field(description="过期时间戳，之前可以不经请求直接使用")
+
+
+class ResourceStats(BaseModel):
+    """某类资源的缓存统计"""
+
+    resource: str = Field(description="资源（主机 + 路径模板）")
+    entries: int = Field(description="条目数")
+    size: int = Field(description="压缩后的字节数")
+    hits: int = Field(description="命中次数")
+    expired: int = Field(description="已过期的条目数")
+
+
+class DiskCacheStats(BaseModel):
+    """磁盘缓存统计"""
+
+    path: str = Field(description="缓存文件路径")
+    entries: int = Field(description="条目数")
+    size: int = Field(description="压缩后的字节数")
+    max_bytes: int = Field(description="容量上限")
+    hits: int = Field(description="命中次数")
+    resources: List[ResourceStats] = Field(
+        default_factory=list, description="按资源的统计"
+    )
+
+
+class DiskCache:
+    """基于SQLite的持久化响应缓存
+
+    作为`ResponseCache`的下层缓存，在进程重启之后继续复用`LLMList`、`AppParameters`等
+    很少变化的响应。响应体以zlib压缩后保存，总大小超过`max_bytes`时淘汰最久未访问的条目。
+
+    每种资源有独立的有效期：有效期内直接使用缓存，不发送请求；过期后仍保留校验器，
+    用于条件请求。缓存键是请求键的摘要，不会把API密钥写入磁盘。
+
+    使用WAL模式，每次操作使用独立连接，写入在`BEGIN IMMEDIATE`事务中进行，
+    可以在多个进程之间安全共享同一个文件。方法都是阻塞的，`ResponseCache`在线程池中调用它们，
+    不会阻塞事件循环。
+
+    Args:
+        path: 缓存文件路径，默认为`~/.cache/dify_sdk/responses.sqlite`
+        max_bytes: 容量上限（字节），默认为256MB
+        ttl: 按路径模板结尾配置的有效期（秒），默认为`DEFAULT_TTLS`
+        default_ttl: 没有匹配的资源的有效期（秒），默认为0，即每次都重新验证
+        clock: 时间函数，默认为`time.time`
+    """
+
+    def __init__(
+            self,
+            path: str = DEFAULT_PATH,
+            max_bytes: int = 256 * 1024 * 1024,
+            ttl: Dict[str, float] = None,
+            default_ttl: float = 0.0,
+            clock: Callable[[], float] = time.time,
+    ) -> None:
+        if max_bytes <= 0:
+            raise ValueError("缓存容量必须大于0")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = DEFAULT_TTLS if ttl is None else ttl
+        self.default_ttl = default_ttl
+        self.clock = clock
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(entries)")}
+            if "path" not in columns:
+                # 兼容旧版本创建的缓存文件
+                conn.execute(
+                    "ALTER TABLE entries ADD COLUMN path TEXT NOT NULL DEFAULT ''"
+                )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    @staticmethod
+    def disk_key(key: Hashable) -> str:
+        """把请求键转换为磁盘缓存的键"""
+        return hashlib.sha256(json.dumps(key, default=str).encode("utf-8")).hexdigest()
+
+    def ttl_for(self, resource: str) -> float:
+        """资源的有效期（秒）"""
+        matches = [suffix for suffix in self.ttl if resource.endswith(suffix)]
+        if not matches:
+            return self.default_ttl
+        return self.ttl[max(matches, key=len)]
+
+    def get(self, key: Hashable) -> Optional[DiskEntry]:
+        """读取缓存条目，过期的条目也会返回"""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT body, path, digest, etag, last_modified, expires_at "
+                "FROM entries WHERE key = ?",
+                (self.disk_key(key),),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE entries SET accessed_at = ?, hits = hits + 1 WHERE key = ?",
+                (self.clock(), self.disk_key(key)),
+            )
+        body, path, digest, etag, last_modified, expires_at = row
+        return DiskEntry(
+            content=zlib.decompress(body),
+            path=path,
+            digest=digest,
+            etag=etag,
+            last_modified=last_modified,
+            expires_at=expires_at,
+        )
+
+    def put(
+            self, key: Hashable, url: str, content: bytes, digest: str,
+            etag: str = None, last_modified: str = None,
+    ) -> float:
+        """写入缓存条目并按容量淘汰
+
+        Args:
+            key: 请求键
+            url: 请求URL（不含查询参数），用于确定资源类型
+            content: 响应体原文
+            digest: 响应体的SHA-1摘要
+            etag: ETag响应头
+            last_modified: Last-Modified响应头
+
+        Returns:
+            float: 过期时间戳
+        """
+        resource = url_template(url)
+        now = self.clock()
+        expires_at = now + self.ttl_for(resource)
+        body = zlib.compress(content)
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries "
+                    "(key, resource, path, body, digest, etag, last_modified, size, "
+                    "expires_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (self.disk_key(key), resource, urlsplit(url).path, body, digest,
+                     etag, last_modified, len(body), expires_at, now),
+                )
+                self._evict(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return expires_at
+
+    def touch(self, key: Hashable, url: str) -> float:
+        """重新验证成功后延长有效期
+
+        Returns:
+            float: 新的过期时间戳
+        """
+        now = self.clock()
+        expires_at = now + self.ttl_for(url_template(url))
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE entries SET expires_at = ?, accessed_at = ? WHERE key = ?",
+                (expires_at, now, self.disk_key(key)),
+            )
+        return expires_at
+
+    def expire(self, path: str) -> int:
+        """让路径相关的条目立即过期，下次请求时重新验证
+
+        相关的条目包括路径本身、它的上级路径（如列表）和下级路径。条目的校验器仍然保留，
+        内容没有变化时服务端可以返回304。
+
+        Args:
+            path: 发生写操作的请求路径
+
+        Returns:
+            int: 过期的条目数
+        """
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "UPDATE entries SET expires_at = 0 "
+                "WHERE expires_at > 0 AND path != '' AND ("
+                "path = ? OR substr(path, 1, length(?) + 1) = ? || '/' "
+                "OR substr(?, 1, length(path) + 1) = path || '/')",
+                (path, path, path, path),
+            ).rowcount
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        while total > self.max_bytes:
+            row = conn.execute(
+                "SELECT key, size FROM entries ORDER BY accessed_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (row[0],))
+            total -= row[1]
+
+    def stats(self) -> DiskCacheStats:
+        """统计缓存的使用情况"""
+        now = self.clock()
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT resource, COUNT(*), SUM(size), SUM(hits), SUM(expires_at <= ?) "
+                "FROM entries GROUP BY resource ORDER BY SUM(size) DESC",
+                (now,),
+            ).fetchall()
+        resources = [
+            ResourceStats(resource=r, entries=n, size=size, hits=hits, expired=expired)
+            for r, n, size, hits, expired in rows
+        ]
+        return DiskCacheStats(
+            path=self.path,
+            entries=sum(r.entries for r in resources),
+            size=sum(r.size for r in resources),
+            max_bytes=self.max_bytes,
+            hits=sum(r.hits for r in resources),
+            resources=resources,
+        )
+
+    def clear(self, resource: str = None, expired: bool = False) -> int:
+        """删除缓存条目
+
+        Args:
+            resource: 只删除资源中包含该字符串的条目
+            expired: 只删除已过期的条目
+
+        Returns:
+            int: 删除的条目数
+        """
+        conditions, args = [], []
+        if resource:
+            conditions.append("instr(resource, ?) > 0")
+            args.append(resource)
+        if expired:
+            conditions.append("expires_at <= ?")
+            args.append(self.clock())
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        with closing(self._connect()) as conn:
+            deleted = conn.execute("DELETE FROM entries" + where, args).rowcount
+            conn.execute("VACUUM")
+        return deleted
+
+
+__all__ = [
+    "DEFAULT_PATH",
+    "DEFAULT_TTLS",
+    "DiskEntry",
+    "ResourceStats",
+    "DiskCacheStats",
+    "DiskCache",
+]
@@ -7,3 +7,44 @@ class DifyException(Exception):
 
     def __str__(self):
         return f"{self.code}: {self.message}"
+
+
+class PollingTimeoutException(DifyException):
+    """轮询超时异常"""
+
+    def __init__(self, message: str, code: str = "polling_timeout"):
+        super().__init__(message, code)
+
+
+class SlowConsumerException(DifyException):
+    """订阅者消费过慢被断开异常"""
+
+    def __init__(self, message: str, code: str = "slow_consumer"):
+        super().__init__(message, code)
+
+
+class CassetteMissException(DifyException):
+    """回放时请求在录制文件中不存在异常"""
+
+    def __init__(self, message: str, code: str = "cassette_miss"):
+        super().__init__(message, code)
+
+
+class CircuitOpenException(DifyException):
+    """熔断器打开时快速失败异常
+
+    Attributes:
+        key: 熔断器的键（主机 + URL模板）
+        retry_after: 距离进入半开状态的剩余时间（秒）
+    """
+
+    def __init__(
+            self,
+            message: str,
+            code: str = "circuit_open",
+            key: str = None,
+            retry_after: float = 0.0,
+    ):
+        super().__init__(message, code)
+        self.key = key
+        self.retry_after = retry_after
@@ -0,0 +1,168 @@
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional
+
+import httpx
+from pydantic import BaseModel, Field
+
+from .breaker import url_template
+from .hooks import HEDGE, Hooks
+
+
+class HedgingPolicy(BaseModel):
+    """对冲请求策略
+
+    Attributes:
+        delay: 固定的对冲延迟（秒），为None时使用观测到的分位数延迟
+        percentile: 使用观测延迟时的分位，默认为95
+        min_samples: 计算分位数所需的最少样本数，不足时使用`fallback_delay`
+        fallback_delay: 样本不足时的对冲延迟（秒）
+        window: 每个URL模板保留的延迟样本数
+        budget: 对冲请求占总请求的比例上限
+        max_burst: 对冲预算最多累积多少个请求
+    """
+
+    delay: Optional[float] = Field(
+        default=None, gt=0, description="固定的对冲延迟（秒）"
+    )
+    percentile: float = Field(default=95, gt=0, lt=100, description="观测延迟的分位")
+    min_samples: int = Field(default=20, ge=1, description="计算分位数所需的最少样本数")
+    fallback_delay: float = Field(
+        default=1.0, gt=0, description="样本不足时的对冲延迟（秒）"
+    )
+    window: int = Field(default=200, ge=1, description="每个URL模板保留的延迟样本数")
+    budget: float = Field(
+        default=0.1, ge=0, le=1, description="对冲请求占总请求的比例上限"
+    )
+    max_burst: float = Field(default=10, ge=1, description="对冲预算最多累积的请求数")
+
+
+class Hedger:
+    """对冲请求执行器
+
+    请求在对冲延迟内没有返回时再发出一个相同的请求（配置了服务池时通常会落到另一个地址），
+    先成功返回的响应胜出，另一个请求被取消。每个请求为预算累积`budget`个名额，
+    每次对冲消耗一个，从而把额外负载限制在总流量的固定比例内。
+
+    延迟样本只来自主请求：主请求胜出时记录它的实际延迟；对冲请求胜出时主请求被取消，
+    记录主请求到被取消为止的耗时（不小于对冲延迟），作为它实际延迟的下界。
+    对冲请求自身的延迟不计入样本，否则分位数和对冲延迟会被拉低，引发更多对冲。
+
+    只应用于幂等请求，`HttpClient`只对GET请求启用。
+
+    Args:
+        policy: 对冲策略
+        hooks: 埋点钩子，发生对冲时触发`hedge`事件
+        clock: 时间函数，默认为`time.perf_counter`
+    """
+
+    def __init__(
+            self,
+            policy: HedgingPolicy = None,
+            hooks: Hooks = None,
+            clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        self.policy = policy or HedgingPolicy()
+        self.hooks = hooks
+        self.clock = clock
+        self.samples: Dict[str, Deque[float]] = {}
+        self.tokens = 0.0
+        self.requests = 0
+        self.hedges = 0
+
+    def delay_for(self, key: str) -> float:
+        """某个URL模板当前的对冲延迟"""
+        if self.policy.delay is not None:
+            return self.policy.delay
+        samples = self.samples.get(key)
+        if not samples or len(samples) < self.policy.min_samples:
+            return self.policy.fallback_delay
+        data = sorted(samples)
+        index = min(len(data) - 1, int(len(data) * self.policy.percentile / 100))
+        return data[index]
+
+    def record(self, key: str, latency: float) -> None:
+        """记录一次响应延迟"""
+        samples = self.samples.get(key)
+        if samples is None:
+            samples = self.samples[key] = deque(maxlen=self.policy.window)
+        samples.append(latency)
+
+    def _take_budget(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    async def run(
+            self, url: httpx.URL | str, send: Callable[[], Awaitable[httpx.Response]]
+    ) -> httpx.Response:
+        """执行可能被对冲的请求
+
+        Args:
+            url: 请求URL，用于按模板统计延迟
+            send: 发送一次请求的函数，会被调用一到两次
+
+        Returns:
+            httpx.Response: 先成功返回的响应
+        """
+        key = url_template(url)
+        self.requests += 1
+        self.tokens = min(self.tokens + self.policy.budget, self.policy.max_burst)
+        started = self.clock()
+        delay = self.delay_for(key)
+
+        primary = asyncio.ensure_future(send())
+        primary_latency: Optional[float] = None
+
+        def on_primary_done(task: asyncio.Future) -> None:
+            nonlocal primary_latency
+            if not task.cancelled() and task.exception() is None:
+                primary_latency = self.clock() - started
+
+        primary.add_done_callback(on_primary_done)
+        pending = {primary}
+        hedge = None
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done and self._take_budget():
+                self.hedges += 1
+                hedge = asyncio.ensure_future(send())
+                pending.add(hedge)
+
+            winner = None
+            error: Optional[BaseException] = None
+            while pending and winner is None:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        break
+                    error = error or task.exception()
+            if winner is None:
+                raise error
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        if winner is primary:
+            self.record(key, primary_latency)
+        elif primary.cancelled():
+            # 主请求仍未返回，它的实际延迟至少是到目前为止的耗时
+            self.record(key, max(self.clock() - started, delay))
+        if hedge is None:
+            return winner.result()
+        if self.hooks is not None:
+            self.hooks.emit(
+                HEDGE, url=str(url), delay=delay,
+                winner="primary" if winner is primary else "hedge",
+            )
+        return winner.result()
+
+
+__all__ = ["HedgingPolicy", "Hedger"]
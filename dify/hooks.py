@@ -0,0 +1,67 @@
+from typing import Any, Callable, Dict, List, Optional
+
+# 请求完成（包括失败），数据: method, url, status_code, elapsed, error
+REQUEST = "request"
+# 熔断器状态变化，数据: key, old_state, new_state, failure_rate, slow_rate
+BREAKER_STATE = "breaker_state"
+# 熔断器打开期间请求被快速拒绝，数据: key, retry_after
+BREAKER_REJECTED = "breaker_rejected"
+# 发出了对冲请求，数据: url, delay, winner（primary或hedge）
+HEDGE = "hedge"
+
+Listener = Callable[[str, Dict[str, Any]], None]
+
+
+class Hooks:
+    """HTTP客户端埋点钩子
+
+    监听器以`(事件名, 数据)`调用，注册为`"*"`时接收所有事件。监听器抛出的异常会被忽略，
+    不影响请求本身。同一个`Hooks`可以在多个客户端之间共享。
+
+    Example:
+        hooks = Hooks()
+
+        @hooks.on(BREAKER_STATE)
+        def log_state(event, data):
+            print(data["key"], data["old_state"], "->", data["new_state"])
+    """
+
+    def __init__(self) -> None:
+        self._listeners: Dict[str, List[Listener]] = {}
+
+    def on(self, event: str, listener: Optional[Listener] = None):
+        """注册监听器，也可以作为装饰器使用
+
+        Args:
+            event: 事件名，`"*"`表示所有事件
+            listener: 监听器
+
+        Returns:
+            监听器本身，或不传`listener`时返回装饰器
+        """
+        if listener is None:
+            def decorator(fn: Listener) -> Listener:
+                self.on(event, fn)
+                return fn
+
+            return decorator
+        self._listeners.setdefault(event, []).append(listener)
+        return listener
+
+    def off(self, event: str, listener: Listener) -> None:
+        """移除监听器"""
+        listeners = self._listeners.get(event)
+        if listeners and listener in listeners:
+            listeners.remove(listener)
+
+    def emit(self, event: str, **data: Any) -> None:
+        """触发事件"""
+        for listener in self._listeners.get(event, []) + self._listeners.get("*", []):
+            try:
+                listener(event, data)
+            except Exception:
+                # 埋点失败不能影响请求
+                pass
+
+
+__all__ = ["Hooks", "REQUEST", "BREAKER_STATE", "BREAKER_REJECTED", "HEDGE"]
@@ -1,15 +1,55 @@
 import json
-from typing import Any, AsyncGenerator, Dict, BinaryIO
+import time
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, Dict, BinaryIO, List, Optional
 
 import httpx
 
+from .breaker import CircuitBreakerRegistry
+from .cache import ResponseCache
+from .compression import Compression
 from .exceptions import DifyException
+from .hedge import Hedger
+from .hooks import REQUEST, Hooks
+from .jsonstream import iter_array_items
+from .pool import IDEMPOTENT_METHODS, HostPool, _ReleasingStream
+from .singleflight import SingleFlight
 
 
 class HttpClient:
-    def __init__(self, base_url: str, key: str):
+    def __init__(
+            self,
+            base_url: str,
+            key: str,
+            transport: httpx.AsyncBaseTransport = None,
+            pool: HostPool = None,
+            path: str = "",
+            hooks: Hooks = None,
+            breakers: CircuitBreakerRegistry = None,
+            hedger: Hedger = None,
+            single_flight: SingleFlight = None,
+            cache: ResponseCache = None,
+            compression: Compression = None,
+    ):
         self.base_url = base_url
         self.key = key
+        # 自定义传输层，如`dify.cassette`中的录制/回放传输，为None时使用httpx默认传输
+        self.transport = transport
+        # 多地址服务池，设置后请求地址为`池中选中的地址 + path + url`，忽略base_url
+        self.pool = pool
+        self.path = path
+        # 埋点钩子，每个请求结束时触发`request`事件
+        self.hooks = hooks
+        # 熔断器注册表，为None时不熔断
+        self.breakers = breakers
+        # 对冲请求执行器，为None时不对冲，只用于GET请求
+        self.hedger = hedger
+        # 合并相同的并发GET请求，为None时不合并
+        self.single_flight = single_flight
+        # GET响应的重新验证缓存，为None时不缓存
+        self.cache = cache
+        # 请求压缩配置和压缩统计，为None时不压缩请求也不统计
+        self.compression = compression
         self.headers = {
             "Authorization": f"Bearer {self.key}",
             "Content-Type": "application/json",
@@ -21,32 +61,174 @@ class HttpClient:
             merged_headers.update(headers)
         return merged_headers
 
+    def _client(self, **kwargs) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=self.transport, **kwargs)
+
+    async def _send(
+            self,
+            client: httpx.AsyncClient,
+            method: str,
+            url: str,
+            stream: bool = False,
+            **kwargs,
+    ) -> httpx.Response:
+        """发送请求，配置了服务池时按池的策略选择地址并在失败时切换"""
+        if self.pool is None:
+            request = client.build_request(method, self.base_url + url, **kwargs)
+            return await self._dispatch(client, request, stream)
+
+        async def attempt(host: str) -> httpx.Response:
+            request = client.build_request(method, host + self.path + url, **kwargs)
+            return await self._dispatch(client, request, stream)
+
+        return await self.pool.request(attempt, idempotent=method in IDEMPOTENT_METHODS)
+
+    async def _dispatch(
+            self, client: httpx.AsyncClient, request: httpx.Request, stream: bool
+    ) -> httpx.Response:
+        """发送单个请求，经过熔断器并触发埋点事件"""
+        breaker = self.breakers.get(request.url) if self.breakers is not None else None
+        if breaker is not None:
+            breaker.before()
+        started = time.perf_counter()
+        try:
+            response = await client.send(request, stream=stream)
+        except httpx.TransportError as e:
+            elapsed = time.perf_counter() - started
+            if breaker is not None:
+                breaker.after(True, elapsed)
+            if self.hooks is not None:
+                self.hooks.emit(
+                    REQUEST, method=request.method, url=str(request.url),
+                    status_code=None, elapsed=elapsed, error=e,
+                )
+            raise
+        except BaseException:
+            if breaker is not None:
+                breaker.cancel()
+            raise
+        elapsed = time.perf_counter() - started
+        if self.compression is not None and not stream:
+            self.compression.record(response, len(response.content))
+        if breaker is not None:
+            if stream and response.status_code < 500 and not response.is_closed:
+                self._watch_stream(breaker, response, elapsed)
+            else:
+                breaker.after(response.status_code >= 500, elapsed)
+        if self.hooks is not None:
+            self.hooks.emit(
+                REQUEST, method=request.method, url=str(request.url),
+                status_code=response.status_code, elapsed=elapsed, error=None,
+            )
+        return response
+
+    @staticmethod
+    def _watch_stream(breaker, response: httpx.Response, elapsed: float) -> None:
+        """流式响应在关闭时才向熔断器记录结果
+
+        SSE之类的长连接可能在收到响应头之后才超时或断开，这些错误同样计为失败。
+        耗时按收到响应头为止计算，不把生成内容的时间算作慢请求。
+        """
+
+        def finish(error: Optional[BaseException]) -> None:
+            if error is not None and not isinstance(error, Exception):
+                # 被取消时不计入结果
+                breaker.cancel()
+            else:
+                breaker.after(error is not None, elapsed)
+
+        response.stream = _ReleasingStream(response.stream, finish)
+
+    def _shared(self) -> dict:
+        """派生客户端时需要共享的组件"""
+        return {
+            "transport": self.transport,
+            "hooks": self.hooks,
+            "breakers": self.breakers,
+            "hedger": self.hedger,
+            "single_flight": self.single_flight,
+            "cache": self.cache,
+            "compression": self.compression,
+        }
+
     async def get(
             self, url: str, params: dict = None, headers: dict = None
     ) -> dict[str, Any]:
-        async with httpx.AsyncClient() as client:
-            merged_headers = await self.__merge_headers__(headers)
+        merged_headers = await self.__merge_headers__(headers)
+        if self.single_flight is None and self.cache is None:
+            return await self._get(url, params, merged_headers)
 
-            response = await client.get(
-                self.base_url + url, params=params, headers=merged_headers
-            )
+        # 按URL、查询参数和请求头（包含认证信息）区分请求，不同密钥的请求不会共享结果
+        key = (
+            self.base_url + url,
+            json.dumps(params, sort_keys=True, default=str),
+            tuple(sorted(merged_headers.items())),
+        )
+        if self.single_flight is None:
+            return await self._get(url, params, merged_headers, key)
+        return await self.single_flight.do(
+            key, lambda: self._get(url, params, merged_headers, key)
+        )
+
+    async def _get(
+            self, url: str, params: dict, headers: dict, key: tuple = None,
+            conditional: bool = True
+    ) -> dict[str, Any]:
+        request_headers = headers
+        if self.cache is not None and conditional:
+            entry = await self.cache.fresh(key)
+            if entry is not None:
+                return entry.data
+            request_headers = {**headers, **self.cache.conditional_headers(key)}
+        async with self._client() as client:
+            if self.hedger is None:
+                response = await self._send(
+                    client, "GET", url, params=params, headers=request_headers
+                )
+            else:
+                response = await self.hedger.run(
+                    self.base_url + url,
+                    lambda: self._send(
+                        client, "GET", url, params=params, headers=request_headers
+                    ),
+                )
             if response.is_error:
                 raise DifyException(
                     f"请求失败，状态码: {response.status_code}, 错误信息: {response.text}"
                 )
-            return response.json()
+            if self.cache is None:
+                return response.json()
+            try:
+                return await self.cache.resolve(key, response)
+            except KeyError:
+                if not conditional:
+                    raise DifyException("请求失败，服务端对无条件请求返回了304")
+        # 304时缓存条目已被淘汰，重新请求完整的响应
+        return await self._get(url, params, headers, key, conditional=False)
+
+    async def _invalidate(self, response: httpx.Response) -> None:
+        """写操作之后让缓存中相关的GET响应过期"""
+        if self.cache is not None:
+            await self.cache.invalidate(response.request.url.path)
+
+    def _encode_json(self, payload: Any, headers: dict) -> tuple[dict, dict]:
+        if self.compression is None:
+            return {"json": payload}, headers
+        return self.compression.encode_json(payload, headers)
 
     async def post(
             self, url: str, json: dict = None, params: dict = None, headers: dict = None,
             timeout: int = 10
     ) -> dict[str, Any]:
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             merged_headers = await self.__merge_headers__(headers)
+            body, merged_headers = self._encode_json(json, merged_headers)
 
-            response = await client.post(
-                self.base_url + url, json=json, params=params, headers=merged_headers,
-                timeout=timeout
+            response = await self._send(
+                client, "POST", url, params=params, headers=merged_headers,
+                timeout=timeout, **body
             )
+            await self._invalidate(response)
             if response.is_error:
                 raise DifyException(
                     f"请求失败，状态码: {response.status_code}, 错误信息: {response.text}"
@@ -70,18 +252,21 @@ class HttpClient:
         Raises:
             DifyException: 当API请求失败时抛出
         """
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             # 上传文件时不设置Content-Type，让httpx自动设置为multipart/form-data
             auth_headers = {"Authorization": f"Bearer {self.key}"}
             if headers:
                 auth_headers.update(headers)
 
-            response = await client.post(
-                self.base_url + url,
+            response = await self._send(
+                client,
+                "POST",
+                url,
                 files=files,
                 params=params,
                 headers=auth_headers
             )
+            await self._invalidate(response)
             if response.is_error:
                 raise DifyException(
                     f"文件上传失败，状态码: {response.status_code}, 错误信息: {response.text}"
@@ -96,16 +281,18 @@ class HttpClient:
             headers: dict = None,
             ret_type: str = None,
     ) -> Any:
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             merged_headers = await self.__merge_headers__(headers)
 
-            response = await client.request(
+            response = await self._send(
+                client,
                 "DELETE",
-                self.base_url + url,
+                url,
                 params=params,
                 headers=merged_headers,
                 content=json.dumps(content) if content else None,
             )
+            await self._invalidate(response)
             if response.is_error:
                 raise DifyException(
                     f"请求失败，状态码: {response.status_code}, 错误信息: {response.text}"
@@ -117,6 +304,30 @@ class HttpClient:
             else:
                 return None
 
+    async def iter_items(
+            self, url: str, params: dict = None, headers: dict = None, key: str = "data"
+    ) -> AsyncGenerator[Any, None]:
+        """以流式GET请求获取列表，增量解析响应中的数组并逐个返回元素
+
+        不会把整个响应体读入内存，峰值内存约为一个元素。这种方式不经过请求合并和响应缓存。
+
+        Args:
+            url: API路径
+            params: 查询参数
+            headers: 请求头
+            key: 响应对象中数组的键，默认为`data`
+
+        Returns:
+            AsyncGenerator[Any, None]: 逐个解码后的元素
+
+        Raises:
+            DifyException: 当API请求失败时抛出
+        """
+        chunks = self.stream(url, params=params, headers=headers, method="GET")
+        async with aclosing(chunks):
+            async for item in iter_array_items(chunks, key):
+                yield item
+
     async def stream(
             self,
             url: str,
@@ -125,34 +336,99 @@ class HttpClient:
             method: str = "POST",
             json: dict = None,
     ) -> AsyncGenerator[bytes, None]:
-        async with httpx.AsyncClient(timeout=600) as client:
+        async with self._client(timeout=600) as client:
             merged_headers = await self.__merge_headers__(headers)
+            body, merged_headers = self._encode_json(json, merged_headers)
 
-            async with client.stream(
-                    method,
-                    self.base_url + url,
-                    params=params,
-                    headers=merged_headers,
-                    json=json,
-            ) as response:
+            response = await self._send(
+                client, method, url, stream=True, params=params, headers=merged_headers,
+                **body
+            )
+            decoded_bytes = 0
+            try:
                 if response.is_error:
                     error_content = await response.aread()
                     raise DifyException(
                         f"请求失败，状态码: {response.status_code}, 错误信息: {error_content.decode('utf-8')}"
                     )
+                # httpx按块解压，收到一块就可以产出一块
                 async for chunk in response.aiter_bytes():
+                    decoded_bytes += len(chunk)
                     yield chunk
+            finally:
+                await response.aclose()
+                if self.compression is not None:
+                    self.compression.record(response, decoded_bytes)
+
+
+def _as_pool(base_url: str | List[str] | HostPool) -> HostPool | None:
+    if isinstance(base_url, HostPool):
+        return base_url
+    if isinstance(base_url, (list, tuple)):
+        return HostPool(list(base_url))
+    return None
 
 
 class AdminClient(HttpClient):
-    def __init__(self, base_url: str, key: str):
-        self.host_url = base_url
-        super().__init__(base_url + "/console/api", key)
+    """管理API客户端
+
+    Args:
+        base_url: Dify服务地址，也可以是地址列表或`HostPool`，
+            此时在多个地址间负载均衡和故障转移
+        key: 管理API密钥
+        transport: 自定义传输层
+        hooks: 埋点钩子
+        breakers: 熔断器注册表
+        hedger: 对冲请求执行器，对GET请求启用对冲
+        coalesce: 是否合并相同的并发GET请求，默认关闭。
+            开启后并发的调用方拿到的是同一个解码后的对象，调用方不应修改它；
+            派生的应用API客户端共用同一个合并器
+        cache: GET响应的重新验证缓存，派生的应用API客户端共用同一个缓存
+        compression: 请求压缩配置和压缩统计，默认只统计、不压缩请求
+    """
+
+    def __init__(
+            self,
+            base_url: str | List[str] | HostPool,
+            key: str,
+            transport: httpx.AsyncBaseTransport = None,
+            hooks: Hooks = None,
+            breakers: CircuitBreakerRegistry = None,
+            hedger: Hedger = None,
+            coalesce: bool = False,
+            cache: ResponseCache = None,
+            compression: Compression = None,
+    ):
+        pool = _as_pool(base_url)
+        self.host_url = pool.primary if pool else base_url
+        super().__init__(
+            self.host_url + "/console/api", key, transport, pool, "/console/api",
+            hooks, breakers, hedger, SingleFlight() if coalesce else None, cache,
+            compression or Compression(),
+        )
 
     def create_api_client(self, app_key: str):
-        return ApiClient(self.host_url, app_key)
+        # 应用API客户端与管理客户端共用服务池、钩子、熔断器、请求合并器、
+        # 响应缓存和压缩统计，健康状态在两者之间共享
+        return ApiClient(self.pool or self.host_url, app_key, **self._shared())
 
 
 class ApiClient(HttpClient):
-    def __init__(self, base_url: str, key: str):
-        super().__init__(base_url + "/v1", key)
+    def __init__(
+            self,
+            base_url: str | List[str] | HostPool,
+            key: str,
+            transport: httpx.AsyncBaseTransport = None,
+            hooks: Hooks = None,
+            breakers: CircuitBreakerRegistry = None,
+            hedger: Hedger = None,
+            single_flight: SingleFlight = None,
+            cache: ResponseCache = None,
+            compression: Compression = None,
+    ):
+        pool = _as_pool(base_url)
+        host_url = pool.primary if pool else base_url
+        super().__init__(
+            host_url + "/v1", key, transport, pool, "/v1", hooks, breakers, hedger,
+            single_flight, cache, compression,
+        )
@@ -0,0 +1,147 @@
+import json
+import re
+from typing import Any, AsyncGenerator, AsyncIterator, List, Optional
+
+# 结构字符，以及字符串中需要关注的引号和反斜杠
+_SPECIAL = re.compile(rb'[\\"\[\]{},]')
+
+
+class ArraySplitter:
+    """从JSON对象中增量切分某个顶层数组的元素
+
+    按块喂入响应体，每次返回已经完整的元素原文。只保留当前元素的字节，
+    数组之前和之后的内容读过即丢弃，因此峰值内存约为一个元素的大小。
+
+    Args:
+        key: 顶层对象中数组的键，默认为`data`
+    """
+
+    def __init__(self, key: str = "data") -> None:
+        self.key = key.encode("utf-8")
+        self._buffer = b""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._string_start = 0
+        self._last_string: Optional[bytes] = None
+        self._in_array = False
+        self._done = False
+        self._item_start: Optional[int] = None
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """喂入一块响应体
+
+        Args:
+            data: 响应体片段
+
+        Returns:
+            List[bytes]: 这一块中结束的元素原文
+        """
+        if self._done:
+            return []
+        buffer = self._buffer + data
+        items: List[bytes] = []
+        pos = self._pos
+        while True:
+            match = _SPECIAL.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            char = buffer[match.start()]
+            pos = match.end()
+            if self._in_string:
+                if char == 0x5C:  # 反斜杠，跳过被转义的字符
+                    if pos >= len(buffer):
+                        # 被转义的字符在下一块中，从反斜杠处继续
+                        pos = match.start()
+                        break
+                    pos += 1
+                elif char == 0x22:
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_string = buffer[self._string_start:match.start()]
+            elif char == 0x22:
+                self._in_string = True
+                self._string_start = pos
+            elif char in (0x5B, 0x7B):  # [ {
+                self._depth += 1
+                if char == 0x5B and self._depth == 2 and self._last_string == self.key:
+                    self._in_array = True
+                    self._item_start = pos
+            elif char in (0x5D, 0x7D):  # ] }
+                if self._in_array and self._depth == 2:
+                    self._emit(buffer, match.start(), items)
+                    self._done = True
+                    self._buffer = b""
+                    return items
+                self._depth -= 1
+            elif char == 0x2C and self._in_array and self._depth == 2:  # ,
+                self._emit(buffer, match.start(), items)
+                self._item_start = pos
+
+        # 只保留当前元素（或未读完的字符串）的字节
+        keep = pos
+        if self._item_start is not None:
+            keep = min(keep, self._item_start)
+        if self._in_string:
+            keep = min(keep, self._string_start)
+        self._buffer = buffer[keep:]
+        self._pos = pos - keep
+        self._string_start -= keep
+        if self._item_start is not None:
+            self._item_start -= keep
+        return items
+
+    def _emit(self, buffer: bytes, end: int, items: List[bytes]) -> None:
+        raw = buffer[self._item_start:end].strip()
+        if raw:
+            items.append(raw)
+        self._item_start = None
+
+
+class _AsyncReader:
+    """把字节块迭代器包装为`ijson`需要的异步文件对象"""
+
+    def __init__(self, chunks: AsyncIterator[bytes]) -> None:
+        self._chunks = chunks.__aiter__()
+
+    async def read(self, size: int = -1) -> bytes:
+        try:
+            return await self._chunks.__anext__()
+        except StopAsyncIteration:
+            return b""
+
+
+async def iter_array_items(
+        chunks: AsyncIterator[bytes], key: str = "data"
+) -> AsyncGenerator[Any, None]:
+    """增量解析JSON对象中某个顶层数组的元素
+
+    安装了`ijson`时使用它的C后端解析，否则使用内置的`ArraySplitter`切分元素后逐个解码。
+
+    Args:
+        chunks: 响应体的字节块
+        key: 顶层对象中数组的键，默认为`data`
+
+    Returns:
+        AsyncGenerator[Any, None]: 逐个解码后的元素
+    """
+    try:
+        import ijson
+    except ImportError:
+        ijson = None
+
+    if ijson is not None:
+        async for item in ijson.items_async(
+            _AsyncReader(chunks), f"{key}.item", use_float=True
+        ):
+            yield item
+        return
+
+    splitter = ArraySplitter(key)
+    async for chunk in chunks:
+        for raw in splitter.feed(chunk):
+            yield json.loads(raw)
+
+
+__all__ = ["ArraySplitter", "iter_array_items"]
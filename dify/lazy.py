@@ -0,0 +1,132 @@
+from typing import Any, Optional
+
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import core_schema
+
+# 序列化上下文，未访问过的字段直接输出原始数据，不经过校验
+RAW_CONTEXT = {"lazy_raw": True}
+
+
+class Lazy:
+    """标记延迟校验的字段
+
+    构造模型时只保存原始数据，首次访问字段时才校验并缓存结果。
+    `model_dump`时默认会先校验未访问过的字段，保证无论是否访问过，输出都相同，
+    并遵循`by_alias`、`exclude_none`等序列化选项，代价是序列化时仍要校验一次。
+    只需要原样转发数据时（如导出），可以传入`context=RAW_CONTEXT`，
+    未访问过的字段直接输出原始数据，不经过校验，也不应用这些序列化选项。
+    所在的模型需要继承`LazyModel`。
+
+    注意：原始数据中的错误会在首次访问或序列化字段时才抛出`ValidationError`。
+
+    Example:
+        class App(LazyModel):
+            app_config: Annotated[Optional[ModelConfig], Lazy()] = Field(
+                default_factory=ModelConfig
+            )
+    """
+
+    def __init__(self) -> None:
+        self._source_type: Any = None
+        self._adapter: Optional[TypeAdapter] = None
+
+    def __getstate__(self) -> dict:
+        # TypeAdapter不能被pickle，反序列化后按需重新创建
+        return {"_source_type": self._source_type, "_adapter": None}
+
+    def validate(self, raw: Any) -> Any:
+        """校验原始数据"""
+        if self._adapter is None:
+            self._adapter = TypeAdapter(self._source_type)
+        return self._adapter.validate_python(raw)
+
+    def __get_pydantic_core_schema__(
+            self, source_type: Any, handler
+    ) -> core_schema.CoreSchema:
+        self._source_type = source_type
+        return core_schema.no_info_plain_validator_function(
+            self._wrap,
+            json_schema_input_schema=handler(source_type),
+            serialization=core_schema.wrap_serializer_function_ser_schema(
+                _serialize, schema=handler(source_type), info_arg=True
+            ),
+        )
+
+    def _wrap(self, raw: Any) -> Any:
+        if raw is None or isinstance(raw, (BaseModel, Deferred)):
+            return raw
+        return Deferred(raw, self)
+
+
+class Deferred:
+    """尚未校验的字段值"""
+
+    __slots__ = ("raw", "marker", "resolved", "value")
+
+    def __init__(self, raw: Any, marker: Lazy) -> None:
+        self.raw = raw
+        self.marker = marker
+        self.resolved = False
+        self.value: Any = None
+
+    def resolve(self) -> Any:
+        """校验原始数据并缓存结果"""
+        if not self.resolved:
+            self.value = self.marker.validate(self.raw)
+            self.resolved = True
+        return self.value
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Deferred):
+            if not self.resolved and not other.resolved:
+                return self.raw == other.raw
+            return self.resolve() == other.resolve()
+        return self.resolve() == other
+
+    def __repr__(self) -> str:
+        return repr(self.value) if self.resolved else "<未校验>"
+
+
+def _serialize(
+        value: Any,
+        nxt: core_schema.SerializerFunctionWrapHandler,
+        info: core_schema.SerializationInfo,
+) -> Any:
+    if isinstance(value, Deferred):
+        if not value.resolved and (info.context or {}).get("lazy_raw"):
+            return value.raw
+        # 与访问过的字段一样按模型序列化
+        value = value.resolve()
+    return nxt(value)
+
+
+class _LazyDescriptor:
+    """访问字段时校验`Deferred`的值"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance: Any, owner: type) -> Any:
+        if instance is None:
+            return self
+        value = instance.__dict__[self.name]
+        if isinstance(value, Deferred):
+            return value.resolve()
+        return value
+
+    def __set__(self, instance: Any, value: Any) -> None:
+        instance.__dict__[self.name] = value
+
+
+class LazyModel(BaseModel):
+    """支持`Lazy`字段的模型基类"""
+
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs: Any) -> None:
+        super().__pydantic_init_subclass__(**kwargs)
+        for name, field in cls.model_fields.items():
+            if any(isinstance(m, Lazy) for m in field.metadata):
+                setattr(cls, name, _LazyDescriptor(name))
+
+
+__all__ = ["RAW_CONTEXT", "Lazy", "LazyModel", "Deferred"]
@@ -1,3 +1,4 @@
+from dify.cache import validate_cached
 from dify.http import AdminClient
 from .schemas import LLM, LLMList
 
@@ -10,7 +11,7 @@ class DifyLLM:
         response_data = await self.admin_client.get(
             "/workspaces/current/models/model-types/llm",
         )
-        return LLMList(**response_data)
+        return validate_cached(self.admin_client, response_data, LLMList)
 
 
 __all__ = ["DifyLLM"]
\ No newline at end of file
@@ -0,0 +1,197 @@
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Generic, List, Optional, TypeVar
+
+from pydantic import BaseModel, Field
+
+from .exceptions import PollingTimeoutException
+
+T = TypeVar("T")
+
+
+class PollingPolicy(BaseModel):
+    """轮询策略
+
+    Attributes:
+        initial_interval: 首次轮询间隔（秒）
+        max_interval: 最大轮询间隔（秒）
+        multiplier: 状态未变化时的间隔增长倍数
+        jitter: 随机抖动比例，取值范围0-1
+        timeout: 全局截止时间（秒），为None时不限制
+    """
+
+    initial_interval: float = Field(default=0.5, gt=0, description="首次轮询间隔（秒）")
+    max_interval: float = Field(default=10.0, gt=0, description="最大轮询间隔（秒）")
+    multiplier: float = Field(
+        default=1.5, ge=1, description="状态未变化时的间隔增长倍数"
+    )
+    jitter: float = Field(default=0.1, ge=0, le=1, description="随机抖动比例")
+    timeout: Optional[float] = Field(default=600.0, description="全局截止时间（秒）")
+
+    def next_interval(self, current: float, changed: bool) -> float:
+        """计算下一次轮询间隔
+
+        状态发生变化时回落到初始间隔，否则按倍数指数增长。
+
+        Args:
+            current: 当前间隔
+            changed: 本轮状态是否发生变化
+
+        Returns:
+            float: 下一次轮询间隔（不含抖动）
+        """
+        if changed:
+            return self.initial_interval
+        return min(current * self.multiplier, self.max_interval)
+
+    def with_jitter(self, interval: float) -> float:
+        """为间隔叠加随机抖动，避免大量客户端同步请求"""
+        if not self.jitter:
+            return interval
+        delta = interval * self.jitter
+        return max(0.0, interval + random.uniform(-delta, delta))
+
+
+class _Waiter(Generic[T]):
+    def __init__(self, done: Callable[[T], bool]) -> None:
+        self.done = done
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class Poller(Generic[T]):
+    """自适应轮询引擎
+
+    同一个`key`上的所有等待者共享一个轮询循环，每一轮只发起一次状态请求，
+    再用各自的判定函数检查结果。这样成千上万个等待不会变成成千上万个独立的轮询循环。
+    新的等待者加入时不会立即触发请求，而是等待下一次计划的轮询。
+
+    每个等待者的超时由定时器独立控制，到截止时间立即抛出，不需要等待正在进行的状态请求。
+    状态请求失败时按策略退避后重试，直到所有等待者结束或超时。
+
+    Args:
+        fetch: 按`key`获取当前状态的异步函数
+        policy: 轮询策略
+    """
+
+    def __init__(
+            self,
+            fetch: Callable[[str], Awaitable[T]],
+            policy: Optional[PollingPolicy] = None,
+    ) -> None:
+        self.fetch = fetch
+        self.policy = policy or PollingPolicy()
+        self._waiters: Dict[str, List[_Waiter[T]]] = {}
+        self._loops: Dict[str, asyncio.Task] = {}
+        self._wakeups: Dict[str, asyncio.Event] = {}
+        # 最近一次状态请求的异常，请求成功后清除
+        self._errors: Dict[str, Exception] = {}
+
+    async def wait(
+            self,
+            key: str,
+            done: Callable[[T], bool],
+            timeout: Optional[float] = None,
+    ) -> T:
+        """等待`key`对应的状态满足判定条件
+
+        Args:
+            key: 轮询目标标识，相同`key`的等待者合并为同一个请求
+            done: 判定函数，返回True表示等待结束
+            timeout: 本次等待的超时时间（秒），默认使用策略中的全局截止时间
+
+        Returns:
+            T: 满足条件时的状态
+
+        Raises:
+            PollingTimeoutException: 超过截止时间仍未满足条件时抛出，
+                期间状态请求失败过时，`__cause__`为最近一次请求的异常
+        """
+        if not key:
+            raise ValueError("轮询标识不能为空")
+
+        timeout = self.policy.timeout if timeout is None else timeout
+        waiter = _Waiter(done)
+        self._waiters.setdefault(key, []).append(waiter)
+
+        loop_task = self._loops.get(key)
+        if loop_task is None or loop_task.done():
+            self._loops[key] = asyncio.create_task(self._run(key))
+
+        timer = None
+        if timeout is not None:
+            timer = asyncio.get_running_loop().call_later(
+                timeout, self._expire, key, waiter
+            )
+        try:
+            return await waiter.future
+        finally:
+            if timer is not None:
+                timer.cancel()
+            waiters = self._waiters.get(key)
+            if waiters and waiter in waiters:
+                waiters.remove(waiter)
+            if not waiters:
+                self._waiters.pop(key, None)
+                # 没有等待者了，让循环立即退出，而不是睡到下一次轮询
+                self._wake(key)
+
+    def pending(self, key: str) -> int:
+        """返回某个`key`上仍在等待的数量"""
+        return len(self._waiters.get(key, []))
+
+    def _expire(self, key: str, waiter: _Waiter[T]) -> None:
+        if waiter.future.done():
+            return
+        error = PollingTimeoutException(f"轮询超时: {key}")
+        error.__cause__ = self._errors.get(key)
+        waiter.future.set_exception(error)
+
+    def _wake(self, key: str) -> None:
+        event = self._wakeups.get(key)
+        if event is not None:
+            event.set()
+
+    async def _run(self, key: str) -> None:
+        wakeup = self._wakeups.setdefault(key, asyncio.Event())
+        interval = self.policy.initial_interval
+        last_state: Any = None
+        try:
+            while True:
+                waiters = [w for w in self._waiters.get(key, []) if not w.future.done()]
+                if not waiters:
+                    return
+
+                try:
+                    state = await self.fetch(key)
+                except Exception as e:
+                    # 按退避间隔重试，等待者各自在截止时间超时
+                    self._errors[key] = e
+                    interval = self.policy.next_interval(interval, changed=False)
+                else:
+                    self._errors.pop(key, None)
+                    for waiter in waiters:
+                        if not waiter.future.done() and waiter.done(state):
+                            waiter.future.set_result(state)
+                    changed = state != last_state
+                    last_state = state
+                    interval = self.policy.next_interval(interval, changed)
+
+                next_poll = time.monotonic() + self.policy.with_jitter(interval)
+                while self.pending(key):
+                    remaining = next_poll - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    wakeup.clear()
+                    try:
+                        await asyncio.wait_for(wakeup.wait(), timeout=remaining)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            self._wakeups.pop(key, None)
+            self._errors.pop(key, None)
+            if self._loops.get(key) is asyncio.current_task():
+                self._loops.pop(key, None)
+
+
+__all__ = ["PollingPolicy", "Poller"]
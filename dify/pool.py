@@ -0,0 +1,304 @@
+import time
+from enum import Enum
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Set
+
+import httpx
+
+from .exceptions import CircuitOpenException, DifyException
+
+# 可以安全重试的HTTP方法
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+# 视为服务端故障、可以切换到其他地址重试的状态码
+RETRYABLE_STATUS = {502, 503, 504}
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """关闭时执行回调的响应体，回调的参数为读取响应体时抛出的异常，正常读完或提前关闭时为None"""
+
+    def __init__(
+            self,
+            stream: httpx.AsyncByteStream,
+            on_close: Callable[[Optional[BaseException]], None],
+    ) -> None:
+        self.stream = stream
+        self.on_close = on_close
+        self.error: Optional[BaseException] = None
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        try:
+            async for chunk in self.stream:
+                yield chunk
+        except GeneratorExit:
+            raise
+        except BaseException as e:
+            self.error = e
+            raise
+
+    async def aclose(self) -> None:
+        try:
+            await self.stream.aclose()
+        finally:
+            self.on_close(self.error)
+
+
+class BalanceStrategy(str, Enum):
+    """负载均衡策略"""
+
+    ROUND_ROBIN = "round_robin"  # 轮询
+    LEAST_OUTSTANDING = "least_outstanding"  # 在途请求最少
+    EWMA = "ewma"  # 响应时间指数加权移动平均 × (在途请求数 + 1) 最小
+
+
+class Endpoint:
+    """服务地址及其健康状态
+
+    Attributes:
+        url: 服务地址，如`https://dify-1.example.com`
+        outstanding: 在途请求数，流式响应在响应体关闭之前都计入
+        ewma: 响应时间（到收到响应头为止）的指数加权移动平均（秒），
+            流式响应生成内容的时间不计入，避免处理长对话的地址被误判为慢
+        failures: 连续失败次数
+        ejected_until: 被摘除到的时间点，0表示未被摘除
+        ejections: 连续被摘除的次数，用于计算摘除时长
+        probing: 摘除到期后是否正在发送试探请求
+    """
+
+    def __init__(self, url: str) -> None:
+        self.url = url.rstrip("/")
+        self.outstanding = 0
+        self.ewma: Optional[float] = None
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.ejections = 0
+        self.probing = False
+
+    def __repr__(self) -> str:
+        return (
+            f"Endpoint({self.url!r}, outstanding={self.outstanding}, "
+            f"ewma={self.ewma})"
+        )
+
+
+class HostPool:
+    """多地址服务池
+
+    为`AdminClient`/`ApiClient`提供多个Dify地址之间的负载均衡、被动健康检查和故障转移：
+
+    - 连续失败（连接错误、超时或502/503/504）达到`max_failures`次的地址被摘除，
+      摘除时长从`eject_duration`开始，每次连续摘除翻倍，最长`max_eject_duration`；
+    - 摘除到期后只放行一个试探请求，成功则恢复，失败则再次摘除；
+    - 连接失败（请求未发出）时任何请求都会切换到其他地址重试，
+      其他故障只对幂等请求（GET、PUT、DELETE等）切换重试；
+    - 所有地址都被摘除时忽略摘除状态，避免完全不可用。
+
+    Args:
+        hosts: 服务地址列表
+        strategy: 负载均衡策略，默认为轮询
+        max_failures: 连续失败多少次后摘除，默认为3
+        eject_duration: 首次摘除时长（秒），默认为30
+        max_eject_duration: 最长摘除时长（秒），默认为300
+        ewma_alpha: EWMA的平滑系数，取值范围0-1，越大越偏重最近的响应时间
+        clock: 时间函数，默认为`time.monotonic`
+    """
+
+    def __init__(
+            self,
+            hosts: List[str],
+            strategy: BalanceStrategy = BalanceStrategy.ROUND_ROBIN,
+            max_failures: int = 3,
+            eject_duration: float = 30.0,
+            max_eject_duration: float = 300.0,
+            ewma_alpha: float = 0.3,
+            clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not hosts:
+            raise ValueError("服务地址列表不能为空")
+        self.endpoints = [Endpoint(host) for host in hosts]
+        self.strategy = BalanceStrategy(strategy)
+        self.max_failures = max_failures
+        self.eject_duration = eject_duration
+        self.max_eject_duration = max_eject_duration
+        self.ewma_alpha = ewma_alpha
+        self.clock = clock
+        self._cursor = 0
+
+    @property
+    def primary(self) -> str:
+        """第一个服务地址"""
+        return self.endpoints[0].url
+
+    def healthy(self) -> List[Endpoint]:
+        """当前未被摘除的地址"""
+        now = self.clock()
+        return [e for e in self.endpoints if e.ejected_until <= now]
+
+    def choose(self, exclude: Set[Endpoint] = frozenset()) -> Optional[Endpoint]:
+        """按策略选择一个地址
+
+        Args:
+            exclude: 本次请求已经尝试过的地址
+
+        Returns:
+            Optional[Endpoint]: 选中的地址，没有可选地址时返回None
+        """
+        now = self.clock()
+        candidates = [
+            e for e in self.endpoints
+            if e not in exclude and e.ejected_until <= now and not e.probing
+        ]
+        if not candidates:
+            # 所有地址都不可用时退化为忽略健康状态
+            candidates = [e for e in self.endpoints if e not in exclude]
+            if not candidates:
+                return None
+
+        if self.strategy == BalanceStrategy.LEAST_OUTSTANDING:
+            endpoint = self._pick(candidates, lambda e: e.outstanding)
+        elif self.strategy == BalanceStrategy.EWMA:
+            endpoint = self._pick(
+                candidates, lambda e: (e.ewma or 0.0) * (e.outstanding + 1)
+            )
+        else:
+            endpoint = candidates[self._cursor % len(candidates)]
+            self._cursor += 1
+
+        if endpoint.ejected_until and endpoint.ejected_until <= now:
+            endpoint.probing = True
+        return endpoint
+
+    def _pick(
+            self, candidates: List[Endpoint], score: Callable[[Endpoint], float]
+    ) -> Endpoint:
+        # 分数相同时轮询，避免总是选中第一个
+        start = self._cursor % len(candidates)
+        self._cursor += 1
+        rotated = candidates[start:] + candidates[:start]
+        return min(rotated, key=score)
+
+    def record_success(
+            self, endpoint: Endpoint, latency: Optional[float] = None
+    ) -> None:
+        """记录一次成功请求，`latency`为None时只更新健康状态"""
+        endpoint.failures = 0
+        endpoint.probing = False
+        endpoint.ejected_until = 0.0
+        endpoint.ejections = 0
+        if latency is not None:
+            self.record_latency(endpoint, latency)
+
+    def record_latency(self, endpoint: Endpoint, latency: float) -> None:
+        """更新地址的响应时间EWMA"""
+        if endpoint.ewma is None:
+            endpoint.ewma = latency
+        else:
+            endpoint.ewma += self.ewma_alpha * (latency - endpoint.ewma)
+
+    def record_failure(self, endpoint: Endpoint) -> None:
+        """记录一次失败请求，达到阈值或试探失败时摘除该地址"""
+        endpoint.failures += 1
+        if endpoint.probing or endpoint.failures >= self.max_failures:
+            endpoint.ejections += 1
+            duration = min(
+                self.eject_duration * 2 ** (endpoint.ejections - 1),
+                self.max_eject_duration,
+            )
+            endpoint.ejected_until = self.clock() + duration
+            endpoint.failures = 0
+        endpoint.probing = False
+
+    async def request(
+            self,
+            attempt: Callable[[str], Awaitable[httpx.Response]],
+            idempotent: bool,
+    ) -> httpx.Response:
+        """在池中发送请求，失败时按规则切换地址
+
+        Args:
+            attempt: 发送请求的函数，参数为服务地址
+            idempotent: 请求是否幂等
+
+        Returns:
+            httpx.Response: 响应
+
+        Raises:
+            httpx.TransportError: 所有可尝试的地址都失败时抛出最后一个错误
+            CircuitOpenException: 所有地址的熔断器都已打开时抛出
+        """
+        tried: Set[Endpoint] = set()
+        last_error: Optional[Exception] = None
+        while True:
+            endpoint = self.choose(tried)
+            if endpoint is None:
+                if last_error is not None:
+                    raise last_error
+                raise DifyException("没有可用的服务地址", "no_endpoint")
+            tried.add(endpoint)
+            endpoint.outstanding += 1
+            started = self.clock()
+            try:
+                response = await attempt(endpoint.url)
+            except CircuitOpenException as e:
+                # 该地址的熔断器已打开，请求没有发出，直接换下一个地址
+                endpoint.outstanding -= 1
+                endpoint.probing = False
+                last_error = e
+                continue
+            except httpx.TransportError as e:
+                endpoint.outstanding -= 1
+                self.record_failure(endpoint)
+                last_error = e
+                # 连接失败时请求一定没有发出，任何方法都可以安全重试
+                if idempotent or isinstance(
+                    e, (httpx.ConnectError, httpx.ConnectTimeout)
+                ):
+                    continue
+                raise
+            except BaseException:
+                endpoint.outstanding -= 1
+                # 被取消的试探请求不计入结果，允许再次试探
+                endpoint.probing = False
+                raise
+
+            if response.status_code in RETRYABLE_STATUS:
+                self.record_failure(endpoint)
+                self._hold(endpoint, response)
+                if idempotent and self._has_untried(tried):
+                    await response.aclose()
+                    continue
+                return response
+            self.record_success(endpoint, self.clock() - started)
+            self._hold(endpoint, response)
+            return response
+
+    def _hold(self, endpoint: Endpoint, response: httpx.Response) -> None:
+        """响应关闭时释放在途计数
+
+        流式响应（如SSE）在读完或关闭响应体之前都计入在途请求，
+        这样`LEAST_OUTSTANDING`和`EWMA`策略能看到长时间占用的连接。
+        """
+        released = False
+
+        def release(error: Optional[BaseException] = None) -> None:
+            nonlocal released
+            if released:
+                return
+            released = True
+            endpoint.outstanding -= 1
+
+        if response.is_closed:
+            release()
+        else:
+            response.stream = _ReleasingStream(response.stream, release)
+
+    def _has_untried(self, exclude: Set[Endpoint]) -> bool:
+        return any(e not in exclude for e in self.endpoints)
+
+
+__all__ = [
+    "IDEMPOTENT_METHODS",
+    "RETRYABLE_STATUS",
+    "BalanceStrategy",
+    "Endpoint",
+    "HostPool",
+]
@@ -1,6 +1,11 @@
-from typing import Generic, TypeVar, Optional, List
+import sys
+from typing import (
+    Any, ClassVar, Dict, Generic, Iterable, Tuple, Type, TypeVar, Optional, List
+)
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr, create_model, model_validator
+
+from .lazy import LazyModel
 
 T = TypeVar("T")
 
@@ -62,3 +67,122 @@ class Pair(BaseModel, Generic[T]):
     def unwrap_or(self, default: T) -> T:
         """获取值，如果存在错误则返回默认值"""
         return self.value if self.is_ok() else default
+
+
+class Projection(LazyModel):
+    """部分字段模型的基类，由`project`创建
+
+    只校验请求的字段，原始数据保存在实例中。访问未请求的字段时，
+    才用原始数据校验完整模型（结果会被缓存），再从完整模型中取值。
+
+    序列化（pickle）时记录完整模型、字段和类名，反序列化时通过`project`重新得到同一个类，
+    因此没有赋值给模块属性的部分字段模型也可以被pickle。
+    """
+
+    # 对应的完整模型
+    __full_model__: ClassVar[Type[BaseModel]]
+
+    _raw: Dict[str, Any] = PrivateAttr(default_factory=dict)
+    _full: Optional[BaseModel] = PrivateAttr(default=None)
+
+    model_config = {"populate_by_name": True, "protected_namespaces": ()}
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def _keep_raw(cls, data: Any, handler):
+        instance = handler(data)
+        if isinstance(data, dict):
+            instance._raw = data
+        return instance
+
+    def full(self) -> BaseModel:
+        """校验并返回完整模型"""
+        if self._full is None:
+            self._full = self.__full_model__.model_validate(self._raw)
+        return self._full
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return super().__getattr__(name)
+        except AttributeError:
+            if not name.startswith("_") and name in self.__full_model__.model_fields:
+                return getattr(self.full(), name)
+            raise
+
+    def __reduce__(self):
+        cls = type(self)
+        return _restore_projection, (
+            cls.__full_model__,
+            tuple(cls.model_fields),
+            cls.__name__,
+            self.__getstate__(),
+        )
+
+
+def _restore_projection(
+        model: Type[BaseModel],
+        fields: Tuple[str, ...],
+        name: str,
+        state: Dict[str, Any],
+) -> Projection:
+    cls = project(model, fields, name)
+    instance = cls.__new__(cls)
+    instance.__setstate__(state)
+    return instance
+
+
+_ProjectionKey = Tuple[Type[BaseModel], Tuple[str, ...], Optional[str]]
+_projections: Dict[_ProjectionKey, Type[Projection]] = {}
+
+
+def project(
+        model: Type[BaseModel], fields: Iterable[str], name: str = None
+) -> Type[Projection]:
+    """创建只包含部分字段的模型
+
+    相同的模型、字段和类名返回同一个类；不指定类名时返回这些字段最先创建的类（如`AppSummary`）。
+    类的`__module__`为调用方所在的模块，
+    赋值给同名的模块属性（如`dify.app.schemas.AppSummary`）后可以按名称导入。
+
+    Args:
+        model: 完整模型
+        fields: 需要校验的字段名
+        name: 类名，默认为`<模型名>Projection`
+
+    Returns:
+        Type[Projection]: 部分字段模型
+
+    Raises:
+        ValueError: 当字段为空或不存在时抛出
+
+    Example:
+        >>> AppSummary = project(App, ["id", "name", "mode", "tags"])
+        >>> summary = AppSummary.model_validate(data)
+        >>> summary.name          # 已校验
+        >>> summary.app_config    # 首次访问时才校验完整模型
+    """
+    key = (model, tuple(sorted(set(fields))), name)
+    if not key[1]:
+        raise ValueError("字段不能为空")
+    projection = _projections.get(key)
+    if projection is not None:
+        return projection
+
+    unknown = [f for f in key[1] if f not in model.model_fields]
+    if unknown:
+        raise ValueError(f"{model.__name__}中不存在字段: {', '.join(unknown)}")
+    projection = create_model(
+        name or f"{model.__name__}Projection",
+        __base__=Projection,
+        __module__=sys._getframe(1).f_globals.get("__name__", __name__),
+        **{
+            f: (info.annotation, info)
+            for f, info in model.model_fields.items()
+            if f in key[1]
+        },
+    )
+    projection.__full_model__ = model
+    _projections[key] = projection
+    _projections.setdefault(key[:2] + (None,), projection)
+    _projections.setdefault(key[:2] + (projection.__name__,), projection)
+    return projection
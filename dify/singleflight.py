@@ -0,0 +1,65 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Call:
+    def __init__(self, task: asyncio.Task) -> None:
+        self.task = task
+        self.waiters = 0
+        self.abandoned = False
+
+
+class SingleFlight:
+    """合并相同的并发请求
+
+    同一个键同时只有一个请求在执行，期间到达的相同请求等待并共享它的结果（包括异常）。
+    请求结束后立即移除，不做任何缓存，因此与TTL缓存相互独立。
+
+    执行在独立的任务中进行：某个等待者被取消不影响其他等待者，
+    所有等待者都取消后请求本身才会被取消。
+
+    注意：共享的结果是同一个对象，调用方不应修改它。
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, _Call] = {}
+        self.shared = 0
+
+    @property
+    def in_flight(self) -> int:
+        """正在执行的请求数"""
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """执行请求，相同键的并发调用共享一次执行
+
+        Args:
+            key: 请求的键
+            fn: 执行请求的函数
+
+        Returns:
+            Any: 请求结果
+        """
+        call = self._calls.get(key)
+        if call is None or call.abandoned:
+            call = self._calls[key] = _Call(asyncio.ensure_future(fn()))
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+        else:
+            self.shared += 1
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if not call.task.done():
+                call.waiters -= 1
+                if call.waiters == 0:
+                    call.abandoned = True
+                    call.task.cancel()
+            raise
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+
+__all__ = ["SingleFlight"]
@@ -0,0 +1,245 @@
+import asyncio
+import functools
+import inspect
+import threading
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Dict, Generator, List
+
+import httpx
+
+from .app import DifyApp
+from .app.conversation import DifyConversation
+from .dataset import DifyDataset
+from .file import DifyFile
+from .hooks import Hooks
+from .http import AdminClient
+from .llm import DifyLLM
+from .tag import DifyTag
+
+
+class _ThreadedByteStream(httpx.AsyncByteStream):
+    """在线程池中读取同步响应体"""
+
+    def __init__(self, stream: httpx.SyncByteStream) -> None:
+        self.stream = stream
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        chunks = iter(self.stream)
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+
+    async def aclose(self) -> None:
+        await asyncio.to_thread(self.stream.close)
+
+
+class SyncTransport(httpx.AsyncBaseTransport):
+    """把同步传输层适配为异步传输层
+
+    请求在线程池中通过同步传输层发送，因此同步客户端的请求和异步客户端一样经过
+    `HttpClient._send`（服务池、熔断器、埋点、对冲、合并、缓存和压缩统计）。
+    连接由同步传输层的连接池管理，可以在多个线程的事件循环之间共享。
+    关闭`AsyncClient`时不会关闭同步传输层，需要调用`close`关闭。
+
+    Args:
+        transport: 同步传输层，如`httpx.HTTPTransport`
+    """
+
+    def __init__(self, transport: httpx.BaseTransport) -> None:
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await asyncio.to_thread(self.transport.handle_request, request)
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers.raw,
+            stream=_ThreadedByteStream(response.stream),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        # 同步传输层在多个AsyncClient之间共享，由close统一关闭
+        pass
+
+    def close(self) -> None:
+        """关闭同步传输层"""
+        self.transport.close()
+
+
+class _SyncProxy:
+    """把异步资源对象的协程方法转换为同步方法，异步生成器转换为同步生成器"""
+
+    def __init__(self, target: Any, run: Callable[[Any], Any]) -> None:
+        self._target = target
+        self._run = run
+
+    def __getattr__(self, name: str) -> Any:
+        value = getattr(self._target, name)
+        if inspect.iscoroutinefunction(value) or inspect.isasyncgenfunction(value):
+            @functools.wraps(value)
+            def method(*args, **kwargs):
+                return self._wrap(value(*args, **kwargs))
+
+            return method
+        if hasattr(value, "admin_client"):
+            # 嵌套的资源对象，如app.conversation、app.workflow
+            return _SyncProxy(value, self._run)
+        return value
+
+    def _wrap(self, result: Any) -> Any:
+        if inspect.iscoroutine(result):
+            return self._wrap(self._run(result))
+        if inspect.isasyncgen(result):
+            return self._iterate(result)
+        return result
+
+    def _iterate(self, agen: AsyncGenerator) -> Generator:
+        try:
+            while True:
+                try:
+                    item = self._run(agen.__anext__(), drain=False)
+                except StopAsyncIteration:
+                    return
+                yield item
+        finally:
+            # 提前退出循环时关闭异步生成器，并等待它创建的后台任务（如停止生成请求）完成
+            self._run(agen.aclose())
+
+    def __dir__(self) -> List[str]:
+        return dir(self._target)
+
+    def __repr__(self) -> str:
+        return f"<sync {self._target!r}>"
+
+
+class DifySync(object):
+    """Dify同步客户端
+
+    提供与`Dify`相同的资源（app、dataset、file、llm、tag、conversation），方法为同步调用，
+    流式方法返回普通生成器。请求模型、响应模型和请求逻辑与异步版本共用，
+    请求通过`SyncTransport`走与异步客户端相同的`HttpClient._send`流程，
+    所有请求共享同一个同步传输层的连接池。
+
+    协程在每个线程私有的事件循环中执行，每个线程使用各自的客户端和资源对象
+    （资源对象中的锁、轮询任务等都绑定在所属线程的事件循环上），只共享连接池。
+    不能在已运行事件循环的线程（如异步函数内部）中调用。
+
+    Args:
+        base_url: Dify服务地址
+        key: 管理API密钥
+        limits: 连接池限制，默认为
+            `httpx.Limits(max_connections=100, max_keepalive_connections=20)`
+        transport: 自定义同步传输层，设置后忽略limits
+        hooks: 埋点钩子，所有线程共用
+        stop_on_abort: 提前退出流式方法的循环时，是否自动通知服务端停止生成，默认为False
+    """
+
+    def __init__(
+            self,
+            base_url: str,
+            key: str,
+            limits: httpx.Limits = None,
+            transport: httpx.BaseTransport = None,
+            hooks: Hooks = None,
+            stop_on_abort: bool = False,
+    ):
+        self.base_url = base_url
+        self.key = key
+        self.hooks = hooks
+        self.stop_on_abort = stop_on_abort
+        self.transport = SyncTransport(
+            transport or httpx.HTTPTransport(
+                limits=limits or httpx.Limits(
+                    max_connections=100, max_keepalive_connections=20
+                )
+            )
+        )
+        self._local = threading.local()
+        self._runners: List[asyncio.Runner] = []
+        self._lock = threading.Lock()
+
+    def _resources(self) -> Dict[str, Any]:
+        """当前线程的客户端和资源对象"""
+        resources = getattr(self._local, "resources", None)
+        if resources is None:
+            admin_client = AdminClient(
+                self.base_url, self.key, self.transport, hooks=self.hooks
+            )
+            resources = self._local.resources = {
+                "admin_client": admin_client,
+                "app": _SyncProxy(
+                    DifyApp(admin_client, stop_on_abort=self.stop_on_abort), self._run
+                ),
+                "llm": _SyncProxy(DifyLLM(admin_client), self._run),
+                "file": _SyncProxy(DifyFile(admin_client), self._run),
+                "dataset": _SyncProxy(DifyDataset(admin_client), self._run),
+                "tag": _SyncProxy(DifyTag(admin_client), self._run),
+                "conversation": _SyncProxy(DifyConversation(admin_client), self._run),
+            }
+        return resources
+
+    @property
+    def admin_client(self) -> AdminClient:
+        return self._resources()["admin_client"]
+
+    @property
+    def app(self) -> _SyncProxy:
+        return self._resources()["app"]
+
+    @property
+    def llm(self) -> _SyncProxy:
+        return self._resources()["llm"]
+
+    @property
+    def file(self) -> _SyncProxy:
+        return self._resources()["file"]
+
+    @property
+    def dataset(self) -> _SyncProxy:
+        return self._resources()["dataset"]
+
+    @property
+    def tag(self) -> _SyncProxy:
+        return self._resources()["tag"]
+
+    @property
+    def conversation(self) -> _SyncProxy:
+        return self._resources()["conversation"]
+
+    def _run(self, coro: Any, drain: bool = True) -> Any:
+        runner = getattr(self._local, "runner", None)
+        if runner is None:
+            runner = self._local.runner = asyncio.Runner()
+            with self._lock:
+                self._runners.append(runner)
+        if not inspect.iscoroutine(coro):
+            coro = self._await(coro)
+        result = runner.run(coro)
+        if drain:
+            loop = runner.get_loop()
+            pending = asyncio.all_tasks(loop)
+            if pending:
+                runner.run(asyncio.wait(pending))
+        return result
+
+    @staticmethod
+    async def _await(awaitable: Any) -> Any:
+        return await awaitable
+
+    def close(self) -> None:
+        """关闭连接池和事件循环"""
+        self.transport.close()
+        with self._lock:
+            runners, self._runners = self._runners, []
+        for runner in runners:
+            runner.close()
+
+    def __enter__(self) -> "DifySync":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+__all__ = ["DifySync", "SyncTransport"]
@@ -1,12 +1,19 @@
-from typing import List
+import asyncio
+from typing import Dict, Iterable, List
 
+from dify.cache import validate_cached
+from dify.exceptions import DifyException
 from dify.http import AdminClient
+from dify.schemas import Error, Pair
 from .schemas import Tag, TagType, BindingPayloads
 
 
 class DifyTag:
     def __init__(self, admin_client: AdminClient) -> None:
         self.admin_client = admin_client
+        # 按标签类型缓存的 名称 -> 标签 索引
+        self._name_index: Dict[TagType, Dict[str, Tag]] = {}
+        self._index_locks: Dict[TagType, asyncio.Lock] = {}
 
     async def list(self, type: TagType) -> List[Tag]:
         """获取指定类型的标签列表
@@ -27,8 +34,8 @@ class DifyTag:
         # 发送GET请求获取标签列表
         response_data = await self.admin_client.get("/tags", params={"type": type.value})
         
-        # 将响应数据转换为Tag对象列表
-        return [Tag(**tag_data) for tag_data in response_data]
+        # 将响应数据转换为Tag对象列表，配置了响应缓存且内容没有变化时复用上次的结果
+        return list(validate_cached(self.admin_client, response_data, List[Tag]))
         
     async def create(self, name: str, type: TagType) -> Tag:
         """创建新标签
@@ -58,9 +65,15 @@ class DifyTag:
 
         # 发送POST请求创建标签
         response_data = await self.admin_client.post("/tags", json=payload)
-        
+
+        tag = Tag(**response_data)
+        # 已缓存的名称索引直接加入新标签，无需重新拉取列表
+        index = self._name_index.get(type)
+        if index is not None:
+            index[tag.name] = tag
+
         # 返回创建的标签对象
-        return Tag(**response_data)
+        return tag
         
     async def bind(self, payload: BindingPayloads) -> bool:
         """绑定标签到目标对象
@@ -111,9 +124,134 @@ class DifyTag:
 
         # 发送DELETE请求删除标签
         await self.admin_client.delete(f"/tags/{tag_id}")
-        
+
+        # 从名称索引中移除被删除的标签
+        for index in self._name_index.values():
+            for name in [name for name, tag in index.items() if tag.id == tag_id]:
+                del index[name]
+
         # 删除成功返回True
         return True
 
+    async def bind_many(
+        self, payloads: Iterable[BindingPayloads], concurrency: int = 10
+    ) -> List[Pair[bool]]:
+        """批量绑定标签，每个绑定参数对应一个目标对象
+
+        Args:
+            payloads: 标签绑定参数列表，每项包含标签ID列表、目标对象ID和标签类型
+            concurrency: 最大并发请求数，默认为10
+
+        Returns:
+            List[Pair[bool]]: 与输入顺序一致的绑定结果，单个失败不会中断其它绑定
+
+        Raises:
+            ValueError: 当并发数小于1时抛出
+        """
+        if concurrency < 1:
+            raise ValueError("并发数不能小于1")
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bind_one(payload: BindingPayloads) -> Pair[bool]:
+            async with semaphore:
+                try:
+                    return Pair[bool](value=await self.bind(payload))
+                except Exception as e:
+                    code = (
+                        e.code
+                        if isinstance(e, DifyException) and e.code
+                        else e.__class__.__name__
+                    )
+                    return Pair[bool](error=Error(code=code, message=str(e)))
+
+        return list(await asyncio.gather(*[bind_one(payload) for payload in payloads]))
+
+    async def get_name_index(
+            self, type: TagType, refresh: bool = False
+    ) -> Dict[str, Tag]:
+        """获取指定类型的 名称 -> 标签 索引
+
+        索引在首次调用时拉取并缓存，`create`和`delete`会同步更新缓存。
+
+        Args:
+            type: 标签类型
+            refresh: 是否强制重新拉取标签列表
+
+        Returns:
+            Dict[str, Tag]: 以标签名称为键的标签字典
+
+        Raises:
+            ValueError: 当标签类型无效时抛出
+            httpx.HTTPStatusError: 当API请求失败时抛出
+        """
+        if not type:
+            raise ValueError("标签类型不能为空")
+
+        lock = self._index_locks.setdefault(type, asyncio.Lock())
+        async with lock:
+            if refresh or type not in self._name_index:
+                tags = await self.list(type)
+                self._name_index[type] = {tag.name: tag for tag in tags}
+            return self._name_index[type]
+
+    def invalidate(self, type: TagType = None) -> None:
+        """清除名称索引缓存
+
+        Args:
+            type: 标签类型，为None时清除所有类型的缓存
+        """
+        if type is None:
+            self._name_index.clear()
+        else:
+            self._name_index.pop(type, None)
+
+    async def ensure_tags(
+        self, names: Iterable[str], type: TagType, concurrency: int = 10
+    ) -> List[Tag]:
+        """确保给定名称的标签都存在，缺失的标签会被一次性创建
+
+        Args:
+            names: 标签名称列表
+            type: 标签类型
+            concurrency: 创建缺失标签时的最大并发请求数，默认为10
+
+        Returns:
+            List[Tag]: 与输入名称顺序一致的标签列表。
+                服务端规范化了新标签的名称（如去掉首尾空白）时，仍按传入的名称对应
+
+        Raises:
+            ValueError: 当标签名称或类型无效时抛出
+            DifyException: 当某个名称没有对应的标签时抛出
+            httpx.HTTPStatusError: 当API请求失败时抛出
+        """
+        names = list(names)
+        if any(not name for name in names):
+            raise ValueError("标签名称不能为空")
+
+        # 先取出已有的标签，名称索引在创建期间被其他调用清除也不影响结果
+        index = await self.get_name_index(type)
+        found = {name: index[name] for name in names if name in index}
+        missing = [name for name in dict.fromkeys(names) if name not in found]
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def create_one(name: str) -> Tag:
+            async with semaphore:
+                return await self.create(name, type)
+
+        # 按传入的名称对应新标签，而不是服务端返回的名称
+        found.update(
+            zip(missing, await asyncio.gather(*[create_one(name) for name in missing]))
+        )
+
+        tags = []
+        for name in names:
+            tag = found.get(name)
+            if tag is None:
+                raise DifyException(f"标签不存在: {name}", "tag_not_found")
+            tags.append(tag)
+        return tags
+
 
 __all__ = ["DifyTag"]
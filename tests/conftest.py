@@ -0,0 +1,21 @@
+"""
+测试共用的夹具
+"""
+
+import pytest
+
+
+class Clock:
+    """可手动推进的时间函数"""
+
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    """从1000秒开始、需要手动推进的时钟"""
+    return Clock()
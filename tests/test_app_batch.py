@@ -0,0 +1,170 @@
+"""
+测试工作流批量执行功能
+"""
+
+import asyncio
+import random
+
+import pytest
+from unittest.mock import MagicMock
+
+from dify.app.batch import WorkflowBatchRunner
+from dify.app.schemas import RunWorkflowPayloads
+from dify.app.utils import parse_event
+
+
+def _finished(run_id, status="succeeded", outputs=None, error=None):
+    return parse_event({
+        "event": "workflow_finished",
+        "workflow_run_id": run_id,
+        "data": {
+            "id": run_id, "status": status, "outputs": outputs, "error": error,
+            "elapsed_time": 0.1,
+        },
+    })
+
+
+def _mock_app(fail_times=None):
+    """模拟DifyApp.run，inputs.x为行号，fail_times指定每行前几次失败"""
+    fail_times = dict(fail_times or {})
+    calls = []
+
+    async def run(api_key, payloads):
+        x = payloads.inputs["x"]
+        calls.append(x)
+        await asyncio.sleep(random.random() / 1000)
+        yield parse_event({"event": "workflow_started", "workflow_run_id": f"run{x}"})
+        if fail_times.get(x, 0) > 0:
+            fail_times[x] -= 1
+            yield _finished(f"run{x}", status="failed", error="boom")
+            return
+        yield _finished(f"run{x}", outputs={"y": x * 2})
+
+    app = MagicMock()
+    app.run = run
+    app.calls = calls
+    return app
+
+
+TEMPLATE = RunWorkflowPayloads(user="batch", response_mode="streaming")
+
+
+@pytest.mark.asyncio
+async def test_run_ordered_with_template():
+    """测试按输入顺序输出结果"""
+    runner = WorkflowBatchRunner(_mock_app(), "key", concurrency=4)
+
+    rows = ({"x": i} for i in range(20))
+    results = [r async for r in runner.run(rows, TEMPLATE, ordered=True)]
+
+    assert [r.index for r in results] == list(range(20))
+    assert [r.outputs["y"] for r in results] == [i * 2 for i in range(20)]
+    assert all(r.succeeded and r.attempts == 1 for r in results)
+
+
+@pytest.mark.asyncio
+async def test_run_retries_failed_rows():
+    """测试失败的行会被重试"""
+    app = _mock_app(fail_times={1: 1, 2: 5})
+    runner = WorkflowBatchRunner(app, "key", max_retries=2, retry_backoff=0)
+
+    rows = [{"x": i} for i in range(3)]
+    results = {r.index: r async for r in runner.run(rows, TEMPLATE)}
+
+    assert results[1].succeeded and results[1].attempts == 2
+    assert not results[2].succeeded
+    assert results[2].attempts == 3
+    assert results[2].error == "boom"
+
+
+@pytest.mark.asyncio
+async def test_run_resumes_from_checkpoint(tmp_path):
+    """测试从检查点恢复时跳过已成功的行"""
+    path = str(tmp_path / "checkpoint.jsonl")
+    app = _mock_app(fail_times={3: 1})
+    rows = [{"x": i} for i in range(5)]
+
+    first = WorkflowBatchRunner(app, "key", max_retries=0, checkpoint_path=path)
+    results = [r async for r in first.run(rows, TEMPLATE)]
+    assert sum(r.succeeded for r in results) == 4
+
+    app.calls.clear()
+    second = WorkflowBatchRunner(app, "key", max_retries=0, checkpoint_path=path)
+    results = [r async for r in second.run(rows, TEMPLATE, ordered=True)]
+
+    assert app.calls == [3]
+    assert [r.index for r in results] == [3]
+    assert second.completed_indices() == {0, 1, 2, 3, 4}
+
+
+@pytest.mark.asyncio
+async def test_run_dict_rows_without_template():
+    """测试字典输入行缺少模板"""
+    runner = WorkflowBatchRunner(_mock_app(), "key")
+    with pytest.raises(ValueError, match="必须提供模板"):
+        [r async for r in runner.run([{"x": 1}])]
+
+
+def test_empty_api_key():
+    """测试API密钥为空"""
+    with pytest.raises(ValueError, match="API密钥不能为空"):
+        WorkflowBatchRunner(_mock_app(), "")
+
+
+@pytest.mark.asyncio
+async def test_ordered_stalled_row_limits_dispatch():
+    """测试按顺序输出时某一行卡住，积压达到上限后暂停发出新行"""
+    release = asyncio.Event()
+    calls = []
+
+    async def run(api_key, payloads):
+        x = payloads.inputs["x"]
+        calls.append(x)
+        if x == 0:
+            await release.wait()
+        yield _finished(f"run{x}", outputs={"y": x})
+
+    app = MagicMock()
+    app.run = run
+    runner = WorkflowBatchRunner(app, "key", concurrency=2, max_pending=4)
+    results = runner.run(({"x": i} for i in range(100)), TEMPLATE, ordered=True)
+
+    first = asyncio.ensure_future(results.__anext__())
+    for _ in range(20):
+        await asyncio.sleep(0)
+    assert len(calls) == 4
+
+    release.set()
+    assert (await first).index == 0
+    assert [r.index async for r in results] == list(range(1, 100))
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_written_off_event_loop(tmp_path, monkeypatch):
+    """测试检查点在线程池中写入"""
+    import threading
+
+    import dify.app.batch
+
+    loop_thread = threading.get_ident()
+    threads = []
+    append = dify.app.batch._append
+    monkeypatch.setattr(
+        dify.app.batch, "_append",
+        lambda file, lines: (
+            threads.append(threading.get_ident()) or append(file, lines)
+        ),
+    )
+    path = str(tmp_path / "checkpoint.jsonl")
+    runner = WorkflowBatchRunner(_mock_app(), "key", checkpoint_path=path)
+
+    rows = [{"x": i} for i in range(10)]
+    assert len([r async for r in runner.run(rows, TEMPLATE)]) == 10
+    assert any(thread != loop_thread for thread in threads)
+    assert runner.completed_indices() == set(range(10))
+
+
+def test_invalid_max_pending():
+    """测试积压上限小于并发数"""
+    with pytest.raises(ValueError, match="积压上限"):
+        WorkflowBatchRunner(_mock_app(), "key", concurrency=4, max_pending=2)
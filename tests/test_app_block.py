@@ -0,0 +1,89 @@
+"""
+测试阻塞模式的补全与工作流执行
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from dify.app import DifyApp
+from dify.app.schemas import (
+    CompletionResponse,
+    RunWorkflowPayloads,
+    WorkflowRunResponse,
+    WorkflowStatus,
+)
+
+
+@pytest.fixture
+def api_client():
+    return AsyncMock()
+
+
+@pytest.fixture
+def dify_app(api_client):
+    admin_client = MagicMock()
+    admin_client.create_api_client.return_value = api_client
+    return DifyApp(admin_client)
+
+
+@pytest.mark.asyncio
+async def test_run_block(dify_app, api_client):
+    """测试阻塞模式运行工作流"""
+    api_client.post.return_value = {
+        "task_id": "task1",
+        "workflow_run_id": "run1",
+        "data": {
+            "id": "run1",
+            "workflow_id": "wf1",
+            "status": "succeeded",
+            "outputs": {"text": "完成"},
+            "elapsed_time": 0.5,
+            "total_tokens": 10,
+            "total_steps": 3,
+            "created_at": 1,
+            "finished_at": 2,
+        },
+    }
+
+    result = await dify_app.run_block(
+        "key", RunWorkflowPayloads(inputs={"q": "1"}, user="u1")
+    )
+
+    assert isinstance(result, WorkflowRunResponse)
+    assert result.data.status == WorkflowStatus.SUCCEEDED
+    assert result.data.outputs == {"text": "完成"}
+    call = api_client.post.call_args
+    assert call[0][0] == "/workflows/run"
+    assert call[1]["json"]["response_mode"] == "blocking"
+    assert call[1]["json"]["inputs"] == {"q": "1"}
+
+
+@pytest.mark.asyncio
+async def test_completion_block(dify_app, api_client):
+    """测试阻塞模式补全"""
+    api_client.post.return_value = {
+        "event": "message",
+        "task_id": "task1",
+        "id": "msg1",
+        "message_id": "msg1",
+        "mode": "completion",
+        "answer": "你好",
+        "metadata": {"retriever_resources": []},
+        "created_at": 1,
+    }
+
+    result = await dify_app.completion_block("key", RunWorkflowPayloads(user="u1"))
+
+    assert isinstance(result, CompletionResponse)
+    assert result.answer == "你好"
+    assert result.message_id == "msg1"
+    call = api_client.post.call_args
+    assert call[0][0] == "/completion-messages"
+    assert call[1]["json"]["response_mode"] == "blocking"
+
+
+@pytest.mark.asyncio
+async def test_run_block_empty_key(dify_app):
+    """测试API密钥为空"""
+    with pytest.raises(ValueError, match="API密钥不能为空"):
+        await dify_app.run_block("", RunWorkflowPayloads())
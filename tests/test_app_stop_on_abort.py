@@ -0,0 +1,145 @@
+"""
+测试流式请求中断时自动停止服务端任务
+"""
+
+import asyncio
+from contextlib import aclosing
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from dify.app import DifyApp
+from dify.app.schemas import ChatPayloads, RunWorkflowPayloads
+
+
+def sse(*events):
+    return [f"data: {event}\n\n".encode() for event in events]
+
+
+CHUNKS = sse(
+    '{"event": "message", "task_id": "task-1", "message_id": "m1", '
+    '"conversation_id": "c1", "answer": "你", "created_at": 1}',
+    '{"event": "message", "task_id": "task-1", "message_id": "m1", '
+    '"conversation_id": "c1", "answer": "好", "created_at": 1}',
+    '{"event": "message_end", "task_id": "task-1", "message_id": "m1", '
+    '"conversation_id": "c1", "metadata": {}}',
+)
+
+
+@pytest.fixture
+def api_client():
+    client = AsyncMock()
+
+    async def stream(*args, **kwargs):
+        for chunk in CHUNKS:
+            yield chunk
+            await asyncio.sleep(0)
+
+    client.stream = MagicMock(side_effect=stream)
+    return client
+
+
+@pytest.fixture
+def dify_app(api_client):
+    admin_client = MagicMock()
+    admin_client.create_api_client.return_value = api_client
+    return DifyApp(admin_client, stop_on_abort=True)
+
+
+@pytest.mark.asyncio
+async def test_stop_on_break(dify_app, api_client):
+    """测试提前退出循环时停止服务端任务"""
+    stream = dify_app.chat("key", ChatPayloads(query="hi", user="u1"))
+    async with aclosing(stream) as events:
+        async for _ in events:
+            break
+    await dify_app.wait_stopping()
+
+    api_client.post.assert_awaited_once()
+    call = api_client.post.call_args
+    assert call[0][0] == "/chat-messages/task-1/stop"
+    assert call[1]["json"] == {"user": "u1"}
+
+
+@pytest.mark.asyncio
+async def test_stop_workflow_on_cancel(dify_app, api_client):
+    """测试等待上游时任务被取消，停止工作流"""
+    started = asyncio.Event()
+
+    async def slow_stream(*args, **kwargs):
+        yield CHUNKS[0]
+        await asyncio.sleep(10)
+        yield CHUNKS[1]
+
+    api_client.stream.side_effect = slow_stream
+
+    async def consume():
+        async for _ in dify_app.run("key", RunWorkflowPayloads(user="u1")):
+            started.set()
+
+    task = asyncio.create_task(consume())
+    await started.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await dify_app.wait_stopping()
+
+    assert api_client.post.call_args[0][0] == "/workflows/tasks/task-1/stop"
+
+
+@pytest.mark.asyncio
+async def test_no_stop_when_completed(dify_app, api_client):
+    """测试正常结束时不发送停止请求"""
+    stream = dify_app.chat("key", ChatPayloads(query="hi", user="u1"))
+    events = [e async for e in stream]
+    await dify_app.wait_stopping()
+
+    assert len(events) == 3
+    api_client.post.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_stop_timeout(dify_app, api_client):
+    """测试停止请求超时不影响调用方"""
+    dify_app.stop_timeout = 0.01
+
+    async def slow_post(*args, **kwargs):
+        await asyncio.sleep(10)
+
+    api_client.post.side_effect = slow_post
+    stream = dify_app.completion("key", RunWorkflowPayloads(user="u1"))
+    async with aclosing(stream) as events:
+        async for _ in events:
+            break
+    await asyncio.wait_for(dify_app.wait_stopping(), timeout=1)
+
+    assert api_client.post.call_args[0][0] == "/completion-messages/task-1/stop"
+
+
+@pytest.mark.asyncio
+async def test_no_stop_by_default(api_client):
+    """测试默认不自动停止服务端任务"""
+    admin_client = MagicMock()
+    admin_client.create_api_client.return_value = api_client
+    dify_app = DifyApp(admin_client)
+
+    stream = dify_app.chat("key", ChatPayloads(query="hi", user="u1"))
+    async with aclosing(stream) as events:
+        async for _ in events:
+            break
+    await dify_app.wait_stopping()
+
+    api_client.post.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_no_stop_after_terminal_event(dify_app, api_client):
+    """测试收到message_end后退出循环时不发送停止请求"""
+    stream = dify_app.chat("key", ChatPayloads(query="hi", user="u1"))
+    async with aclosing(stream) as events:
+        async for event in events:
+            if event.event == "message_end":
+                break
+    await dify_app.wait_stopping()
+
+    api_client.post.assert_not_called()
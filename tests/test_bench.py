@@ -0,0 +1,110 @@
+"""
+测试压测工具
+"""
+
+import json
+import time
+
+import pytest
+
+from dify.app import DifyApp
+from dify.bench import LoadGenerator, StandInServer, percentile
+from dify.bench.__main__ import main
+from dify.app.schemas import ChatPayloads, RunWorkflowPayloads
+from dify.http import AdminClient
+
+
+def test_percentile():
+    """测试分位数计算"""
+    values = list(range(1, 101))
+    assert percentile(values, 50) == pytest.approx(50.5)
+    assert percentile(values, 100) == 100
+    assert percentile([], 50) is None
+
+
+@pytest.mark.asyncio
+async def test_closed_loop_chat():
+    """测试闭环模式压测对话应用"""
+    async with StandInServer(ttft=0.01, token_interval=0, tokens=5) as server:
+        generator = LoadGenerator(
+            DifyApp(AdminClient(server.base_url, "")),
+            "key",
+            "chat",
+            [ChatPayloads(query="hi", user="u1")],
+            concurrency=4,
+            requests=12,
+        )
+        report = await generator.run()
+
+    assert report.requests == 12
+    assert report.errors == 0
+    assert server.requests == 12
+    assert all(r.tokens == 5 for r in generator.results)
+    assert report.ttft.p50 is not None
+    assert report.latency.p99 >= report.ttft.p50
+    assert sum(report.timeline) == 12
+
+
+@pytest.mark.asyncio
+async def test_open_loop_errors():
+    """测试开环模式压测工作流并统计错误"""
+    server = StandInServer(ttft=0, token_interval=0, tokens=3, error_rate=1.0)
+    async with server:
+        generator = LoadGenerator(
+            DifyApp(AdminClient(server.base_url, "")),
+            "key",
+            "run",
+            [RunWorkflowPayloads(user="u1")],
+            rate=200,
+            loop="open",
+            requests=5,
+        )
+        report = await generator.run()
+
+    assert report.requests == 5
+    assert report.error_rate == 1.0
+    assert all(r.error for r in generator.results)
+
+
+@pytest.mark.asyncio
+async def test_cli(tmp_path):
+    """测试命令行使用本地模拟服务并输出结果"""
+    output = tmp_path / "results.json"
+    report = tmp_path / "report.json"
+
+    code = await main([
+        "--requests", "4", "--concurrency", "2", "--stand-in-ttft", "0",
+        "--stand-in-tokens", "2", "--output", str(output), "--report", str(report),
+    ])
+
+    assert code == 0
+    assert len(json.loads(output.read_text(encoding="utf-8"))) == 4
+    assert json.loads(report.read_text(encoding="utf-8"))["requests"] == 4
+
+
+@pytest.mark.asyncio
+async def test_open_loop_follows_schedule(monkeypatch):
+    """测试开环模式按计划时间发起请求，事件循环被阻塞时延迟从计划时间开始计算"""
+    monkeypatch.setattr("dify.bench.runner.random.expovariate", lambda rate: 0.02)
+
+    class App:
+        calls = 0
+
+        async def chat(self, api_key, payloads):
+            App.calls += 1
+            if App.calls == 1:
+                time.sleep(0.1)
+            return
+            yield
+
+    generator = LoadGenerator(
+        App(), "key", "chat", [ChatPayloads(query="hi", user="u1")],
+        rate=50, loop="open", requests=5,
+    )
+    await generator.run()
+
+    assert [r.start for r in generator.results] == pytest.approx(
+        [0, 0.02, 0.04, 0.06, 0.08]
+    )
+    # 第2个请求计划在0.02秒发出，但事件循环被阻塞到0.1秒之后
+    assert generator.results[1].latency >= 0.07
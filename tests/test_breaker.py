@@ -0,0 +1,152 @@
+"""
+测试熔断器
+"""
+
+import httpx
+import pytest
+
+from dify.breaker import (
+    BreakerState, CircuitBreakerPolicy, CircuitBreakerRegistry, url_template
+)
+from dify.exceptions import CircuitOpenException, DifyException
+from dify.hooks import BREAKER_REJECTED, BREAKER_STATE, REQUEST, Hooks
+from dify.http import AdminClient
+
+
+def test_url_template():
+    """测试URL模板归一化"""
+    assert url_template(
+        "http://dify.test/console/api/apps/3fa85f64-5717-4562-b3fc-2c963f66afa6/api-keys/12?x=1"
+    ) == "dify.test/console/api/apps/{id}/api-keys/{id}"
+
+
+def test_state_machine(clock):
+    """测试关闭、打开、半开状态转换"""
+    hooks = Hooks()
+    events = []
+    hooks.on("*", lambda event, data: events.append((event, data)))
+    registry = CircuitBreakerRegistry(
+        CircuitBreakerPolicy(window_size=4, min_calls=4, failure_rate_threshold=0.5,
+                             open_duration=10, half_open_calls=2),
+        hooks, clock,
+    )
+    breaker = registry.get("http://dify.test/v1/chat-messages")
+
+    for failed in (False, True, False, True):
+        breaker.before()
+        breaker.after(failed, 0.1)
+    assert breaker.state == BreakerState.OPEN
+    with pytest.raises(CircuitOpenException) as excinfo:
+        breaker.before()
+    assert excinfo.value.retry_after == pytest.approx(10)
+
+    clock.now += 10
+    breaker.before()
+    breaker.before()
+    assert breaker.state == BreakerState.HALF_OPEN
+    with pytest.raises(CircuitOpenException):
+        breaker.before()
+    breaker.after(False, 0.1)
+    breaker.after(False, 0.1)
+    assert breaker.state == BreakerState.CLOSED
+
+    states = [(d["old_state"], d["new_state"]) for e, d in events if e == BREAKER_STATE]
+    assert states == [
+        ("closed", "open"), ("open", "half_open"), ("half_open", "closed")
+    ]
+    assert sum(1 for e, _ in events if e == BREAKER_REJECTED) == 2
+
+
+def test_slow_calls_and_half_open_failure(clock):
+    """测试慢请求触发熔断，半开状态失败时重新打开"""
+    registry = CircuitBreakerRegistry(
+        CircuitBreakerPolicy(window_size=2, min_calls=2, slow_call_duration=1,
+                             slow_call_rate_threshold=1.0, open_duration=5),
+        clock=clock,
+    )
+    breaker = registry.get("http://dify.test/v1/workflows/run")
+    breaker.after(False, 2)
+    breaker.after(False, 3)
+    assert breaker.state == BreakerState.OPEN
+
+    clock.now += 5
+    breaker.before()
+    breaker.after(True, 0.1)
+    assert breaker.state == BreakerState.OPEN
+    assert breaker.opened_at == clock.now
+
+
+@pytest.mark.asyncio
+async def test_client_fast_fail():
+    """测试客户端在熔断器打开后不再发送请求"""
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(500, json={"message": "provider down"})
+
+    hooks = Hooks()
+    requests = []
+    hooks.on(REQUEST, lambda event, data: requests.append(data["status_code"]))
+    registry = CircuitBreakerRegistry(
+        CircuitBreakerPolicy(window_size=2, min_calls=2), hooks
+    )
+    admin = AdminClient(
+        "http://dify.test", "key", httpx.MockTransport(handler), hooks, registry
+    )
+    client = admin.create_api_client("app-key")
+
+    for _ in range(2):
+        with pytest.raises(DifyException, match="500"):
+            await client.post("/chat-messages", json={})
+    with pytest.raises(CircuitOpenException):
+        await client.post("/chat-messages", json={})
+
+    assert len(calls) == 2
+    assert requests == [500, 500]
+    assert registry.states() == {"dify.test/v1/chat-messages": BreakerState.OPEN}
+    # 其他接口不受影响
+    with pytest.raises(DifyException, match="500"):
+        await admin.get("/apps")
+
+
+@pytest.mark.asyncio
+async def test_stream_failure_after_headers():
+    """测试流式响应在收到200之后中断也计为失败，正常读完的流计为成功"""
+
+    class Broken(httpx.AsyncByteStream):
+        async def __aiter__(self):
+            yield b'data: {"event": "message"}\n\n'
+            raise httpx.ReadTimeout("read timed out")
+
+    broken = True
+
+    def handler(request):
+        if broken:
+            return httpx.Response(200, stream=Broken())
+        return httpx.Response(200, content=b'data: {"event": "message_end"}\n\n')
+
+    registry = CircuitBreakerRegistry(CircuitBreakerPolicy(window_size=3, min_calls=3))
+    admin = AdminClient(
+        "http://dify.test", "key", httpx.MockTransport(handler), breakers=registry
+    )
+    client = admin.create_api_client("app-key")
+    breaker = registry.get("http://dify.test/v1/chat-messages")
+
+    async def consume():
+        return [chunk async for chunk in client.stream("/chat-messages", json={})]
+
+    with pytest.raises(httpx.ReadTimeout):
+        await consume()
+    assert breaker.failure_rate == 1.0
+
+    broken = False
+    await consume()
+    assert breaker.failure_rate == 0.5 and breaker.state == BreakerState.CLOSED
+
+    broken = True
+    with pytest.raises(httpx.ReadTimeout):
+        await consume()
+    assert breaker.state == BreakerState.OPEN
+    with pytest.raises(CircuitOpenException):
+        await consume()
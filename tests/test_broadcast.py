@@ -0,0 +1,106 @@
+"""
+测试事件流广播
+"""
+
+import asyncio
+
+import pytest
+
+from dify.broadcast import Broadcast, SlowConsumerPolicy, tee
+from dify.exceptions import SlowConsumerException
+
+
+class Source:
+    """可观察关闭状态的上游事件流"""
+
+    def __init__(self, items, error=None):
+        self.items = items
+        self.error = error
+        self.produced = 0
+        self.closed = False
+
+    def __aiter__(self):
+        return self._gen()
+
+    async def _gen(self):
+        try:
+            for item in self.items:
+                self.produced += 1
+                yield item
+                await asyncio.sleep(0)
+            if self.error:
+                raise self.error
+        finally:
+            self.closed = True
+
+
+async def collect(subscription):
+    return [item async for item in subscription]
+
+
+@pytest.mark.asyncio
+async def test_tee_shares_events():
+    """测试所有订阅者收到相同的事件对象"""
+    items = [object() for _ in range(10)]
+    a, b, c = tee(Source(items), n=3, maxsize=2)
+
+    results = await asyncio.gather(collect(a), collect(b), collect(c))
+
+    for result in results:
+        assert len(result) == 10
+        assert all(x is y for x, y in zip(result, items))
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest():
+    """测试慢订阅者丢弃最早的事件"""
+    broadcast = Broadcast(Source(list(range(10))), maxsize=3)
+    fast = broadcast.subscribe()
+    slow = broadcast.subscribe(policy=SlowConsumerPolicy.DROP_OLDEST)
+
+    assert await collect(fast) == list(range(10))
+    result = await collect(slow)
+    assert result == [7, 8, 9]
+    assert slow.dropped == 7
+
+
+@pytest.mark.asyncio
+async def test_disconnect_slow_consumer():
+    """测试慢订阅者被断开，其他订阅者不受影响"""
+    broadcast = Broadcast(Source(list(range(10))), maxsize=2)
+    fast = broadcast.subscribe()
+    slow = broadcast.subscribe(policy=SlowConsumerPolicy.DISCONNECT)
+
+    assert await collect(fast) == list(range(10))
+    assert slow.closed
+    with pytest.raises(SlowConsumerException):
+        await slow.__anext__()
+
+
+@pytest.mark.asyncio
+async def test_stop_upstream_when_all_unsubscribed():
+    """测试所有订阅者取消后上游被关闭"""
+    source = Source(list(range(100)))
+    a, b = tee(source, maxsize=1)
+
+    assert await a.__anext__() == 0
+    assert await b.__anext__() == 0
+    await a.aclose()
+    assert not source.closed
+    await b.aclose()
+
+    assert source.closed
+    assert source.produced < 100
+
+
+@pytest.mark.asyncio
+async def test_upstream_error():
+    """测试上游出错时订阅者先收到缓冲的事件再收到异常"""
+    a, b = tee(Source([1, 2], error=RuntimeError("boom")))
+
+    for subscription in (a, b):
+        received = []
+        with pytest.raises(RuntimeError, match="boom"):
+            async for item in subscription:
+                received.append(item)
+        assert received == [1, 2]
@@ -0,0 +1,254 @@
+"""
+测试GET响应的重新验证缓存
+"""
+
+import time
+
+import httpx
+import pytest
+
+import dify.cache
+from dify.cache import ResponseCache
+from dify.http import AdminClient
+from dify.llm import DifyLLM
+from dify.llm.schemas import LLMList
+from dify.tag import DifyTag
+from dify.tag.schemas import TagType
+
+
+def etag_transport(body, etag='"v1"'):
+    """支持ETag的模拟服务，记录收到的条件请求头"""
+    state = {"calls": 0, "conditional": []}
+
+    def handler(request):
+        state["calls"] += 1
+        state["conditional"].append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        return httpx.Response(200, json=body, headers={"ETag": etag})
+
+    return httpx.MockTransport(handler), state
+
+
+@pytest.mark.asyncio
+async def test_not_modified_served_from_cache():
+    """测试发送If-None-Match，304时返回缓存的解码结果"""
+    transport, state = etag_transport({"data": [1, 2]})
+    cache = ResponseCache()
+    client = AdminClient("http://dify.test", "key", transport, cache=cache)
+
+    first = await client.get("/apps/1")
+    second = await client.get("/apps/1")
+
+    assert second is first
+    assert state["conditional"] == [None, '"v1"']
+    assert cache.not_modified == 1
+    assert cache.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_last_modified_validator():
+    """测试发送If-Modified-Since"""
+    received = []
+
+    def handler(request):
+        received.append(request.headers.get("If-Modified-Since"))
+        if request.headers.get("If-Modified-Since"):
+            return httpx.Response(304)
+        return httpx.Response(
+            200,
+            json={"id": 1},
+            headers={"Last-Modified": "Wed, 21 Oct 2026 07:28:00 GMT"},
+        )
+
+    client = AdminClient(
+        "http://dify.test", "key", httpx.MockTransport(handler), cache=ResponseCache()
+    )
+
+    assert await client.get("/tags") == await client.get("/tags")
+    assert received == [None, "Wed, 21 Oct 2026 07:28:00 GMT"]
+
+
+@pytest.mark.asyncio
+async def test_content_hash_fallback():
+    """测试没有校验器时按响应体摘要判断内容是否变化"""
+    bodies = [{"v": 1}, {"v": 1}, {"v": 2}]
+
+    def handler(request):
+        return httpx.Response(200, json=bodies.pop(0))
+
+    cache = ResponseCache()
+    client = AdminClient(
+        "http://dify.test", "key", httpx.MockTransport(handler), cache=cache
+    )
+
+    first = await client.get("/apps/1")
+    second = await client.get("/apps/1")
+    third = await client.get("/apps/1")
+
+    assert second is first
+    assert third == {"v": 2} and third is not first
+    assert cache.unchanged == 1
+    assert cache.misses == 2
+
+
+@pytest.mark.asyncio
+async def test_validation_reused_when_unchanged(monkeypatch):
+    """测试内容没有变化时跳过pydantic校验，返回上次的模型"""
+    body = {
+        "data": [
+            {
+                "tenant_id": "t1",
+                "provider": "openai",
+                "label": {"zh_Hans": "OpenAI", "en_US": "OpenAI"},
+                "icon_small": {"zh_Hans": "", "en_US": ""},
+                "icon_large": {"zh_Hans": "", "en_US": ""},
+                "status": "active",
+                "models": [],
+            }
+        ]
+    }
+    transport, state = etag_transport(body)
+    client = AdminClient("http://dify.test", "key", transport, cache=ResponseCache())
+    llm = DifyLLM(client)
+    validated = []
+    validate = dify.cache._validate
+    monkeypatch.setattr(
+        dify.cache,
+        "_validate",
+        lambda data, model: validated.append(model) or validate(data, model),
+    )
+
+    first = await llm.find_list()
+    second = await llm.find_list()
+
+    assert second is first
+    assert len(validated) == 1
+    assert state["calls"] == 2
+
+
+@pytest.mark.asyncio
+async def test_tag_list_returns_new_list():
+    """测试标签列表复用校验结果，每次返回新的列表"""
+    transport, _ = etag_transport(
+        [{"id": "1", "name": "a", "type": "app", "binding_count": 0}]
+    )
+    client = AdminClient("http://dify.test", "key", transport, cache=ResponseCache())
+    tag = DifyTag(client)
+
+    first = await tag.list(TagType.APP)
+    second = await tag.list(TagType.APP)
+
+    assert first is not second
+    assert first[0] is second[0]
+
+
+def test_hit_cheaper_than_validation():
+    """测试复用校验结果比重新校验快得多"""
+    provider = {
+        "tenant_id": "t1",
+        "provider": "openai",
+        "label": {"zh_Hans": "OpenAI", "en_US": "OpenAI"},
+        "icon_small": {"zh_Hans": "", "en_US": ""},
+        "icon_large": {"zh_Hans": "", "en_US": ""},
+        "status": "active",
+        "models": [
+            {
+                "model": f"m{i}",
+                "label": {"zh_Hans": f"模型{i}", "en_US": f"Model {i}"},
+                "model_type": "llm",
+                "features": ["tool-call"],
+                "fetch_from": "predefined-model",
+                "model_properties": {"mode": "chat", "context_size": 8192},
+                "deprecated": False,
+                "status": "active",
+                "load_balancing_enabled": False,
+            }
+            for i in range(30)
+        ],
+    }
+    data = {"data": [{**provider, "provider": f"p{i}"} for i in range(30)]}
+    cache = ResponseCache()
+    cache._store("k", dify.cache.CacheEntry(data, "digest"))
+    first = cache.validate(data, LLMList)
+
+    def best(func):
+        timings = []
+        for _ in range(5):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    assert cache.validate(data, LLMList) is first
+    hit = best(lambda: cache.validate(data, LLMList))
+    assert hit * 10 < best(lambda: LLMList.model_validate(data))
+
+
+@pytest.mark.asyncio
+async def test_not_modified_after_eviction():
+    """测试发出条件请求后条目被淘汰，收到304时重新请求完整的响应"""
+    cache = ResponseCache()
+    received = []
+
+    def handler(request):
+        received.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match"):
+            cache.clear()
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, json={"v": 1}, headers={"ETag": '"v1"'})
+
+    client = AdminClient(
+        "http://dify.test", "key", httpx.MockTransport(handler), cache=cache
+    )
+
+    await client.get("/apps/1")
+    assert await client.get("/apps/1") == {"v": 1}
+    assert received == [None, '"v1"', None]
+
+
+@pytest.mark.asyncio
+async def test_keys_separate_params_and_auth():
+    """测试不同的查询参数和密钥分别缓存"""
+    transport, state = etag_transport({"ok": True})
+    cache = ResponseCache()
+    client = AdminClient("http://dify.test", "key", transport, cache=cache)
+    other = AdminClient("http://dify.test", "other", transport, cache=cache)
+
+    await client.get("/tags", params={"type": "app"})
+    await client.get("/tags", params={"type": "knowledge"})
+    await other.get("/tags", params={"type": "app"})
+
+    assert state["conditional"] == [None, None, None]
+    assert len(cache) == 3
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_and_no_store():
+    """测试超过容量时淘汰最久未使用的条目，no-store响应不缓存"""
+
+    def handler(request):
+        headers = {}
+        if request.url.path.endswith("/private"):
+            headers["Cache-Control"] = "no-store"
+        return httpx.Response(200, json={"path": request.url.path}, headers=headers)
+
+    cache = ResponseCache(max_entries=2)
+    client = AdminClient(
+        "http://dify.test", "key", httpx.MockTransport(handler), cache=cache
+    )
+
+    await client.get("/a")
+    await client.get("/b")
+    await client.get("/a")
+    await client.get("/c")
+    await client.get("/private")
+
+    paths = [key[0] for key in cache.entries]
+    assert paths == ["http://dify.test/console/api/a", "http://dify.test/console/api/c"]
+
+
+def test_invalid_max_entries():
+    """测试缓存容量无效时抛出异常"""
+    with pytest.raises(ValueError):
+        ResponseCache(max_entries=0)
@@ -0,0 +1,113 @@
+"""
+测试录制与回放传输层
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from dify.app import DifyApp
+from dify.app.schemas import ChatPayloads
+from dify.cassette import RecordingTransport, ReplayTransport
+from dify.exceptions import CassetteMissException
+from dify.http import AdminClient
+
+# 故意把一个事件拆到两个分块中
+CHUNKS = [
+    b'data: {"event": "message", "task_id": "t1", "message_id": "m1", ',
+    b'"conversation_id": "c1", "answer": "hi", "created_at": 1}\n\n',
+    b'event: ping\n\n',
+]
+
+
+class FakeServer(httpx.AsyncBaseTransport):
+    """模拟的服务端，分块之间间隔一段时间"""
+
+    def __init__(self, gap: float = 0.05):
+        self.gap = gap
+        self.requests = []
+
+    async def handle_async_request(self, request):
+        self.requests.append(request)
+        gap = self.gap
+
+        class Stream(httpx.AsyncByteStream):
+            async def __aiter__(self):
+                for chunk in CHUNKS:
+                    await asyncio.sleep(gap)
+                    yield chunk
+
+        return httpx.Response(
+            200, headers={"Content-Type": "text/event-stream"}, stream=Stream()
+        )
+
+
+async def raw_chunks(transport):
+    admin_client = AdminClient("http://dify.test", "admin", transport=transport)
+    client = admin_client.create_api_client("app-key")
+    chunks = client.stream("/chat-messages", json={"query": "hi"})
+    return [chunk async for chunk in chunks]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", ["cassette.jsonl", "cassette.jsonl.gz"])
+async def test_record_and_replay_bytes(tmp_path, name):
+    """测试回放的字节和分块边界与录制时一致"""
+    path = str(tmp_path / name)
+    server = FakeServer(gap=0)
+    recorded = await raw_chunks(RecordingTransport(path, server))
+    assert recorded == CHUNKS
+    assert len(server.requests) == 1
+
+    replayed = await raw_chunks(ReplayTransport(path, speed=None))
+    assert replayed == CHUNKS
+    assert "app-key" not in open(path, "rb").read().decode("latin-1")
+
+
+@pytest.mark.asyncio
+async def test_replay_speed(tmp_path):
+    """测试按原速和最快速度回放"""
+    path = str(tmp_path / "cassette.jsonl")
+    await raw_chunks(RecordingTransport(path, FakeServer(gap=0.05)))
+
+    start = time.perf_counter()
+    await raw_chunks(ReplayTransport(path, speed=1))
+    original = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await raw_chunks(ReplayTransport(path, speed=None))
+    fastest = time.perf_counter() - start
+
+    assert original >= 0.12
+    assert fastest < original
+
+
+@pytest.mark.asyncio
+async def test_replay_chat_events(tmp_path):
+    """测试DifyApp.chat可以直接消费回放的事件流"""
+    path = str(tmp_path / "cassette.jsonl")
+    payloads = ChatPayloads(query="hi", user="u1")
+    recorder = RecordingTransport(path, FakeServer(0))
+    record_app = DifyApp(AdminClient("http://dify.test", "admin", recorder))
+    recorded = [e async for e in record_app.chat("app-key", payloads)]
+
+    replay_app = DifyApp(
+        AdminClient("http://dify.test", "admin", ReplayTransport(path, speed=None))
+    )
+    replayed = [e async for e in replay_app.chat("app-key", payloads)]
+
+    assert [e.model_dump() for e in replayed] == [e.model_dump() for e in recorded]
+    assert replayed[0].answer == "hi"
+
+
+@pytest.mark.asyncio
+async def test_replay_miss(tmp_path):
+    """测试请求不在录制文件中"""
+    path = str(tmp_path / "cassette.jsonl")
+    await raw_chunks(RecordingTransport(path, FakeServer(0)))
+    client = AdminClient("http://dify.test", "admin", ReplayTransport(path))
+
+    with pytest.raises(CassetteMissException):
+        await client.get("/apps")
@@ -0,0 +1,126 @@
+"""
+测试压缩协商和压缩统计
+"""
+
+import gzip
+import json
+
+import httpx
+import pytest
+
+from dify.compression import Compression
+from dify.http import AdminClient
+
+BODY = {"data": [{"id": str(i), "name": "应用" * 20} for i in range(200)]}
+
+
+class Chunks(httpx.AsyncByteStream):
+    """按块返回的响应体，模拟从网络读取"""
+
+    def __init__(self, content: bytes, size: int = 256) -> None:
+        self.parts = [content[i:i + size] for i in range(0, len(content), size)]
+
+    async def __aiter__(self):
+        for part in self.parts:
+            yield part
+
+
+def gzip_transport(received):
+    """返回gzip压缩响应的模拟服务"""
+
+    def handler(request):
+        received.append(request)
+        content = gzip.compress(json.dumps(BODY).encode("utf-8"))
+        return httpx.Response(
+            200, stream=Chunks(content), headers={"Content-Encoding": "gzip"}
+        )
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.asyncio
+async def test_response_bytes_saved():
+    """测试发送Accept-Encoding并统计响应压缩节省的字节数"""
+    received = []
+    client = AdminClient("http://dify.test", "key", gzip_transport(received))
+
+    assert await client.get("/apps") == BODY
+    assert "gzip" in received[0].headers["Accept-Encoding"].split(", ")
+    stats = client.compression
+    assert stats.responses == 1
+    assert stats.encodings == {"gzip": 1}
+    assert stats.response_decoded_bytes == len(json.dumps(BODY).encode("utf-8"))
+    assert 0 < stats.response_wire_bytes < stats.response_decoded_bytes
+    assert stats.bytes_saved == stats.response_bytes_saved > 0
+    assert client.create_api_client("app-key").compression is stats
+
+
+@pytest.mark.asyncio
+async def test_stream_decompressed_incrementally():
+    """测试流式响应逐块解压"""
+    events = b"".join(f"data: {{\"n\": {i}}}\n\n".encode() for i in range(500))
+    compressed = gzip.compress(events)
+
+    def handler(request):
+        return httpx.Response(
+            200, stream=Chunks(compressed), headers={"Content-Encoding": "gzip"}
+        )
+
+    client = AdminClient("http://dify.test", "key", httpx.MockTransport(handler))
+    stream = client.stream("/chat-messages", json={"query": "hi"})
+    chunks = [chunk async for chunk in stream]
+
+    assert len(chunks) > 1
+    assert b"".join(chunks) == events
+    assert client.compression.response_wire_bytes == len(compressed)
+    assert client.compression.response_decoded_bytes == len(events)
+
+
+@pytest.mark.asyncio
+async def test_large_request_body_compressed():
+    """测试超过阈值的请求体被gzip压缩"""
+    received = []
+
+    def handler(request):
+        received.append(request)
+        return httpx.Response(200, json={"result": "success"})
+
+    compression = Compression(request_threshold=1024)
+    client = AdminClient(
+        "http://dify.test", "key", httpx.MockTransport(handler), compression=compression
+    )
+    payload = {"inputs": {"text": "长文本" * 1000}}
+
+    await client.post("/workflows/run", json=payload)
+    await client.post("/workflows/run", json={"inputs": {}})
+
+    large, small = received
+    assert large.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(large.content)) == payload
+    assert "Content-Encoding" not in small.headers
+    assert compression.compressed_requests == 1
+    assert compression.request_bytes_saved > 0
+
+
+@pytest.mark.asyncio
+async def test_requests_not_compressed_by_default():
+    """测试默认不压缩请求体"""
+    received = []
+
+    def handler(request):
+        received.append(request)
+        return httpx.Response(200, json={})
+
+    client = AdminClient("http://dify.test", "key", httpx.MockTransport(handler))
+    await client.post("/workflows/run", json={"inputs": {"text": "x" * 10000}})
+
+    assert "Content-Encoding" not in received[0].headers
+    assert client.compression.compressed_requests == 0
+
+
+def test_invalid_config():
+    """测试无效配置"""
+    with pytest.raises(ValueError):
+        Compression(request_threshold=-1)
+    with pytest.raises(ValueError):
+        Compression(level=0)
@@ -0,0 +1,144 @@
+"""
+测试会话消息导出功能
+"""
+
+import json
+
+import pytest
+from unittest.mock import AsyncMock
+
+from dify.app.conversation.export import (
+    ConversationExporter, JsonlWriter, ParquetWriter
+)
+from dify.app.conversation.schemas import ConversationList, MessageList
+from dify.app.conversation.sync import MemoryCursorStore
+
+
+def _conversation(conversation_id: str, updated_at: int) -> dict:
+    return {
+        "id": conversation_id,
+        "name": f"会话{conversation_id}",
+        "inputs": {},
+        "status": "normal",
+        "introduction": "",
+        "created_at": 0,
+        "updated_at": updated_at,
+    }
+
+
+@pytest.fixture
+def mock_conversation():
+    conversation = AsyncMock()
+    conversation.find_list.return_value = ConversationList.model_validate({
+        "data": [_conversation("c1", 10)],
+        "has_more": False,
+        "limit": 100,
+    })
+    conversation.get_messages.return_value = MessageList.model_validate({
+        "data": [
+            {
+                "id": "m1",
+                "query": "你好",
+                "answer": "你好！",
+                "created_at": 1,
+                "feedback": {"rating": "like"},
+                "agent_thoughts": [{"id": "t1", "thought": "思考"}],
+            },
+            {"id": "m2", "query": "再见", "answer": "再见！", "created_at": 2},
+        ],
+        "has_more": False,
+    })
+    return conversation
+
+
+@pytest.mark.asyncio
+async def test_export_jsonl(tmp_path, mock_conversation):
+    """测试导出到JSONL并续传"""
+    path = str(tmp_path / "messages.jsonl")
+    store = MemoryCursorStore()
+    exporter = ConversationExporter(mock_conversation, store, flush_every=1)
+
+    count = await exporter.export("key", "user1", JsonlWriter(path), scope="app1")
+    assert count == 2
+
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert [r["message_id"] for r in records] == ["m1", "m2"]
+    assert records[0]["conversation_name"] == "会话c1"
+    assert records[0]["feedback_rating"] == "like"
+    assert records[0]["agent_thoughts"][0]["thought"] == "思考"
+
+    # 再次运行时没有新数据
+    assert await exporter.export("key", "user1", JsonlWriter(path), scope="app1") == 0
+    with open(path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 2
+
+
+@pytest.mark.asyncio
+async def test_export_many(tmp_path, mock_conversation):
+    """测试并发导出多个应用"""
+    exporter = ConversationExporter(mock_conversation, MemoryCursorStore())
+    jobs = [
+        ("key1", "user1", JsonlWriter(str(tmp_path / "a.jsonl"))),
+        ("key2", "user1", JsonlWriter(str(tmp_path / "b.jsonl"))),
+    ]
+
+    assert await exporter.export_many(jobs) == [2, 2]
+
+
+@pytest.mark.asyncio
+async def test_export_parquet(tmp_path, mock_conversation):
+    """测试导出到Parquet"""
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "messages.parquet")
+    exporter = ConversationExporter(mock_conversation, MemoryCursorStore())
+
+    writer = ParquetWriter(path, row_group_size=1)
+    assert await exporter.export("key", "user1", writer) == 2
+
+    table = pq.read_table(path)
+    assert table.column("message_id").to_pylist() == ["m1", "m2"]
+    assert pq.ParquetFile(path).num_row_groups == 2
+
+
+@pytest.mark.asyncio
+async def test_export_parquet_parts_readable(tmp_path, mock_conversation):
+    """测试Parquet每次持久化都关闭分片文件，提交游标时已写出的分片都可读"""
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "messages.parquet")
+    writer = ParquetWriter(path)
+    writer.write({"message_id": "m1"})
+    writer.flush()
+
+    assert writer.paths == [path]
+    assert pq.read_table(path).column("message_id").to_pylist() == ["m1"]
+
+    writer.write({"message_id": "m2"})
+    writer.close()
+    second = str(tmp_path / "messages.part1.parquet")
+    assert writer.paths == [path, second]
+    assert pq.read_table(second).column("message_id").to_pylist() == ["m2"]
+
+    exporter = ConversationExporter(mock_conversation, MemoryCursorStore())
+    writer = ParquetWriter(
+        str(tmp_path / "export.parquet"), row_group_size=1, part_size=1
+    )
+    assert await exporter.export("key", "user1", writer) == 2
+    assert len(writer.paths) == 2
+    assert pq.ParquetDataset(writer.paths).read().num_rows == 2
+
+
+@pytest.mark.asyncio
+async def test_export_parquet_flushes_per_part(tmp_path, mock_conversation):
+    """测试导出器按Parquet分片大小持久化，行组达到配置的大小"""
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "messages.parquet")
+    exporter = ConversationExporter(
+        mock_conversation, MemoryCursorStore(), flush_every=1
+    )
+    writer = ParquetWriter(path, row_group_size=2)
+
+    assert writer.flush_every == 20
+    assert await exporter.export("key", "user1", writer) == 2
+    assert writer.paths == [path]
+    assert pq.ParquetFile(path).metadata.row_group(0).num_rows == 2
@@ -0,0 +1,154 @@
+"""
+测试本地消息全文索引功能
+"""
+
+import pytest
+
+from dify.app.conversation.schemas import Conversation, Message, MessageList
+from dify.app.conversation.search import MessageSearchIndex
+from dify.app.conversation.sync import SyncedMessage
+from dify.exceptions import DifyException
+
+
+@pytest.fixture
+def index():
+    index = MessageSearchIndex()
+    index.add_messages(
+        MessageList.model_validate({
+            "data": [
+                {
+                    "id": "m1", "conversation_id": "c1", "query": "如何申请退款流程",
+                    "answer": "请在订单页面提交申请", "created_at": 100,
+                },
+                {
+                    "id": "m2", "conversation_id": "c1", "query": "发票怎么开",
+                    "answer": "退款流程完成后可以开发票", "created_at": 200,
+                },
+                {
+                    "id": "m3", "conversation_id": "c2", "query": "reset my password",
+                    "answer": "use the login page", "created_at": 300,
+                },
+            ]
+        }),
+        scope="app1",
+        user="user1",
+    )
+    yield index
+    index.close()
+
+
+def test_search(index):
+    """测试关键词搜索与排序"""
+    hits = index.search("退款流程")
+
+    assert {hit.message_id for hit in hits} == {"m1", "m2"}
+    assert all("[" in hit.snippet for hit in hits)
+    assert hits[0].score <= hits[1].score
+
+
+def test_search_filters_and_pagination(index):
+    """测试过滤条件与分页"""
+    assert [hit.message_id for hit in index.search("退款流程", since=150)] == ["m2"]
+    assert [hit.message_id for hit in index.search("退款流程", until=150)] == ["m1"]
+    assert index.search("退款流程", scope="app2") == []
+    assert len(index.search("退款流程", limit=1)) == 1
+    assert len(index.search("退款流程", limit=1, offset=1)) == 1
+    assert [hit.message_id for hit in index.search("password", user="user1")] == ["m3"]
+
+
+def test_upsert_replaces_message(index):
+    """测试重复写入会覆盖旧记录"""
+    index.add_messages(
+        [Message(id="m3", query="change my email", answer="ok", created_at=300)]
+    )
+
+    assert index.count() == 3
+    assert index.search("password") == []
+    assert [hit.message_id for hit in index.search("email")] == ["m3"]
+    # 没有传入的范围、用户和会话保留原值
+    hits = index.search("email", scope="app1", user="user1")
+    assert [hit.message_id for hit in hits] == ["m3"]
+    assert index.search("email")[0].conversation_id == "c2"
+
+
+@pytest.mark.parametrize(
+    "tokenizer", ["unicode61", "porter unicode61", "trigram case_sensitive 0"]
+)
+def test_allowed_tokenizers(tokenizer):
+    """测试允许的分词器"""
+    MessageSearchIndex(tokenizer=tokenizer).close()
+
+
+@pytest.mark.parametrize(
+    "tokenizer", ["", "icu", "trigram'); DROP TABLE messages; --", "unicode61 'x'"]
+)
+def test_invalid_tokenizer(tokenizer):
+    """测试不受支持的分词器抛出异常"""
+    with pytest.raises(DifyException):
+        MessageSearchIndex(tokenizer=tokenizer)
+
+
+@pytest.mark.asyncio
+async def test_index_stream():
+    """测试消费同步流写入索引"""
+    conversation = Conversation(
+        id="c1", name="n", inputs={}, status="normal", introduction="", created_at=0,
+        updated_at=0,
+    )
+
+    async def stream():
+        for i in range(5):
+            yield SyncedMessage(
+                scope="app1",
+                user="user1",
+                conversation=conversation,
+                message=Message(
+                    id=f"m{i}", query=f"question number {i}", answer="answer"
+                ),
+            )
+
+    index = MessageSearchIndex(tokenizer="unicode61")
+    assert await index.index_stream(stream(), batch_size=2) == 5
+    assert len(index.search("question", scope="app1")) == 5
+
+
+def test_search_empty_text(index):
+    """测试查询内容为空"""
+    with pytest.raises(ValueError, match="查询内容不能为空"):
+        index.search("")
+
+
+@pytest.mark.parametrize(
+    "text", ["e-mail", "password?", "C++", 'say "hi"', "a:b", "f(x)", "AND", "a*b"]
+)
+def test_search_punctuation(text):
+    """测试包含连字符和标点的关键词按字面匹配，不会抛出SQLite异常"""
+    index = MessageSearchIndex()
+    index.add_messages([
+        Message(
+            id="m1",
+            query="my e-mail password? C++ and say \"hi\" a:b f(x) AND a*b",
+            answer="ok",
+            created_at=1,
+        ),
+        Message(id="m2", query="unrelated", answer="nothing", created_at=2),
+    ])
+
+    assert [hit.message_id for hit in index.search(text)] == ["m1"]
+    index.close()
+
+
+def test_search_multiple_terms(index):
+    """测试多个关键词都需要命中"""
+    assert [hit.message_id for hit in index.search("reset password")] == ["m3"]
+    assert index.search("reset 退款流程") == []
+
+
+def test_search_raw(index):
+    """测试raw=True时使用FTS5查询语法，无效的表达式抛出DifyException"""
+    hits = index.search('"reset" OR "退款流程"', raw=True)
+    assert {hit.message_id for hit in hits} == {"m1", "m2", "m3"}
+
+    with pytest.raises(DifyException) as excinfo:
+        index.search("e-mail", raw=True)
+    assert excinfo.value.code == "invalid_query"
@@ -0,0 +1,168 @@
+"""
+测试会话消息增量同步功能
+"""
+
+import pytest
+from unittest.mock import AsyncMock
+
+from dify.app.conversation.schemas import ConversationList, MessageList
+from dify.app.conversation.sync import (
+    ConversationSync,
+    JsonCursorStore,
+    MemoryCursorStore,
+    SqliteCursorStore,
+    SyncCursor,
+)
+
+
+def _conversation(conversation_id: str, updated_at: int) -> dict:
+    return {
+        "id": conversation_id,
+        "name": conversation_id,
+        "inputs": {},
+        "status": "normal",
+        "introduction": "",
+        "created_at": 0,
+        "updated_at": updated_at,
+    }
+
+
+def _message(message_id: str, created_at: int) -> dict:
+    return {"id": message_id, "query": "q", "answer": "a", "created_at": created_at}
+
+
+@pytest.fixture
+def mock_conversation():
+    conversation = AsyncMock()
+    conversation.find_list.return_value = ConversationList.model_validate({
+        "data": [_conversation("c2", 20), _conversation("c1", 10)],
+        "has_more": False,
+        "limit": 100,
+    })
+    messages = {
+        "c1": [_message("m1", 1), _message("m2", 2)],
+        "c2": [_message("m3", 3)],
+    }
+
+    async def get_messages(api_key, payloads):
+        return MessageList.model_validate(
+            {"data": messages[payloads.conversation_id], "has_more": False}
+        )
+
+    conversation.get_messages.side_effect = get_messages
+    conversation.messages = messages
+    return conversation
+
+
+@pytest.mark.asyncio
+async def test_sync_full_then_incremental(mock_conversation):
+    """测试首次全量同步和之后的增量同步"""
+    store = MemoryCursorStore()
+    sync = ConversationSync(mock_conversation, store)
+
+    first = [item async for item in sync.sync("key", "user1", scope="app1")]
+    assert sorted(item.message.id for item in first) == ["m1", "m2", "m3"]
+    assert store.get("app1:user1") == SyncCursor(updated_at=20, id="c2")
+    assert store.get("app1:user1:c1") == SyncCursor(updated_at=2, id="m2")
+
+    # c1 有新消息，c2 无变化
+    mock_conversation.messages["c1"].append(_message("m4", 30))
+    mock_conversation.find_list.return_value = ConversationList.model_validate({
+        "data": [_conversation("c1", 30), _conversation("c2", 20)],
+        "has_more": False,
+        "limit": 100,
+    })
+    second = [item async for item in sync.sync("key", "user1", scope="app1")]
+    assert [item.message.id for item in second] == ["m4"]
+    assert second[0].conversation.id == "c1"
+    assert store.get("app1:user1") == SyncCursor(updated_at=30, id="c1")
+
+
+@pytest.mark.asyncio
+async def test_sync_no_changes(mock_conversation):
+    """测试没有变化时不拉取消息"""
+    store = MemoryCursorStore()
+    store.set("app1:user1", SyncCursor(updated_at=20, id="c2"))
+    sync = ConversationSync(mock_conversation, store)
+
+    assert [item async for item in sync.sync("key", "user1", scope="app1")] == []
+    mock_conversation.get_messages.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_sync_error_does_not_advance_cursor(mock_conversation):
+    """测试拉取失败时不推进会话高水位"""
+    mock_conversation.get_messages.side_effect = RuntimeError("boom")
+    store = MemoryCursorStore()
+    sync = ConversationSync(mock_conversation, store)
+
+    with pytest.raises(RuntimeError):
+        [item async for item in sync.sync("key", "user1", scope="app1")]
+    assert store.get("app1:user1") is None
+
+
+@pytest.mark.asyncio
+async def test_sync_empty_user(mock_conversation):
+    """测试用户标识为空"""
+    sync = ConversationSync(mock_conversation, MemoryCursorStore())
+    with pytest.raises(ValueError, match="用户标识不能为空"):
+        [item async for item in sync.sync("key", "")]
+
+
+@pytest.mark.asyncio
+async def test_sync_same_timestamp_not_repeated(mock_conversation):
+    """测试与高水位时间戳相同的消息只同步一次，之后的同时间戳消息仍会同步"""
+    mock_conversation.messages["c1"] = [_message("m1", 5), _message("m2", 5)]
+    store = MemoryCursorStore()
+    sync = ConversationSync(mock_conversation, store)
+
+    first = [item async for item in sync.sync("key", "user1", scope="app1")]
+    assert sorted(item.message.id for item in first) == ["m1", "m2", "m3"]
+    assert store.get("app1:user1:c1") == SyncCursor(
+        updated_at=5, id="m2", boundary_ids=["m1"]
+    )
+
+    mock_conversation.messages["c1"].append(_message("m5", 5))
+    mock_conversation.find_list.return_value = ConversationList.model_validate({
+        "data": [_conversation("c1", 30)],
+        "has_more": False,
+        "limit": 100,
+    })
+    second = [item async for item in sync.sync("key", "user1", scope="app1")]
+    assert [item.message.id for item in second] == ["m5"]
+    assert store.get("app1:user1:c1") == SyncCursor(
+        updated_at=5, id="m5", boundary_ids=["m2", "m1"]
+    )
+
+
+@pytest.mark.asyncio
+async def test_sync_fetches_as_consumer_frees(mock_conversation):
+    """测试同时拉取的会话数不超过并发数，消费方取走结果后才拉取下一个会话"""
+    ids = [f"c{i}" for i in range(10)]
+    mock_conversation.find_list.return_value = ConversationList.model_validate({
+        "data": [_conversation(i, 10) for i in ids],
+        "has_more": False,
+        "limit": 100,
+    })
+    mock_conversation.messages.update({i: [_message(f"m-{i}", 1)] for i in ids})
+    sync = ConversationSync(mock_conversation, MemoryCursorStore(), concurrency=2)
+
+    events = sync.sync("key", "user1", scope="app1")
+    await events.__anext__()
+    assert mock_conversation.get_messages.await_count <= 3
+    await events.aclose()
+
+    sync = ConversationSync(mock_conversation, MemoryCursorStore(), concurrency=2)
+    assert len([item async for item in sync.sync("key", "user1", scope="app1")]) == 10
+
+
+@pytest.mark.parametrize("store_class", [JsonCursorStore, SqliteCursorStore])
+def test_cursor_store_persistence(tmp_path, store_class):
+    """测试游标持久化"""
+    path = str(tmp_path / "cursors")
+    store_class(path).set("a:b", SyncCursor(updated_at=5, id="x", boundary_ids=["y"]))
+
+    assert store_class(path).get("a:b") == SyncCursor(
+        updated_at=5, id="x", boundary_ids=["y"]
+    )
+    assert store_class(path).get("missing") is None
@@ -0,0 +1,165 @@
+"""
+测试知识库索引等待功能
+"""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock
+
+from dify.dataset import DifyDataset
+from dify.exceptions import PollingTimeoutException
+from dify.polling import Poller, PollingPolicy
+
+
+FAST_POLICY = PollingPolicy(
+    initial_interval=0.01, max_interval=0.02, jitter=0, timeout=1
+)
+
+
+def _status(doc_id: str, status: str) -> dict:
+    return {"id": doc_id, "indexing_status": status}
+
+
+@pytest.mark.asyncio
+async def test_wait_until_indexed():
+    """测试等待索引完成"""
+    mock_admin_client = AsyncMock()
+    mock_admin_client.get.side_effect = [
+        {"data": [_status("doc1", "waiting"), _status("doc2", "indexing")]},
+        {"data": [_status("doc1", "completed"), _status("doc2", "indexing")]},
+        {"data": [_status("doc1", "completed"), _status("doc2", "completed")]},
+    ]
+
+    dify_dataset = DifyDataset(mock_admin_client, polling_policy=FAST_POLICY)
+    result = await dify_dataset.wait_until_indexed("dataset1")
+
+    assert [s.indexing_status for s in result] == ["completed", "completed"]
+    assert mock_admin_client.get.call_count == 3
+    mock_admin_client.get.assert_called_with("/datasets/dataset1/indexing-status")
+
+
+@pytest.mark.asyncio
+async def test_wait_until_indexed_coalesces_waiters():
+    """测试同一知识库上的并发等待合并为一个请求"""
+    mock_admin_client = AsyncMock()
+    responses = iter([
+        {"data": [_status("doc1", "indexing"), _status("doc2", "indexing")]},
+        {"data": [_status("doc1", "completed"), _status("doc2", "completed")]},
+    ])
+
+    async def get(url, params=None, headers=None):
+        await asyncio.sleep(0.001)
+        return next(responses)
+
+    mock_admin_client.get.side_effect = get
+
+    dify_dataset = DifyDataset(mock_admin_client, polling_policy=FAST_POLICY)
+    results = await asyncio.gather(
+        *[
+            dify_dataset.wait_until_indexed("dataset1", [f"doc{i % 2 + 1}"])
+            for i in range(50)
+        ]
+    )
+
+    assert all(len(r) == 1 and r[0].indexing_status == "completed" for r in results)
+    assert mock_admin_client.get.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_wait_until_indexed_timeout():
+    """测试等待超时"""
+    mock_admin_client = AsyncMock()
+    mock_admin_client.get.return_value = {"data": [_status("doc1", "indexing")]}
+
+    dify_dataset = DifyDataset(mock_admin_client, polling_policy=FAST_POLICY)
+    with pytest.raises(PollingTimeoutException):
+        await dify_dataset.wait_until_indexed("dataset1", timeout=0.05)
+
+
+@pytest.mark.asyncio
+async def test_wait_until_indexed_empty_dataset_id():
+    """测试知识库ID为空"""
+    dify_dataset = DifyDataset(AsyncMock())
+    with pytest.raises(ValueError, match="知识库ID不能为空"):
+        await dify_dataset.wait_until_indexed("")
+
+
+@pytest.mark.asyncio
+async def test_poller_retries_fetch_error():
+    """测试状态请求失败时按退避间隔重试，不影响等待者"""
+    fetch = AsyncMock(
+        side_effect=[RuntimeError("boom"), ConnectionError("reset"), "done"]
+    )
+    poller = Poller(fetch, FAST_POLICY)
+
+    assert await poller.wait("key", lambda state: state == "done") == "done"
+    assert fetch.await_count == 3
+    assert poller.pending("key") == 0
+
+
+@pytest.mark.asyncio
+async def test_poller_timeout_keeps_last_error():
+    """测试一直失败时在截止时间超时，异常原因为最近一次请求的异常"""
+    fetch = AsyncMock(side_effect=RuntimeError("boom"))
+    poller = Poller(fetch, FAST_POLICY)
+
+    with pytest.raises(PollingTimeoutException) as excinfo:
+        await poller.wait("key", lambda state: True, timeout=0.05)
+    assert isinstance(excinfo.value.__cause__, RuntimeError)
+    assert fetch.await_count > 1
+    assert poller.pending("key") == 0
+
+
+@pytest.mark.asyncio
+async def test_poller_timeout_not_delayed_by_slow_fetch():
+    """测试状态请求很慢时等待者仍在截止时间超时"""
+    release = asyncio.Event()
+
+    async def fetch(key):
+        await release.wait()
+        return "running"
+
+    poller = Poller(fetch, FAST_POLICY)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    with pytest.raises(PollingTimeoutException):
+        await poller.wait("key", lambda state: False, timeout=0.05)
+    assert loop.time() - started < 0.5
+    release.set()
+    await asyncio.sleep(0)
+
+
+def test_policy_backoff():
+    """测试退避间隔计算"""
+    policy = PollingPolicy(initial_interval=1, max_interval=4, multiplier=2, jitter=0)
+    assert policy.next_interval(1, changed=False) == 2
+    assert policy.next_interval(4, changed=False) == 4
+    assert policy.next_interval(4, changed=True) == 1
+
+
+@pytest.mark.asyncio
+async def test_poller_new_waiters_join_next_poll():
+    """测试陆续加入的等待者合并到下一次轮询"""
+    fetch = AsyncMock(return_value="running")
+    poller = Poller(fetch, PollingPolicy(initial_interval=0.2, jitter=0, timeout=None))
+
+    first = asyncio.create_task(poller.wait("key", lambda state: state == "done"))
+    await asyncio.sleep(0.01)
+    assert fetch.await_count == 1
+
+    later = [
+        asyncio.create_task(poller.wait("key", lambda state: state == "done"))
+        for _ in range(5)
+    ]
+    for _ in range(5):
+        await asyncio.sleep(0.01)
+    assert fetch.await_count == 1
+
+    # 截止时间早于下一次轮询时按时超时，不会提前触发请求
+    with pytest.raises(PollingTimeoutException):
+        await poller.wait("key", lambda state: state == "done", timeout=0.05)
+    assert fetch.await_count == 1
+
+    fetch.return_value = "done"
+    assert await asyncio.gather(first, *later) == ["done"] * 6
@@ -0,0 +1,217 @@
+"""
+测试持久化响应缓存
+"""
+
+import multiprocessing
+
+import httpx
+import pytest
+
+from dify.cache import ResponseCache
+from dify.cli import main
+from dify.diskcache import DiskCache
+from dify.http import AdminClient
+from dify.llm import DifyLLM
+
+LLM_BODY = {
+    "data": [
+        {
+            "tenant_id": "t1",
+            "provider": "openai",
+            "label": {"zh_Hans": "OpenAI", "en_US": "OpenAI"},
+            "icon_small": {"zh_Hans": "", "en_US": ""},
+            "icon_large": {"zh_Hans": "", "en_US": ""},
+            "status": "active",
+            "models": [],
+        }
+    ]
+}
+
+
+def counting_transport(body, etag=None):
+    state = {"calls": 0, "conditional": []}
+
+    def handler(request):
+        state["calls"] += 1
+        state["conditional"].append(request.headers.get("If-None-Match"))
+        if etag and request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304)
+        return httpx.Response(200, json=body, headers={"ETag": etag} if etag else {})
+
+    return httpx.MockTransport(handler), state
+
+
+def new_client(path, transport, clock, **kwargs):
+    disk = DiskCache(str(path), clock=clock, **kwargs)
+    return AdminClient(
+        "http://dify.test", "key", transport, cache=ResponseCache(
+            disk=disk, clock=clock
+        )
+    )
+
+
+@pytest.mark.asyncio
+async def test_survives_restart_within_ttl(tmp_path, clock):
+    """测试重启后在有效期内直接使用磁盘缓存，不发送请求"""
+    transport, state = counting_transport(LLM_BODY)
+
+    path = tmp_path / "c.sqlite"
+    first = await DifyLLM(new_client(path, transport, clock)).find_list()
+    # 模拟进程重启：新的内存缓存，同一个磁盘文件
+    second = await DifyLLM(new_client(path, transport, clock)).find_list()
+
+    assert state["calls"] == 1
+    assert second == first
+
+
+@pytest.mark.asyncio
+async def test_revalidates_after_ttl(tmp_path, clock):
+    """测试过期后用磁盘中的校验器发送条件请求"""
+    transport, state = counting_transport({"id": "1"}, etag='"v1"')
+
+    client = new_client(tmp_path / "c.sqlite", transport, clock, ttl={"/apps/{id}": 60})
+    await client.get("/apps/1")
+    clock.now += 61
+    restarted = new_client(
+        tmp_path / "c.sqlite", transport, clock, ttl={"/apps/{id}": 60}
+    )
+
+    assert await restarted.get("/apps/1") == {"id": "1"}
+    assert state["conditional"] == [None, '"v1"']
+    # 304之后有效期被延长
+    assert await restarted.get("/apps/1") == {"id": "1"}
+    assert state["calls"] == 2
+
+
+def test_ttl_longest_match(tmp_path):
+    """测试有效期按最长的路径模板结尾匹配"""
+    disk = DiskCache(
+        str(tmp_path / "c.sqlite"),
+        ttl={"/apps": 60, "/apps/{id}/workflows/publish": 300},
+    )
+
+    assert disk.ttl_for("dify.test/console/api/apps") == 60
+    assert disk.ttl_for("dify.test/console/api/apps/{id}/workflows/publish") == 300
+    assert disk.ttl_for("dify.test/console/api/tags") == 0
+
+
+def test_size_eviction(tmp_path, clock):
+    """测试超过容量时淘汰最久未访问的条目"""
+    disk = DiskCache(str(tmp_path / "c.sqlite"), max_bytes=300, clock=clock)
+    content = bytes(range(256))  # 不可压缩，每条约260字节
+
+    disk.put("a", "http://dify.test/a", content, "d1")
+    clock.now += 1
+    disk.put("b", "http://dify.test/b", content, "d2")
+
+    assert disk.get("a") is None
+    assert disk.get("b").content == content
+    assert disk.stats().entries == 1
+
+
+def test_api_key_not_stored(tmp_path):
+    """测试磁盘上不保存请求键中的API密钥"""
+    path = tmp_path / "c.sqlite"
+    disk = DiskCache(str(path))
+    key = ("http://dify.test/apps", "null", (("Authorization", "Bearer secret-key"),))
+    disk.put(key, "http://dify.test/apps", b"{}", "d")
+
+    assert b"secret-key" not in path.read_bytes()
+
+
+def _writer(path, index):
+    disk = DiskCache(path)
+    for i in range(20):
+        disk.put((index, i), f"http://dify.test/apps/{i}", b'{"ok": true}', "d")
+
+
+def test_multi_process_writes(tmp_path):
+    """测试多个进程同时写入同一个缓存文件"""
+    path = str(tmp_path / "c.sqlite")
+    DiskCache(path)
+    ctx = multiprocessing.get_context("spawn")
+    processes = [ctx.Process(target=_writer, args=(path, index)) for index in range(3)]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join(timeout=30)
+
+    assert all(p.exitcode == 0 for p in processes)
+    assert DiskCache(path).stats().entries == 60
+
+
+def test_cli_stats_and_clear(tmp_path, capsys):
+    """测试`dify cache stats/clear`命令"""
+    path = str(tmp_path / "c.sqlite")
+    disk = DiskCache(path)
+    disk.put("a", "http://dify.test/console/api/apps/1", b"{}", "d")
+    disk.put("b", "http://dify.test/console/api/tags", b"[]", "d")
+
+    assert main(["cache", "--path", path, "stats"]) == 0
+    out = capsys.readouterr().out
+    assert "条目数: 2" in out
+    assert "dify.test/console/api/apps/{id}" in out
+
+    assert main(["cache", "--path", path, "clear", "--resource", "/tags"]) == 0
+    assert "已删除 1 个条目" in capsys.readouterr().out
+    assert main(["cache", "--path", path, "clear"]) == 0
+    assert DiskCache(path).stats().entries == 0
+
+
+@pytest.mark.asyncio
+async def test_writes_expire_related_entries(tmp_path, clock):
+    """测试POST/DELETE之后相关路径的条目立即过期，无关的条目不受影响"""
+    calls = []
+
+    def handler(request):
+        calls.append((request.method, request.url.path))
+        if request.method == "GET":
+            return httpx.Response(200, json={"path": request.url.path, "n": len(calls)})
+        return httpx.Response(200, json={"result": "success"})
+
+    client = new_client(
+        tmp_path / "c.sqlite", httpx.MockTransport(handler), clock,
+        ttl={"/apps": 60, "/apps/{id}": 60, "/tags": 60},
+    )
+    for path in ("/apps", "/apps/1", "/apps/2", "/tags"):
+        await client.get(path)
+
+    await client.post("/apps/1/copy")
+    await client.delete("/apps/2")
+    for path in ("/apps", "/apps/1", "/apps/2", "/tags"):
+        await client.get(path)
+
+    refetched = [path for method, path in calls[6:]]
+    assert refetched == [
+        "/console/api/apps", "/console/api/apps/1", "/console/api/apps/2"
+    ]
+    # 磁盘上的条目同样过期，重启后仍会重新验证
+    restarted = new_client(tmp_path / "c.sqlite", httpx.MockTransport(handler), clock)
+    await client.post("/apps")
+    await restarted.get("/apps")
+    assert calls[-1] == ("GET", "/console/api/apps")
+
+
+@pytest.mark.asyncio
+async def test_disk_io_off_event_loop(tmp_path, monkeypatch, clock):
+    """测试磁盘缓存的读写不在事件循环线程中执行"""
+    import threading
+
+    loop_thread = threading.get_ident()
+    threads = []
+    transport, _ = counting_transport({"id": "1"})
+    client = new_client(tmp_path / "c.sqlite", transport, clock)
+    disk = client.cache.disk
+    for name in ("get", "put"):
+        method = getattr(disk, name)
+
+        def wrapper(*args, _method=method, **kwargs):
+            threads.append(threading.get_ident())
+            return _method(*args, **kwargs)
+
+        monkeypatch.setattr(disk, name, wrapper)
+
+    await client.get("/apps/1")
+
+    assert threads
+    assert loop_thread not in threads
@@ -0,0 +1,101 @@
+"""
+测试对冲请求
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from dify.hedge import Hedger, HedgingPolicy
+from dify.hooks import HEDGE, Hooks
+from dify.http import AdminClient
+
+
+def slow_first_transport(delays):
+    """按请求顺序使用不同延迟的模拟服务"""
+    state = {"calls": 0, "cancelled": 0}
+
+    async def handler(request):
+        index = state["calls"]
+        state["calls"] += 1
+        try:
+            await asyncio.sleep(delays[min(index, len(delays) - 1)])
+        except asyncio.CancelledError:
+            state["cancelled"] += 1
+            raise
+        return httpx.Response(200, json={"call": index})
+
+    return httpx.MockTransport(handler), state
+
+
+@pytest.mark.asyncio
+async def test_hedge_wins():
+    """测试主请求超过延迟时发出对冲请求，先返回的胜出，另一个被取消"""
+    transport, state = slow_first_transport([5, 0])
+    hooks = Hooks()
+    events = []
+    hooks.on(HEDGE, lambda event, data: events.append(data))
+    hedger = Hedger(HedgingPolicy(delay=0.02, budget=1), hooks)
+    client = AdminClient("http://dify.test", "key", transport, hedger=hedger)
+
+    result = await asyncio.wait_for(client.get("/apps/1"), timeout=2)
+
+    assert result == {"call": 1}
+    assert state["cancelled"] == 1
+    assert events[0]["winner"] == "hedge"
+
+
+@pytest.mark.asyncio
+async def test_no_hedge_when_fast():
+    """测试主请求及时返回时不对冲"""
+    transport, state = slow_first_transport([0])
+    hedger = Hedger(HedgingPolicy(delay=0.5, budget=1))
+    client = AdminClient("http://dify.test", "key", transport, hedger=hedger)
+
+    assert await client.get("/apps/1") == {"call": 0}
+    assert state["calls"] == 1
+    assert hedger.hedges == 0
+
+
+@pytest.mark.asyncio
+async def test_budget_limits_hedges():
+    """测试对冲预算限制额外请求比例"""
+    transport, state = slow_first_transport([0.03])
+    hedger = Hedger(HedgingPolicy(delay=0.001, budget=0.25, max_burst=1))
+    client = AdminClient("http://dify.test", "key", transport, hedger=hedger)
+
+    for _ in range(8):
+        await client.get("/apps/1")
+
+    assert hedger.hedges == 2
+    assert state["calls"] == 10
+
+
+def test_observed_percentile_delay():
+    """测试按观测延迟的分位数计算对冲延迟"""
+    hedger = Hedger(HedgingPolicy(min_samples=10, fallback_delay=2))
+    assert hedger.delay_for("k") == 2
+    for i in range(100):
+        hedger.record("k", i / 100)
+    assert hedger.delay_for("k") == pytest.approx(0.95)
+
+
+@pytest.mark.asyncio
+async def test_records_primary_latency_only():
+    """测试只记录主请求的延迟，对冲胜出时记录主请求耗时的下界而不是对冲请求的延迟"""
+    transport, _ = slow_first_transport([0.2, 0])
+    hedger = Hedger(HedgingPolicy(delay=0.05, budget=1))
+    client = AdminClient("http://dify.test", "key", transport, hedger=hedger)
+
+    await client.get("/apps/1")
+    samples = list(hedger.samples.values())[0]
+    assert len(samples) == 1 and samples[0] >= 0.05
+
+    transport, _ = slow_first_transport([0.01, 0])
+    hedger = Hedger(HedgingPolicy(delay=0.5, budget=1))
+    client = AdminClient("http://dify.test", "key", transport, hedger=hedger)
+
+    await client.get("/apps/1")
+    samples = list(hedger.samples.values())[0]
+    assert 0.01 <= samples[0] < 0.5
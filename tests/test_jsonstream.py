@@ -0,0 +1,197 @@
+"""
+测试列表响应的增量解析
+"""
+
+import json
+
+import httpx
+import pytest
+
+from dify.app import DifyApp
+from dify.app.conversation import DifyConversation
+from dify.app.conversation.schemas import Message, MessageListQueryPayloads
+from dify.app.schemas import App
+from dify.dataset import DifyDataset
+from dify.dataset.schemas import DataSetInList
+from dify.exceptions import DifyException
+from dify.http import AdminClient
+from dify.jsonstream import ArraySplitter, iter_array_items
+
+
+class Chunks(httpx.AsyncByteStream):
+    """按固定大小分块返回的响应体"""
+
+    def __init__(self, content: bytes, size: int) -> None:
+        self.parts = [content[i:i + size] for i in range(0, len(content), size)]
+        self.sent = 0
+
+    async def __aiter__(self):
+        for part in self.parts:
+            self.sent += 1
+            yield part
+
+
+def page_transport(body, size=64):
+    """分块返回列表响应的模拟服务"""
+    received = []
+    streams = []
+
+    def handler(request):
+        received.append(request)
+        stream = Chunks(json.dumps(body, ensure_ascii=False).encode("utf-8"), size)
+        streams.append(stream)
+        return httpx.Response(200, stream=stream)
+
+    return httpx.MockTransport(handler), received, streams
+
+
+def test_splitter_across_chunk_boundaries():
+    """测试任意分块位置都能正确切分元素，包括字符串中的转义和结构字符"""
+    doc = {
+        "page": 1,
+        "note": "x\"data\\",
+        "data": [
+            {"a": "q\\\"]},[", "b": [1, {"c": None}]},
+            3,
+            "s,]",
+            True,
+            None,
+            [1, [2]],
+            {"data": [9]},
+            "中文",
+        ],
+        "has_more": False,
+    }
+    raw = json.dumps(doc, ensure_ascii=False).encode("utf-8")
+    for size in (1, 2, 3, 7, 64, len(raw)):
+        splitter = ArraySplitter()
+        items = []
+        for i in range(0, len(raw), size):
+            items += splitter.feed(raw[i:i + size])
+        assert [json.loads(item) for item in items] == doc["data"]
+
+
+def test_splitter_only_top_level_key():
+    """测试只切分顶层对象中的数组，空数组不产出元素"""
+    assert ArraySplitter().feed(b'{"x": {"data": [1]}, "data": [2]}') == [b"2"]
+    assert ArraySplitter().feed(b'{"data": [], "total": 0}') == []
+    splitter = ArraySplitter("items")
+    assert splitter.feed(b'{"data": [1], "items": [{"id": 1}]}') == [b'{"id": 1}']
+
+
+def test_splitter_keeps_only_current_item():
+    """测试缓冲区只保留当前元素"""
+    item = {"id": "x" * 100}
+    raw = json.dumps({"data": [item] * 50}).encode("utf-8")
+    splitter = ArraySplitter()
+    largest = 0
+    for i in range(0, len(raw), 16):
+        splitter.feed(raw[i:i + 16])
+        largest = max(largest, len(splitter._buffer))
+
+    assert largest <= len(json.dumps(item)) + 16
+
+
+@pytest.mark.asyncio
+async def test_iter_array_items():
+    """测试从字节块中逐个解码元素"""
+
+    async def chunks():
+        yield b'{"data": [{"id": 1}, '
+        yield b'{"id": 2}]}'
+
+    assert [item async for item in iter_array_items(chunks())] == [{"id": 1}, {"id": 2}]
+
+
+@pytest.mark.asyncio
+async def test_app_iter_list():
+    """测试流式获取应用列表，在读完响应前就返回第一个应用"""
+    body = {
+        "page": 1,
+        "limit": 100,
+        "total": 3,
+        "has_more": False,
+        "data": [
+            {
+                "id": str(i), "name": f"应用{i}", "mode": "chat",
+                "model_config": {"pre_prompt": "p" * 500},
+            }
+            for i in range(3)
+        ],
+    }
+    transport, received, streams = page_transport(body)
+    app = DifyApp(AdminClient("http://dify.test", "key", transport))
+
+    apps = []
+    async for item in app.iter_list(limit=100, name="应用"):
+        if not apps:
+            assert streams[0].sent < len(streams[0].parts)
+        apps.append(item)
+
+    assert [a.id for a in apps] == ["0", "1", "2"]
+    assert all(isinstance(a, App) for a in apps)
+    assert apps[0].app_config.pre_prompt == "p" * 500
+    assert received[0].method == "GET"
+    assert received[0].url.params["limit"] == "100"
+    assert received[0].url.params["name"] == "应用"
+
+
+@pytest.mark.asyncio
+async def test_iter_messages():
+    """测试流式获取消息列表"""
+    body = {
+        "limit": 20,
+        "has_more": False,
+        "data": [
+            {
+                "id": "m1", "query": "你好", "answer": "你好！",
+                "agent_thoughts": [{"thought": "t"}],
+            },
+            {"id": "m2", "query": "再见", "answer": "再见！"},
+        ],
+    }
+    transport, received, _ = page_transport(body, size=16)
+    conversation = DifyConversation(AdminClient("http://dify.test", "key", transport))
+    payloads = MessageListQueryPayloads(conversation_id="c1", user="u1")
+
+    messages = [m async for m in conversation.iter_messages("app-key", payloads)]
+
+    assert [m.id for m in messages] == ["m1", "m2"]
+    assert all(isinstance(m, Message) for m in messages)
+    assert received[0].url.path == "/v1/messages"
+    assert received[0].headers["Authorization"] == "Bearer app-key"
+
+
+@pytest.mark.asyncio
+async def test_dataset_iter_list():
+    """测试流式获取知识库列表"""
+    body = {
+        "data": [{"id": "d1", "name": "知识库1"}, {"id": "d2", "name": "知识库2"}],
+        "total": 2,
+        "has_more": False,
+    }
+    transport, received, _ = page_transport(body)
+    dataset = DifyDataset(AdminClient("http://dify.test", "key", transport))
+
+    datasets = [d async for d in dataset.iter_list(tag_ids=["t1", "t2"])]
+
+    assert [d.name for d in datasets] == ["知识库1", "知识库2"]
+    assert all(isinstance(d, DataSetInList) for d in datasets)
+    assert received[0].url.params["tag_ids"] == "t1,t2"
+
+    with pytest.raises(ValueError):
+        async for _ in dataset.iter_list(page=0):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_iter_items_error():
+    """测试请求失败时抛出异常"""
+    transport = httpx.MockTransport(
+        lambda request: httpx.Response(403, json={"code": "forbidden"})
+    )
+    client = AdminClient("http://dify.test", "key", transport)
+
+    with pytest.raises(DifyException):
+        async for _ in client.iter_items("/apps"):
+            pass
@@ -0,0 +1,123 @@
+"""
+测试嵌套模型的延迟校验
+"""
+
+from typing import Annotated, List, Optional
+
+import pytest
+from pydantic import BaseModel, Field, ValidationError
+
+from dify.app.conversation.schemas import AgentThought, Message
+from dify.app.schemas import App, ModelConfig
+from dify.lazy import RAW_CONTEXT, Deferred, Lazy, LazyModel
+
+
+class Item(BaseModel):
+    value: int
+
+
+class Holder(LazyModel):
+    name: str = ""
+    items: Annotated[Optional[List[Item]], Lazy()] = Field(default_factory=list)
+
+
+def test_validated_on_first_access_and_cached():
+    """测试首次访问时才校验，结果被缓存"""
+    holder = Holder.model_validate({"name": "h", "items": [{"value": 1}]})
+
+    assert isinstance(holder.__dict__["items"], Deferred)
+    assert not holder.__dict__["items"].resolved
+    items = holder.items
+    assert items == [Item(value=1)]
+    assert holder.items is items
+
+
+def test_errors_raised_on_access():
+    """测试原始数据有误时在访问字段时抛出异常"""
+    holder = Holder.model_validate({"items": [{"value": "not-a-number"}]})
+
+    assert holder.name == ""
+    with pytest.raises(ValidationError):
+        _ = holder.items
+
+
+def test_dump_independent_of_access():
+    """测试未访问的字段与访问过的字段序列化结果相同，并遵循序列化选项"""
+    raw = {
+        "pre_prompt": "你好",
+        "user_input_form": [{"text-input": {"label": "名称", "variable": "name"}}],
+    }
+    data = {"id": "1", "model_config": raw}
+    options = [
+        {}, {"by_alias": True}, {"exclude_none": True},
+        {"mode": "json", "exclude_defaults": True},
+    ]
+
+    before = [App.model_validate(data).model_dump(**o) for o in options]
+    accessed = App.model_validate(data)
+    _ = accessed.app_config
+    assert before == [accessed.model_dump(**o) for o in options]
+    assert "model_config" in before[1] and "app_config" not in before[1]
+    assert before[0]["app_config"]["support_annotation"] is True
+    assert None not in before[2]["app_config"].values()
+
+
+def test_dump_raw_context():
+    """测试传入RAW_CONTEXT时未访问的字段直接输出原始数据，不经过校验"""
+    raw = [{"thought": "查询天气", "unknown": 1}]
+    message = Message.model_validate({"id": "m1", "agent_thoughts": raw})
+
+    dumped = message.model_dump(mode="json", context=RAW_CONTEXT)
+    assert dumped["agent_thoughts"] == raw
+    assert not message.__dict__["agent_thoughts"].resolved
+
+    # 访问过之后按模型输出
+    _ = message.agent_thoughts
+    dumped = message.model_dump(context=RAW_CONTEXT)
+    assert dumped["agent_thoughts"] == message.model_dump()["agent_thoughts"]
+
+    broken = Holder.model_validate({"items": [{"value": "not-a-number"}]})
+    dumped = broken.model_dump(context=RAW_CONTEXT)
+    assert dumped["items"] == [{"value": "not-a-number"}]
+
+
+def test_dump_after_access_and_assignment():
+    """测试访问或重新赋值后按模型输出"""
+    app = App.model_validate({"id": "1", "model_config": {"pre_prompt": "旧"}})
+    assert app.app_config.pre_prompt == "旧"
+    assert app.model_dump()["app_config"]["support_annotation"] is True
+
+    app.app_config = ModelConfig(pre_prompt="新")
+    assert app.app_config.pre_prompt == "新"
+    assert app.model_dump()["app_config"]["pre_prompt"] == "新"
+
+
+def test_defaults_and_none():
+    """测试默认值和None不经过延迟校验"""
+    assert isinstance(App().app_config, ModelConfig)
+    assert Message().agent_thoughts == []
+    assert App.model_validate({"model_config": None}).app_config is None
+
+
+def test_message_lazy_fields():
+    """测试消息的agent_thoughts和retriever_resources延迟校验"""
+    raw = {
+        "id": "m1",
+        "agent_thoughts": [{"thought": "查询天气", "tool": "weather"}],
+        "retriever_resources": [{"document_id": "d1", "content": "内容"}],
+    }
+    message = Message.model_validate(raw)
+
+    assert message.model_dump()["agent_thoughts"][0]["tool"] == "weather"
+    assert isinstance(message.agent_thoughts[0], AgentThought)
+    assert message.retriever_resources[0].document_id == "d1"
+    assert message == Message.model_validate(raw)
+
+
+def test_copy_and_revalidate():
+    """测试复制和再次校验保留延迟字段"""
+    app = App.model_validate({"id": "1", "model_config": {"pre_prompt": "p"}})
+
+    assert app.model_copy(deep=True).app_config.pre_prompt == "p"
+    assert App.model_validate(app).app_config.pre_prompt == "p"
+    assert "model_config" in App.model_json_schema()["properties"]
@@ -0,0 +1,140 @@
+"""
+测试多地址服务池
+"""
+
+import httpx
+import pytest
+
+from dify.http import AdminClient
+from dify.pool import BalanceStrategy, HostPool
+
+
+def make_transport(down=(), status=None):
+    """按主机名返回响应，down中的主机拒绝连接，status可按主机指定状态码"""
+    status = status or {}
+    calls = []
+
+    async def handler(request: httpx.Request):
+        host = request.url.host
+        calls.append((request.method, host, request.url.path))
+        if host in down:
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(status.get(host, 200), json={"host": host})
+
+    return httpx.MockTransport(handler), calls
+
+
+def test_round_robin():
+    """测试轮询策略"""
+    pool = HostPool(["http://a", "http://b", "http://c"])
+    assert [pool.choose().url for _ in range(4)] == [
+        "http://a", "http://b", "http://c", "http://a"
+    ]
+
+
+def test_least_outstanding_and_ewma():
+    """测试在途请求最少和EWMA策略"""
+    pool = HostPool(
+        ["http://a", "http://b"], strategy=BalanceStrategy.LEAST_OUTSTANDING
+    )
+    pool.endpoints[0].outstanding = 3
+    assert pool.choose().url == "http://b"
+
+    pool = HostPool(["http://a", "http://b"], strategy=BalanceStrategy.EWMA)
+    pool.record_success(pool.endpoints[0], 0.5)
+    pool.record_success(pool.endpoints[1], 0.1)
+    assert {pool.choose().url for _ in range(4)} == {"http://b"}
+
+
+def test_ejection_and_probe(clock):
+    """测试连续失败后摘除，到期后只放行一个试探请求"""
+    pool = HostPool(
+        ["http://a", "http://b"], max_failures=2, eject_duration=10, clock=clock
+    )
+    a = pool.endpoints[0]
+    pool.record_failure(a)
+    pool.record_failure(a)
+
+    assert a not in pool.healthy()
+    assert {pool.choose().url for _ in range(4)} == {"http://b"}
+
+    clock.now += 10
+    assert pool.choose({pool.endpoints[1]}) is a
+    assert a.probing
+    # 试探失败时再次摘除，时长翻倍
+    pool.record_failure(a)
+    assert a.ejected_until == clock.now + 20
+
+    clock.now += 20
+    pool.choose({pool.endpoints[1]})
+    pool.record_success(a, 0.1)
+    assert a in pool.healthy() and a.ejections == 0
+
+
+@pytest.mark.asyncio
+async def test_failover_on_connect_error():
+    """测试连接失败时POST请求也会切换地址"""
+    transport, calls = make_transport(down={"a"})
+    client = AdminClient(["http://a", "http://b"], "key", transport)
+
+    result = await client.post("/apps", json={})
+
+    assert result == {"host": "b"}
+    assert [c[1] for c in calls] == ["a", "b"]
+    assert calls[-1][2] == "/console/api/apps"
+
+
+@pytest.mark.asyncio
+async def test_failover_on_503_only_for_idempotent():
+    """测试503时只有幂等请求切换地址"""
+    transport, calls = make_transport(status={"a": 503})
+    pool = HostPool(["http://a", "http://b"])
+    client = AdminClient(pool, "key", transport).create_api_client("app-key")
+
+    assert await client.get("/parameters") == {"host": "b"}
+    assert calls[-1][2] == "/v1/parameters"
+
+    calls.clear()
+    pool._cursor = 0
+    with pytest.raises(Exception, match="503"):
+        await client.post("/chat-messages", json={})
+    assert [c[1] for c in calls] == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_stream_holds_slot_until_closed(clock):
+    """测试流式响应在关闭之前计入在途请求，响应时间只计算到收到响应头"""
+    pool = HostPool(
+        ["http://a", "http://b"],
+        strategy=BalanceStrategy.LEAST_OUTSTANDING,
+        clock=clock,
+    )
+
+    class Events(httpx.AsyncByteStream):
+        async def __aiter__(self):
+            yield b"data: 1\n\n"
+            yield b"data: 2\n\n"
+
+    def handler(request):
+        if request.url.path.endswith("/chat-messages"):
+            clock.now += 2
+            return httpx.Response(200, stream=Events())
+        return httpx.Response(200, json={})
+
+    transport = httpx.MockTransport(handler)
+    client = AdminClient(pool, "key", transport)
+
+    chunks = client.stream("/chat-messages")
+    await chunks.__anext__()
+    a = pool.endpoints[0]
+    assert a.outstanding == 1
+    assert a.ewma == 2
+    assert pool.choose().url == "http://b"
+
+    clock.now += 30
+    await chunks.aclose()
+    assert a.outstanding == 0
+    assert a.ewma == 2
+
+    await client.get("/apps")
+    assert [e.outstanding for e in pool.endpoints] == [0, 0]
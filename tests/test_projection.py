@@ -0,0 +1,100 @@
+"""
+测试列表接口的部分字段校验
+"""
+
+import pickle
+
+import httpx
+import pytest
+from pydantic import ValidationError
+
+from dify.app import DifyApp
+from dify.app.schemas import App, AppMode, AppSummary
+from dify.http import AdminClient
+from dify.schemas import Projection, project
+
+APP = {
+    "id": "1",
+    "name": "客服助手",
+    "mode": "chat",
+    "tags": [{"id": "t1", "name": "客服", "type": "app"}],
+    "model_config": {"pre_prompt": "你是客服", "agent_mode": {"enabled": "not-a-bool"}},
+}
+
+
+def test_project_validates_only_requested_fields():
+    """测试只校验请求的字段，未请求的嵌套结构即使无效也不影响"""
+    summary = AppSummary.model_validate(APP)
+
+    assert isinstance(summary, Projection)
+    assert summary.name == "客服助手"
+    assert summary.mode == AppMode.CHAT
+    assert summary.tags[0].name == "客服"
+    assert set(AppSummary.model_fields) == {"id", "name", "mode", "tags"}
+    with pytest.raises(ValidationError):
+        _ = summary.app_config
+
+
+def test_unrequested_fields_validated_lazily():
+    """测试访问未请求的字段时校验完整模型并缓存"""
+    data = {**APP, "model_config": {"pre_prompt": "你是客服"}}
+    summary = AppSummary.model_validate(data)
+
+    assert summary.app_config.pre_prompt == "你是客服"
+    assert isinstance(summary.full(), App)
+    assert summary.full() is summary.full()
+    with pytest.raises(AttributeError):
+        _ = summary.not_a_field
+
+
+def test_project_is_cached_and_checks_fields():
+    """测试相同字段和类名返回同一个类，字段不存在时抛出异常"""
+    assert project(App, ["tags", "mode", "name", "id"], "AppSummary") is AppSummary
+    assert project(App, ["tags", "mode", "name", "id"]) is AppSummary
+    assert project(App, ["id"]) is project(App, ["id"])
+    named = project(App, ["id"], name="AppId")
+    assert named.__name__ == "AppId" and named is not project(App, ["id"])
+    assert named.__module__ == __name__
+    with pytest.raises(ValueError):
+        project(App, ["id", "missing"])
+    with pytest.raises(ValueError):
+        project(App, [])
+
+
+def test_pickle():
+    """测试部分字段模型可以被pickle，包括没有赋值给模块属性的类"""
+    summary = AppSummary.model_validate(
+        {**APP, "model_config": {"pre_prompt": "你是客服"}}
+    )
+    restored = pickle.loads(pickle.dumps(summary))
+    assert type(restored) is AppSummary
+    assert restored.name == "客服助手"
+    assert restored.app_config.pre_prompt == "你是客服"
+
+    unnamed = project(App, ["id", "name"])
+    restored = pickle.loads(pickle.dumps(unnamed.model_validate(APP)))
+    assert type(restored) is unnamed and restored.name == "客服助手"
+
+
+@pytest.mark.asyncio
+async def test_find_list_with_fields():
+    """测试find_list指定fields时返回部分字段模型"""
+    body = {"page": 1, "limit": 100, "total": 1, "has_more": False, "data": [APP]}
+    client = AdminClient(
+        "http://dify.test", "key", httpx.MockTransport(
+            lambda request: httpx.Response(200, json=body)
+        )
+    )
+    app = DifyApp(client)
+
+    page = await app.find_list(fields=["id", "name", "mode", "tags"])
+    assert page.total == 1
+    assert isinstance(page.data[0], AppSummary)
+    assert page.data[0].name == "客服助手"
+
+    items = [item async for item in app.iter_list(fields=["id", "name"])]
+    assert items[0].name == "客服助手"
+    assert set(type(items[0]).model_fields) == {"id", "name"}
+
+    with pytest.raises(ValueError):
+        await app.find_list(fields=["nope"])
@@ -0,0 +1,160 @@
+"""
+测试相同并发GET请求的合并
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from dify.exceptions import DifyException
+from dify.http import AdminClient
+from dify.singleflight import SingleFlight
+
+
+def counting_transport(delay=0.05, status_code=200):
+    """记录请求次数、延迟返回的模拟服务"""
+    state = {"calls": 0, "cancelled": 0}
+
+    async def handler(request):
+        state["calls"] += 1
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            state["cancelled"] += 1
+            raise
+        return httpx.Response(
+            status_code,
+            json={"path": request.url.path, "query": str(request.url.query, "ascii")},
+        )
+
+    return httpx.MockTransport(handler), state
+
+
+@pytest.mark.asyncio
+async def test_concurrent_gets_share_one_call():
+    """测试相同的并发请求只发出一次并共享解析后的结果"""
+    transport, state = counting_transport()
+    client = AdminClient("http://dify.test", "key", transport, coalesce=True)
+
+    results = await asyncio.gather(
+        *[client.get("/apps", params={"page": 1}) for _ in range(5)]
+    )
+
+    assert state["calls"] == 1
+    assert all(result is results[0] for result in results)
+    assert client.single_flight.shared == 4
+    assert client.single_flight.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_different_params_or_key_not_merged():
+    """测试查询参数或认证信息不同的请求不合并"""
+    transport, state = counting_transport()
+    client = AdminClient("http://dify.test", "key", transport, coalesce=True)
+    other = AdminClient("http://dify.test", "other", transport, coalesce=True)
+    other.single_flight = client.single_flight
+
+    await asyncio.gather(
+        client.get("/apps", params={"page": 1}),
+        client.get("/apps", params={"page": 2}),
+        other.get("/apps", params={"page": 1}),
+    )
+
+    assert state["calls"] == 3
+
+
+@pytest.mark.asyncio
+async def test_api_client_shares_single_flight():
+    """测试派生的应用API客户端共用合并器"""
+    client = AdminClient(
+        "http://dify.test",
+        "key",
+        httpx.MockTransport(lambda r: httpx.Response(200)),
+        coalesce=True,
+    )
+
+    assert client.create_api_client("app-key").single_flight is client.single_flight
+    assert AdminClient("http://dify.test", "key").single_flight is None
+
+
+@pytest.mark.asyncio
+async def test_not_shared_by_default():
+    """测试默认不合并请求，一个调用方修改结果不影响其他调用方"""
+    transport, state = counting_transport()
+    client = AdminClient("http://dify.test", "key", transport)
+
+    first, second = await asyncio.gather(client.get("/apps"), client.get("/apps"))
+    first["path"] = "mutated"
+
+    assert second["path"] == "/console/api/apps"
+    assert state["calls"] == 2
+
+
+@pytest.mark.asyncio
+async def test_error_shared_by_waiters():
+    """测试请求失败时所有等待者都收到异常"""
+    transport, state = counting_transport(status_code=500)
+    client = AdminClient("http://dify.test", "key", transport, coalesce=True)
+
+    results = await asyncio.gather(
+        *[client.get("/apps") for _ in range(3)], return_exceptions=True
+    )
+
+    assert state["calls"] == 1
+    assert all(isinstance(result, DifyException) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_cancel_one_waiter():
+    """测试取消一个等待者不影响其他等待者，全部取消后请求才被取消"""
+    transport, state = counting_transport(delay=0.1)
+    client = AdminClient("http://dify.test", "key", transport, coalesce=True)
+
+    first = asyncio.ensure_future(client.get("/apps"))
+    second = asyncio.ensure_future(client.get("/apps"))
+    await asyncio.sleep(0.02)
+    first.cancel()
+
+    assert (await second)["path"] == "/console/api/apps"
+    assert first.cancelled()
+    assert state == {"calls": 1, "cancelled": 0}
+
+    third = asyncio.ensure_future(client.get("/apps"))
+    await asyncio.sleep(0.02)
+    third.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await third
+    await asyncio.sleep(0)
+    assert state == {"calls": 2, "cancelled": 1}
+
+
+@pytest.mark.asyncio
+async def test_no_caching_after_completion():
+    """测试请求完成后不缓存结果"""
+    transport, state = counting_transport(delay=0)
+    client = AdminClient("http://dify.test", "key", transport, coalesce=True)
+
+    await client.get("/apps")
+    await client.get("/apps")
+
+    assert state["calls"] == 2
+
+
+@pytest.mark.asyncio
+async def test_abandoned_call_not_joined():
+    """测试所有等待者取消后，新的调用不会加入正在取消的请求"""
+    flight = SingleFlight()
+    started = asyncio.Event()
+
+    async def fn():
+        started.set()
+        await asyncio.sleep(1)
+        return "late"
+
+    waiter = asyncio.ensure_future(flight.do("key", fn))
+    await started.wait()
+    waiter.cancel()
+    await asyncio.sleep(0)
+
+    assert await flight.do("key", lambda: asyncio.sleep(0, "fresh")) == "fresh"
@@ -0,0 +1,137 @@
+"""
+测试同步客户端
+"""
+
+import json
+import threading
+
+import httpx
+import pytest
+
+from dify.app.schemas import ChatPayloads
+from dify.exceptions import DifyException
+from dify.hooks import REQUEST, Hooks
+from dify.sync import DifySync
+
+SSE = (
+    b'data: {"event": "message", "task_id": "t1", "message_id": "m1", "answer": "hi", '
+    b'"created_at": 1}\n\n'
+    b'data: {"event": "message", "task_id": "t1", "message_id": "m1", "answer": "!", '
+    b'"created_at": 1}\n\n'
+)
+
+
+def handler(request: httpx.Request) -> httpx.Response:
+    handler.requests.append(request)
+    path = request.url.path
+    if path == "/console/api/apps/app-1":
+        return httpx.Response(
+            200, json={"id": "app-1", "name": "测试应用", "mode": "chat"}
+        )
+    if path == "/v1/chat-messages":
+        return httpx.Response(
+            200, headers={"Content-Type": "text/event-stream"}, content=SSE
+        )
+    if path == "/v1/chat-messages/t1/stop":
+        return httpx.Response(200, json={"result": "success"})
+    return httpx.Response(404, json={"message": "not found"})
+
+
+@pytest.fixture
+def dify():
+    handler.requests = []
+    client = DifySync(
+        "http://dify.test", "admin-key", transport=httpx.MockTransport(handler)
+    )
+    yield client
+    client.close()
+
+
+def test_find_by_id(dify):
+    """测试同步调用返回与异步版本相同的模型"""
+    app = dify.app.find_by_id("app-1")
+
+    assert app.name == "测试应用"
+    assert handler.requests[0].headers["Authorization"] == "Bearer admin-key"
+
+
+def test_chat_generator(dify):
+    """测试流式方法返回同步生成器"""
+    events = list(dify.app.chat("app-key", ChatPayloads(query="hi", user="u1")))
+
+    assert [e.answer for e in events] == ["hi", "!"]
+    assert handler.requests[0].headers["Authorization"] == "Bearer app-key"
+    assert json.loads(handler.requests[0].content)["query"] == "hi"
+
+
+def test_chat_break_stops_task():
+    """测试开启stop_on_abort时，提前退出循环发送停止请求"""
+    handler.requests = []
+    with DifySync(
+            "http://dify.test",
+            "admin-key",
+            transport=httpx.MockTransport(handler),
+            stop_on_abort=True,
+    ) as dify:
+        for _ in dify.app.chat("app-key", ChatPayloads(query="hi", user="u1")):
+            break
+
+    assert handler.requests[-1].url.path == "/v1/chat-messages/t1/stop"
+
+
+def test_nested_resource_and_error(dify):
+    """测试嵌套资源和错误处理"""
+    with pytest.raises(DifyException):
+        dify.app.conversation.stop_message("app-key", "missing", "u1")
+
+
+def test_threads_use_own_resources(dify):
+    """测试每个线程使用各自的客户端和资源对象，共享连接池"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    def run():
+        return dify.admin_client, dify.app.find_by_id("app-1").name
+
+    barrier = threading.Barrier(2)
+
+    def run_in_thread():
+        barrier.wait()
+        return run()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(run_in_thread) for _ in range(2)]
+        results = [future.result() for future in futures]
+    results.append(run())
+
+    assert {name for _, name in results} == {"测试应用"}
+    assert len({id(client) for client, _ in results}) == 3
+    assert all(client.transport is dify.transport for client, _ in results)
+
+
+def test_requests_go_through_send(dify):
+    """测试同步请求经过HttpClient._send，响应按Content-Encoding解压"""
+    import gzip
+
+    def gzip_handler(request):
+        app = {
+            "id": "app-1", "name": "压缩", "mode": "chat", "description": "说明" * 100
+        }
+        body = gzip.compress(json.dumps(app).encode())
+        return httpx.Response(200, headers={"Content-Encoding": "gzip"}, content=body)
+
+    hooks = Hooks()
+    events = []
+    hooks.on(REQUEST, lambda event, data: events.append(data))
+    client = DifySync(
+        "http://dify.test",
+        "admin-key",
+        transport=httpx.MockTransport(gzip_handler),
+        hooks=hooks,
+    )
+    try:
+        assert client.app.find_by_id("app-1").name == "压缩"
+    finally:
+        client.close()
+
+    assert events[0]["status_code"] == 200
+    assert client.admin_client.compression.bytes_saved > 0
@@ -0,0 +1,116 @@
+"""
+测试批量标签绑定与名称索引功能
+"""
+
+import pytest
+from unittest.mock import AsyncMock
+
+from dify.exceptions import DifyException
+from dify.tag import DifyTag
+from dify.tag.schemas import Tag, TagType, BindingPayloads
+
+
+@pytest.mark.asyncio
+async def test_bind_many():
+    """测试bind_many方法"""
+    mock_admin_client = AsyncMock()
+    mock_admin_client.post.side_effect = [None, DifyException("请求失败", "400"), None]
+
+    dify_tag = DifyTag(mock_admin_client)
+    payloads = [
+        BindingPayloads(tag_ids=["tag1"], target_id=f"app{i}", type=TagType.APP)
+        for i in range(3)
+    ]
+
+    results = await dify_tag.bind_many(payloads, concurrency=1)
+
+    assert [r.is_ok() for r in results] == [True, False, True]
+    assert results[1].error.code == "400"
+    assert mock_admin_client.post.call_count == 3
+    calls = mock_admin_client.post.call_args_list
+    assert [c[1]["json"]["target_id"] for c in calls] == ["app0", "app1", "app2"]
+
+
+@pytest.mark.asyncio
+async def test_bind_many_invalid_payload():
+    """测试bind_many方法，当某个绑定参数无效时"""
+    dify_tag = DifyTag(AsyncMock())
+    payloads = [BindingPayloads(tag_ids=[], target_id="app1", type=TagType.APP)]
+
+    results = await dify_tag.bind_many(payloads)
+
+    assert results[0].is_err()
+    assert results[0].error.code == "ValueError"
+
+
+@pytest.mark.asyncio
+async def test_name_index_cached_and_updated():
+    """测试名称索引缓存及create/delete后的同步更新"""
+    mock_admin_client = AsyncMock()
+    mock_admin_client.get.return_value = [
+        {"id": "tag1", "name": "标签1", "type": "app", "binding_count": 0},
+    ]
+    mock_admin_client.post.return_value = {"id": "tag2", "name": "标签2", "type": "app"}
+
+    dify_tag = DifyTag(mock_admin_client)
+
+    index = await dify_tag.get_name_index(TagType.APP)
+    assert list(index) == ["标签1"]
+    await dify_tag.get_name_index(TagType.APP)
+    mock_admin_client.get.assert_called_once()
+
+    await dify_tag.create("标签2", TagType.APP)
+    assert (await dify_tag.get_name_index(TagType.APP))["标签2"].id == "tag2"
+
+    await dify_tag.delete("tag1")
+    assert "标签1" not in await dify_tag.get_name_index(TagType.APP)
+    mock_admin_client.get.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_ensure_tags():
+    """测试ensure_tags只创建缺失的标签"""
+    mock_admin_client = AsyncMock()
+    mock_admin_client.get.return_value = [
+        {"id": "tag1", "name": "已存在", "type": "knowledge"},
+    ]
+    mock_admin_client.post.return_value = {
+        "id": "tag2", "name": "新标签", "type": "knowledge"
+    }
+
+    dify_tag = DifyTag(mock_admin_client)
+    tags = await dify_tag.ensure_tags(["新标签", "已存在", "新标签"], TagType.KNOWLEDGE)
+
+    assert all(isinstance(tag, Tag) for tag in tags)
+    assert [tag.id for tag in tags] == ["tag2", "tag1", "tag2"]
+    mock_admin_client.post.assert_called_once_with(
+        "/tags", json={"name": "新标签", "type": "knowledge"}
+    )
+
+
+@pytest.mark.asyncio
+async def test_ensure_tags_empty_name():
+    """测试ensure_tags方法，当标签名称为空时"""
+    dify_tag = DifyTag(AsyncMock())
+    with pytest.raises(ValueError, match="标签名称不能为空"):
+        await dify_tag.ensure_tags([""], TagType.APP)
+
+
+@pytest.mark.asyncio
+async def test_ensure_tags_normalized_name():
+    """测试服务端规范化新标签名称、或名称索引在创建期间被清除时，仍按传入的名称返回标签"""
+    mock_admin_client = AsyncMock()
+    mock_admin_client.get.return_value = [
+        {"id": "tag1", "name": "已存在", "type": "app"}
+    ]
+    dify_tag = DifyTag(mock_admin_client)
+
+    async def post(url, json):
+        dify_tag.invalidate(TagType.APP)
+        return {"id": "tag2", "name": json["name"].strip().lower(), "type": "app"}
+
+    mock_admin_client.post.side_effect = post
+    tags = await dify_tag.ensure_tags([" New ", "已存在"], TagType.APP)
+
+    assert [tag.id for tag in tags] == ["tag2", "tag1"]
+    assert tags[0].name == "new"
@@ -0,0 +1,109 @@
+"""
+测试工作流差异对比功能
+"""
+
+import pytest
+from unittest.mock import AsyncMock
+
+from dify.app.workflow import DifyWorkflow
+from dify.app.workflow.diff import WorkflowFingerprint, diff_graphs
+from dify.app.workflow.schemas import WorkflowGraph
+
+
+def _graph(prompt="你好", x=0, extra_node=False, extra_edge=False):
+    nodes = [
+        {
+            "id": "start",
+            "data": {"type": "start", "title": "开始"},
+            "position": {"x": x, "y": 0},
+        },
+        {
+            "id": "llm",
+            "data": {"type": "llm", "title": "LLM", "prompt": {"text": prompt}},
+        },
+        {"id": "end", "data": {"type": "end", "title": "结束"}},
+    ]
+    edges = [
+        {"id": "e1", "source": "start", "target": "llm"},
+        {"id": "e2", "source": "llm", "target": "end"},
+    ]
+    if extra_node:
+        nodes.append({"id": "code", "data": {"type": "code", "title": "代码"}})
+    if extra_edge:
+        edges.append({"id": "e3", "source": "start", "target": "end"})
+    return WorkflowGraph.model_validate({"nodes": nodes, "edges": edges})
+
+
+def test_identical_graphs():
+    """测试相同的工作流图没有差异，且默认忽略画布位置"""
+    assert diff_graphs(_graph(), _graph(x=100)).is_empty
+    assert not diff_graphs(_graph(), _graph(x=100), ignore_layout=False).is_empty
+
+
+def test_layout_names_inside_data_are_compared():
+    """测试只忽略顶层的展示字段，data中同名的配置字段变化仍会被对比"""
+    def graph(width, selected):
+        return WorkflowGraph.model_validate({
+            "nodes": [{
+                "id": "img",
+                "data": {
+                    "type": "tool", "width": width, "height": 512, "selected": selected
+                },
+                "width": 240,
+                "selected": selected,
+            }],
+            "edges": [],
+        })
+
+    assert diff_graphs(graph(512, False), graph(512, True)).is_empty
+    diff = diff_graphs(graph(512, False), graph(1024, True))
+
+    assert [change.path for change in diff.modified_nodes[0].changes] == ["data.width"]
+
+
+def test_modified_node_field_delta():
+    """测试节点数据字段变化"""
+    diff = diff_graphs(_graph(), _graph(prompt="您好"))
+
+    assert [change.id for change in diff.modified_nodes] == ["llm"]
+    change = diff.modified_nodes[0].changes[0]
+    assert change.path == "data.prompt.text"
+    assert (change.old, change.new) == ("你好", "您好")
+
+
+def test_added_and_removed():
+    """测试新增与删除的节点和边"""
+    diff = diff_graphs(_graph(), _graph(extra_node=True, extra_edge=True))
+    assert diff.added_nodes == ["code"]
+    assert diff.added_edges == ["start:source->end:target"]
+
+    reverse = diff_graphs(
+        WorkflowFingerprint(_graph(extra_node=True)), WorkflowFingerprint(_graph())
+    )
+    assert reverse.removed_nodes == ["code"]
+
+
+@pytest.mark.asyncio
+async def test_diff_publish_batch():
+    """测试批量对比多个应用"""
+    graphs = {
+        "base": _graph(),
+        "same": _graph(x=10),
+        "changed": _graph(prompt="改动"),
+    }
+    mock_admin_client = AsyncMock()
+
+    async def get(url, params=None, headers=None):
+        app_id = url.split("/")[2]
+        if app_id not in graphs:
+            raise RuntimeError("not found")
+        return {"id": app_id, "graph": graphs[app_id].model_dump()}
+
+    mock_admin_client.get.side_effect = get
+    workflow = DifyWorkflow(mock_admin_client)
+
+    results = await workflow.diff_publish("base", ["same", "changed", "missing"])
+
+    assert results["same"].unwrap().is_empty
+    assert [c.id for c in results["changed"].unwrap().modified_nodes] == ["llm"]
+    assert results["missing"].is_err()
@@ -0,0 +1,119 @@
+"""
+测试工作流图索引功能
+"""
+
+import pytest
+from unittest.mock import AsyncMock
+
+from dify.app.workflow import DifyWorkflow
+from dify.app.workflow.graph import WorkflowGraphIndex
+from dify.app.workflow.schemas import WorkflowGraph
+
+
+def _graph(edges, in_iteration=()):
+    nodes = sorted({n for edge in edges for n in edge})
+    return WorkflowGraph.model_validate({
+        "nodes": [{"id": n, "data": {"type": n, "title": n}} for n in nodes],
+        "edges": [
+            {
+                "id": f"{s}-{t}",
+                "source": s,
+                "target": t,
+                "data": {"isInIteration": (s, t) in in_iteration},
+            }
+            for s, t in edges
+        ],
+    })
+
+
+@pytest.fixture
+def index():
+    # start -> llm -> end, start -> code -> tool -> end
+    return WorkflowGraphIndex(_graph(
+        [
+            ("start", "llm"), ("start", "code"), ("code", "tool"), ("llm", "end"),
+            ("tool", "end"),
+        ],
+        in_iteration={("code", "tool")},
+    ))
+
+
+def test_adjacency(index):
+    """测试邻接关系查询"""
+    assert index.node("llm").data.title == "llm"
+    assert index.successors("start") == ["llm", "code"]
+    assert sorted(index.predecessors("end")) == ["llm", "tool"]
+    assert index.sources == ["start"]
+    assert index.sinks == ["end"]
+    assert index.branch_points() == ["start"]
+
+
+def test_topology(index):
+    """测试拓扑序、层级与最长路径"""
+    order = index.topological_order()
+    assert (
+        order.index("start") < order.index("code") < order.index("tool")
+        < order.index("end")
+    )
+    assert index.levels()["end"] == 3
+    assert index.parallel_groups() == [["llm", "code"]]
+    assert index.longest_path() == ["start", "code", "tool", "end"]
+    longest = index.longest_path(weight=lambda n: 10 if n.id == "llm" else 1)
+    assert longest == ["start", "llm", "end"]
+
+
+def test_reachability_and_iteration(index):
+    """测试可达性与迭代检测"""
+    assert index.is_reachable("code", "end")
+    assert not index.is_reachable("llm", "code")
+    assert index.ancestors("tool") == {"start", "code"}
+    assert [edge.id for edge in index.iteration_edges] == ["code-tool"]
+    assert index.iteration_nodes == {"code", "tool"}
+
+
+def test_cycle_detection():
+    """测试环检测"""
+    index = WorkflowGraphIndex(_graph([("a", "b"), ("b", "c"), ("c", "a")]))
+    assert index.has_cycle()
+    with pytest.raises(ValueError, match="存在环"):
+        index.topological_order()
+
+
+@pytest.mark.asyncio
+async def test_get_publish_index_cached():
+    """测试同一发布版本的索引只构建一次"""
+    mock_admin_client = AsyncMock()
+    mock_admin_client.get.return_value = {
+        "id": "workflow-version-1",
+        "graph": _graph([("start", "end")]).model_dump(),
+    }
+    workflow = DifyWorkflow(mock_admin_client)
+
+    first = await workflow.get_publish_index("app1")
+    second = await workflow.get_publish_index("app1")
+
+    assert first is second
+    assert first.topological_order() == ["start", "end"]
+    # 其他客户端（可能是另一个Dify服务）返回相同的版本ID时不共享索引
+    assert await DifyWorkflow(mock_admin_client).get_publish_index("app1") is not first
+
+
+@pytest.mark.asyncio
+async def test_get_publish_index_without_id_not_cached():
+    """测试发布详情没有ID时不缓存索引，缓存超过容量时淘汰最久未使用的"""
+    mock_admin_client = AsyncMock()
+    mock_admin_client.get.return_value = {
+        "id": "", "graph": _graph([("start", "end")]).model_dump()
+    }
+    workflow = DifyWorkflow(mock_admin_client, index_cache_size=1)
+
+    first = await workflow.get_publish_index("app1")
+    assert first is not await workflow.get_publish_index("app2")
+    assert len(workflow._indexes) == 0
+
+    for version in ("v1", "v2"):
+        mock_admin_client.get.return_value = {
+            "id": version, "graph": _graph([("a", "b")]).model_dump()
+        }
+        await workflow.get_publish_index("app1")
+    assert list(workflow._indexes) == ["v2"]
@@ -0,0 +1,120 @@
+"""
+测试工作流执行跟踪功能
+"""
+
+import json
+from decimal import Decimal
+
+import pytest
+
+from dify.app.utils import parse_event
+from dify.app.workflow.trace import WorkflowTraceCollector, dump_chrome_trace
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _event(at, event, **data):
+    return at, {"event": event, "workflow_run_id": "run1", "data": data}
+
+
+def _started(at, id, node_id, title, predecessor_node_id=None):
+    return _event(
+        at, "node_started", id=id, node_id=node_id, node_type=node_id, title=title,
+        predecessor_node_id=predecessor_node_id,
+    )
+
+
+def _finished(at, id, node_id, elapsed_time, **extra):
+    return _event(
+        at, "node_finished", id=id, node_id=node_id, status="succeeded",
+        elapsed_time=elapsed_time, **extra,
+    )
+
+
+def _events():
+    """start -> (llm, code 并行) -> end"""
+    usage = {"total_tokens": 100, "total_price": "0.002", "currency": "USD"}
+    started = _event(0.0, "workflow_started", id="run1")
+    started[1]["task_id"] = "t1"
+    return [
+        started,
+        _started(0.0, "e1", "start", "开始"),
+        _finished(0.1, "e1", "start", 0.1),
+        _started(0.2, "e2", "llm", "LLM", "start"),
+        _started(0.2, "e3", "code", "代码", "start"),
+        _finished(0.3, "e3", "code", 0.1),
+        _finished(1.2, "e2", "llm", 1.0, execution_metadata=usage),
+        _started(1.3, "e4", "end", "结束", "llm"),
+        _finished(1.3, "e4", "end", 0.0),
+        _event(
+            1.3, "workflow_finished", id="run1", status="succeeded", elapsed_time=1.3,
+            total_tokens=100,
+        ),
+    ]
+
+
+@pytest.fixture
+def trace():
+    clock = FakeClock()
+    collector = WorkflowTraceCollector(clock=clock)
+    for at, data in _events():
+        clock.now = at
+        collector.feed(parse_event(data))
+    return collector.traces["run1"]
+
+
+def test_span_tree(trace):
+    """测试跨度树结构与统计"""
+    assert trace.status == "succeeded"
+    assert [span.id for span in trace.roots] == ["e1"]
+    assert sorted(trace.spans["e1"].children) == ["e2", "e3"]
+    assert trace.spans["e2"].queue_gap == pytest.approx(0.1)
+    assert trace.spans["e2"].total_tokens == 100
+    assert trace.total_price == Decimal("0.002")
+    assert trace.slowest(1)[0].node_id == "llm"
+
+
+def test_critical_path(trace):
+    """测试关键路径"""
+    assert [span.node_id for span in trace.critical_path()] == ["start", "llm", "end"]
+
+
+def test_chrome_trace(trace, tmp_path):
+    """测试导出Chrome trace格式"""
+    events = trace.to_chrome_trace()["traceEvents"]
+
+    assert len(events) == 4
+    parallel = {e["name"]: e["tid"] for e in events if e["name"] in ("LLM", "代码")}
+    assert parallel["LLM"] != parallel["代码"]
+    assert next(e for e in events if e["name"] == "LLM")["dur"] == 1_000_000
+
+    path = tmp_path / "trace.json"
+    dump_chrome_trace([trace], str(path))
+    assert len(json.loads(path.read_text(encoding="utf-8"))["traceEvents"]) == 4
+
+
+def test_folded_stacks(trace):
+    """测试导出折叠栈格式"""
+    lines = trace.to_folded_stacks().splitlines()
+    assert "开始;LLM;结束 0" in lines
+    assert "开始;LLM 1000000" in lines
+
+
+@pytest.mark.asyncio
+async def test_wrap_passes_events_through():
+    """测试包装事件流时原样转发事件"""
+    collector = WorkflowTraceCollector()
+
+    async def events():
+        for _, data in _events():
+            yield parse_event(data)
+
+    forwarded = [event async for event in collector.wrap(events())]
+    assert len(forwarded) == len(_events())
+    assert len(collector.traces["run1"].spans) == 4